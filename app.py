@@ -1,10 +1,39 @@
-from flask import Flask, jsonify
-from helpers.DatabaseManager import DatabaseManager
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+from flask import Blueprint, Flask, Response, jsonify, request
+from helpers.FlaskCompression import Compression
+from helpers.FlaskDatabase import get_async_db, get_db, init_app
+from helpers.FlaskJSON import FastJSONProvider
+from helpers.FlaskResponses import paginated_response, stream_json_array, stream_ndjson
+from helpers.Metrics import METRICS
 import traceback
 
-app = Flask(__name__)
+bp = Blueprint('main', __name__)
+
+# Tempos de inicialização do processo (segundos), expostos em /metrics
+STARTUP_SECONDS = {'import': time.perf_counter() - _import_started}
+
+
+def create_app():
+    """Cria a aplicação Flask (usada pelo servidor WSGI: `gunicorn 'app:create_app()'`)"""
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    Compression(app)
+    init_app(app)
+    app.register_blueprint(bp)
+    STARTUP_SECONDS['create_app'] = time.perf_counter() - started
+    return app
+
 
-@app.route('/')
+METRICS.register_collector(lambda: [
+    ('app_startup_seconds', 'Tempo de inicialização da aplicação.', {'phase': phase}, seconds)
+    for phase, seconds in STARTUP_SECONDS.items()
+])
+
+@bp.route('/')
 def index():
     """Rota principal - Health Check"""
     return jsonify({
@@ -12,14 +41,35 @@ def index():
         "message": "Flask está rodando na VM!"
     })
 
-@app.route('/test-db')
+@bp.route('/ready')
+def ready():
+    """Rota de prontidão - verifica se o worker consegue usar o banco de dados"""
+    try:
+        db = get_db()
+        db.execute_scalar("SELECT 1")
+
+        return jsonify({
+            "status": "ready",
+            "pool_size": db.pool.size,
+            "pool_idle": db.pool.idle_count
+        })
+
+    except Exception as e:
+        return jsonify({
+            "status": "unavailable",
+            "message": str(e)
+        }), 503
+
+@bp.route('/metrics')
+def metrics():
+    """Métricas do banco de dados no formato do Prometheus"""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/test-db')
 def test_db():
     """Rota para testar conexão com o banco de dados"""
-    db = None
     try:
-        db = DatabaseManager()
-        db.authenticate_user()
-        db.connect_to_database()
+        db = get_db()
         
         # Teste simples: buscar a data atual do servidor
         result = db.execute_query("SELECT GETDATE() AS data_servidor")
@@ -27,7 +77,7 @@ def test_db():
         return jsonify({
             "status": "success",
             "message": "Conexão com banco de dados OK!",
-            "server_time": str(result[0]['data_servidor']) if result else None
+            "server_time": result[0]['data_servidor'] if result else None
         })
         
     except Exception as e:
@@ -36,19 +86,12 @@ def test_db():
             "message": str(e),
             "traceback": traceback.format_exc()
         }), 500
-        
-    finally:
-        if db:
-            db.close_connection()
 
-@app.route('/test-query')
+@bp.route('/test-query')
 def test_query():
     """Rota para testar uma query personalizada"""
-    db = None
     try:
-        db = DatabaseManager()
-        db.authenticate_user()
-        db.connect_to_database()
+        db = get_db()
         
         # Exemplo: listar tabelas do banco
         result = db.execute_query("""
@@ -70,10 +113,102 @@ def test_query():
             "message": str(e),
             "traceback": traceback.format_exc()
         }), 500
-        
-    finally:
-        if db:
-            db.close_connection()
+
+@bp.route('/test-query-stream')
+def test_query_stream():
+    """Rota para testar o streaming de resultados (?format=ndjson ou ?format=json)"""
+    try:
+        db = get_db()
+
+        rows = db.iter_query("""
+            SELECT 
+                TABLE_SCHEMA, 
+                TABLE_NAME 
+            FROM INFORMATION_SCHEMA.TABLES 
+            ORDER BY TABLE_NAME
+        """)
+
+        if request.args.get('format') == 'json':
+            return stream_json_array(rows)
+        return stream_ndjson(rows)
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "traceback": traceback.format_exc()
+        }), 500
+
+@bp.route('/test-query-page')
+def test_query_page():
+    """Rota para testar a paginação por chave (?limit=N e ?cursor=<next_cursor>)"""
+    try:
+        db = get_db()
+
+        return paginated_response(lambda cursor, limit: db.select_page(
+            'INFORMATION_SCHEMA.TABLES',
+            ['TABLE_SCHEMA', 'TABLE_NAME'],
+            '',
+            ['TABLE_SCHEMA', 'TABLE_NAME'],
+            page_size=limit,
+            cursor=cursor
+        ))
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "traceback": traceback.format_exc()
+        }), 500
+
+@bp.route('/test-db-async')
+async def test_db_async():
+    """Rota para testar consultas simultâneas com o AsyncDatabaseManager"""
+    try:
+        db = get_async_db()
+
+        # As duas consultas aguardam o banco ao mesmo tempo, em conexões diferentes do pool
+        server_time, table_count = await asyncio.gather(
+            db.execute_scalar("SELECT GETDATE()", timeout=10),
+            db.execute_scalar("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES", timeout=10),
+        )
+
+        return jsonify({
+            "status": "success",
+            "server_time": server_time,
+            "table_count": table_count
+        })
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "traceback": traceback.format_exc()
+        }), 500
+
+@bp.route('/test-db-batch')
+def test_db_batch():
+    """Rota para testar várias consultas em um único lote (uma ida ao servidor)"""
+    try:
+        db = get_db()
+
+        results = db.execute_batch({
+            'server_time': "SELECT GETDATE() AS server_time",
+            'table_count': "SELECT COUNT(*) AS table_count FROM INFORMATION_SCHEMA.TABLES",
+        })
+
+        return jsonify({
+            "status": "success",
+            "server_time": results['server_time'].rows[0]['server_time'],
+            "table_count": results['table_count'].rows[0]['table_count']
+        })
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "traceback": traceback.format_exc()
+        }), 500
 
 if __name__ == '__main__':
     print("=" * 50)
@@ -81,8 +216,17 @@ if __name__ == '__main__':
     print("=" * 50)
     print("Endpoints disponíveis:")
     print("  - GET /          -> Health Check")
+    print("  - GET /ready     -> Prontidão (banco de dados)")
+    print("  - GET /metrics   -> Métricas (Prometheus)")
     print("  - GET /test-db   -> Testar conexão com DB")
     print("  - GET /test-query -> Listar tabelas do banco")
+    print("  - GET /test-query-stream -> Listar tabelas em streaming (NDJSON)")
+    print("  - GET /test-query-page -> Listar tabelas paginadas (cursor)")
+    print("  - GET /test-db-async -> Consultas simultâneas (async)")
+    print("  - GET /test-db-batch -> Consultas em um único lote")
+    print("=" * 50)
+    print("Servidor de desenvolvimento; em produção use: gunicorn -c gunicorn.conf.py 'app:create_app()'")
     print("=" * 50)
     
+    app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
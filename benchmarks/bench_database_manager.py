@@ -0,0 +1,269 @@
+"""
+Micro-benchmarks do DatabaseManager contra o driver local (benchmarks/stand_in.py).
+
+Uso:
+    python -m benchmarks.bench_database_manager --output resultados.json
+    python -m benchmarks.bench_database_manager --compare resultados.json
+
+O resultado é um JSON com metadados da execução e uma entrada por benchmark
+(nome, parâmetros, tempos, linhas/s ou operações/s e pico de alocação).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.stand_in import StandInDriver, install
+
+RESULT_FORMATS = ('dict', 'row', 'tuple', 'columnar')
+BATCH_SIZES = (100, 1000, 10000)
+INSERT_STRATEGIES = ('fast_executemany', 'values', 'executemany')
+
+
+def _measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _peak_allocation(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _result(name, params, timings, units, unit_name, peak_bytes=None):
+    best = min(timings)
+    return {
+        'name': name,
+        'params': params,
+        'repeat': len(timings),
+        'best_seconds': best,
+        'median_seconds': statistics.median(timings),
+        unit_name: units / best if best > 0 else None,
+        'peak_alloc_bytes': peak_bytes,
+    }
+
+
+class Benchmarks:
+    """Prepara o banco local e executa cada grupo de benchmarks."""
+
+    def __init__(self, rows, repeat, connect_latency, execute_latency):
+        self.rows = rows
+        self.repeat = repeat
+        self.driver = StandInDriver(connect_latency=connect_latency, execute_latency=execute_latency)
+        module = install(self.driver)
+        self.DatabaseManager = module.DatabaseManager
+        self.pool = module.ConnectionPool(self.driver.connect, min_size=1, max_size=4)
+
+    def _manager(self):
+        db = self.DatabaseManager(pool=self.pool)
+        db.connect_to_database()
+        return db
+
+    def run(self):
+        results = []
+        try:
+            results += self.query_materialization()
+            results += self.insert_batch()
+            results += self.delete_disparo()
+            results += self.connect_teardown()
+        finally:
+            self.pool.close()
+            self.driver.cleanup()
+        return results
+
+    def query_materialization(self):
+        db = self._manager()
+        db.execute_non_query(
+            "CREATE TABLE bench_rows (id INTEGER PRIMARY KEY, name TEXT, amount REAL, "
+            "created TEXT, flag INTEGER, notes TEXT)"
+        )
+        db.bulk_insert('bench_rows', (
+            {'id': i, 'name': f'name {i}', 'amount': i * 1.5, 'created': '2026-01-07 14:20:00',
+             'flag': i % 2, 'notes': 'x' * 40}
+            for i in range(self.rows)
+        ), strategy='fast_executemany')
+
+        results = []
+        query = "SELECT id, name, amount, created, flag, notes FROM bench_rows"
+        for result_format in RESULT_FORMATS:
+            run = lambda: db.execute_query(query, result_format=result_format)
+            results.append(_result(
+                'execute_query', {'rows': self.rows, 'result_format': result_format},
+                _measure(run, self.repeat), self.rows, 'rows_per_sec', _peak_allocation(run),
+            ))
+
+        for result_format in ('dict', 'tuple'):
+            run = lambda: sum(1 for _ in db.iter_query(query, result_format=result_format))
+            results.append(_result(
+                'iter_query', {'rows': self.rows, 'result_format': result_format},
+                _measure(run, self.repeat), self.rows, 'rows_per_sec', _peak_allocation(run),
+            ))
+
+        db.close_connection()
+        return results
+
+    def insert_batch(self):
+        db = self._manager()
+        db.execute_non_query("CREATE TABLE bench_insert (id INTEGER, name TEXT, amount REAL, flag INTEGER)")
+        results = []
+        for batch_size in BATCH_SIZES:
+            data = [{'id': i, 'name': f'name {i}', 'amount': i * 1.5, 'flag': i % 2} for i in range(batch_size)]
+            for strategy in INSERT_STRATEGIES:
+                def run():
+                    db.insert_batch('bench_insert', data, strategy=strategy)
+                    db.execute_non_query("DELETE FROM bench_insert")
+                results.append(_result(
+                    'insert_batch', {'batch_size': batch_size, 'strategy': strategy},
+                    _measure(run, self.repeat), batch_size, 'rows_per_sec',
+                ))
+        db.close_connection()
+        return results
+
+    def delete_disparo(self, disparos=50, children=20):
+        db = self._manager()
+        for ddl in (
+            "CREATE TABLE RE.disparos (disparo_id INTEGER PRIMARY KEY)",
+            "CREATE TABLE RE.resumo_envios (resumo_id INTEGER PRIMARY KEY, pulse_id INTEGER, anexo_id INTEGER)",
+            "CREATE TABLE RE.email_envios (envio_id INTEGER PRIMARY KEY, pulse_id INTEGER, anexo_id INTEGER)",
+            "CREATE TABLE RE.anexos (anexo_id INTEGER PRIMARY KEY)",
+            "CREATE TABLE RE.resumo_destinatarios (resumo_id INTEGER, email TEXT)",
+            "CREATE TABLE RE.email_destinatarios (envio_id INTEGER, email TEXT)",
+        ):
+            db.execute_non_query(ddl)
+
+        def populate():
+            for table in ('disparos', 'resumo_envios', 'email_envios', 'anexos',
+                          'resumo_destinatarios', 'email_destinatarios'):
+                db.execute_non_query(f"DELETE FROM RE.{table}")
+            ids = range(disparos)
+            db.insert_batch('RE.disparos', ({'disparo_id': d} for d in ids))
+            db.insert_batch('RE.resumo_envios', ({'resumo_id': d, 'pulse_id': d, 'anexo_id': d * 2} for d in ids))
+            db.insert_batch('RE.email_envios', ({'envio_id': d, 'pulse_id': d, 'anexo_id': d * 2 + 1} for d in ids))
+            db.insert_batch('RE.anexos', ({'anexo_id': a} for a in range(disparos * 2)))
+            db.insert_batch('RE.resumo_destinatarios', (
+                {'resumo_id': d, 'email': f'{c}@x'} for d in ids for c in range(children)))
+            db.insert_batch('RE.email_destinatarios', (
+                {'envio_id': d, 'email': f'{c}@x'} for d in ids for c in range(children)))
+
+        def one_by_one():
+            for disparo_id in range(disparos):
+                if not db.delete_disparo(disparo_id):
+                    raise RuntimeError("delete_disparo falhou")
+
+        def all_at_once():
+            if not db.delete_disparos(range(disparos)):
+                raise RuntimeError("delete_disparos falhou")
+
+        results = []
+        for name, run in (('delete_disparo', one_by_one), ('delete_disparos', all_at_once)):
+            timings = []
+            for _ in range(self.repeat):
+                populate()
+                timings += _measure(run, 1)
+            results.append(_result(
+                name, {'disparos': disparos, 'children': children}, timings, disparos, 'disparos_per_sec',
+            ))
+        db.close_connection()
+        return results
+
+    def connect_teardown(self, iterations=200):
+        def connect_per_request():
+            for _ in range(iterations):
+                db = self.DatabaseManager()
+                db.connect_to_database()
+                db.close_connection()
+
+        def pooled():
+            for _ in range(iterations):
+                db = self.DatabaseManager(pool=self.pool)
+                db.connect_to_database()
+                db.close_connection()
+
+        return [
+            _result('connect_teardown', {'mode': mode, 'iterations': iterations},
+                    _measure(run, self.repeat), iterations, 'ops_per_sec')
+            for mode, run in (('connect_per_request', connect_per_request), ('pooled', pooled))
+        ]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(result):
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare(baseline, current):
+    """Imprime a variação de throughput de cada benchmark em relação a uma execução anterior."""
+    previous = {_key(result): result for result in baseline['results']}
+    print(f"{'benchmark':<18} {'parâmetros':<52} {'anterior':>12} {'atual':>12} {'variação':>9}")
+    for result in current['results']:
+        old = previous.get(_key(result))
+        metric = next(key for key in result if key.endswith('_per_sec'))
+        new_value = result[metric]
+        old_value = old.get(metric) if old else None
+        change = f"{(new_value / old_value - 1) * 100:+.1f}%" if old_value and new_value else 'n/d'
+        print(f"{result['name']:<18} {json.dumps(result['params'], sort_keys=True):<52} "
+              f"{old_value or 0:>12.0f} {new_value or 0:>12.0f} {change:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do DatabaseManager com driver local.")
+    parser.add_argument('--rows', type=int, default=50000, help="Linhas da tabela de leitura.")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições de cada medição.")
+    parser.add_argument('--connect-latency-ms', type=float, default=0.0, help="Latência artificial de connect.")
+    parser.add_argument('--execute-latency-ms', type=float, default=0.0, help="Latência artificial por ida ao servidor.")
+    parser.add_argument('--output', help="Arquivo JSON de saída (padrão: stdout).")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para comparação.")
+    args = parser.parse_args(argv)
+
+    # O log de consultas lentas mediria o próprio benchmark; desligado salvo configuração explícita
+    os.environ.setdefault('DB_SLOW_QUERY_MS', '-1')
+
+    benchmarks = Benchmarks(args.rows, args.repeat, args.connect_latency_ms / 1000, args.execute_latency_ms / 1000)
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'connect_latency_ms': args.connect_latency_ms,
+            'execute_latency_ms': args.execute_latency_ms,
+        },
+        'results': benchmarks.run(),
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(json.load(file), report)
+
+
+if __name__ == '__main__':
+    main()
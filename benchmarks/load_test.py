@@ -0,0 +1,396 @@
+"""
+Teste de carga HTTP da aplicação Flask com o banco substituído pelo driver local.
+
+Sobe a aplicação em um processo separado (servidor do Werkzeug com threads ou Gunicorn com
+gunicorn.conf.py), com o DatabaseManager usando benchmarks/stand_in.py com latência e falhas
+injetadas, e dispara requisições com N clientes simultâneos por um tempo fixo. O relatório traz,
+por endpoint, vazão, taxa de erros, percentis de latência (p50/p95/p99) e um histograma.
+
+Uso:
+    python -m benchmarks.load_test --concurrency 16 --duration 30 --execute-latency-ms 5
+    python -m benchmarks.load_test --server gunicorn --env WEB_WORKERS=2 --output gunicorn.json
+    python -m benchmarks.load_test --server gunicorn --compare gunicorn.json
+"""
+import argparse
+import bisect
+import http.client
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from benchmarks.bench_database_manager import _git_commit
+from benchmarks.stand_in import StandInDriver, install
+
+DEFAULT_ENDPOINTS = ('/', '/test-db', '/test-query')
+SERVERS = ('werkzeug', 'gunicorn')
+
+# Limites superiores (ms) das faixas do histograma de latência
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, math.inf)
+
+# Configuração do banco local repassada ao processo do servidor
+ENV_DB_PATH = 'LOAD_TEST_DB_PATH'
+ENV_CONNECT_LATENCY = 'LOAD_TEST_CONNECT_LATENCY_MS'
+ENV_EXECUTE_LATENCY = 'LOAD_TEST_EXECUTE_LATENCY_MS'
+ENV_FAILURE_RATE = 'LOAD_TEST_FAILURE_RATE'
+ENV_FAILURE_SQLSTATE = 'LOAD_TEST_FAILURE_SQLSTATE'
+
+SCHEMAS = ('RE', 'INFORMATION_SCHEMA')
+
+
+def prepare_database(path, tables=50):
+    """Cria no banco local o catálogo consultado pelas rotas (INFORMATION_SCHEMA.TABLES)."""
+    driver = StandInDriver(path=path, schemas=SCHEMAS)
+    conn = driver.connect()
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE TABLE INFORMATION_SCHEMA.TABLES (TABLE_SCHEMA TEXT, TABLE_NAME TEXT)")
+        for number in range(tables):
+            cursor.execute("INSERT INTO INFORMATION_SCHEMA.TABLES VALUES (?, ?)", ('RE', f'tabela_{number:03d}'))
+    conn.commit()
+    conn.close()
+    return driver
+
+
+def create_stand_in_app():
+    """
+    Cria a aplicação com o DatabaseManager ligado ao banco local descrito pelas variáveis
+    LOAD_TEST_* (usada pelo servidor: `gunicorn 'benchmarks.load_test:create_stand_in_app()'`).
+    """
+    os.environ.setdefault('SECRET_DB_SERVER', 'stand-in')
+    os.environ.setdefault('SECRET_DB_DATABASE', 'stand-in')
+    install(StandInDriver(
+        path=os.environ[ENV_DB_PATH],
+        schemas=SCHEMAS,
+        connect_latency=float(os.getenv(ENV_CONNECT_LATENCY, '0')) / 1000,
+        execute_latency=float(os.getenv(ENV_EXECUTE_LATENCY, '0')) / 1000,
+        failure_rate=float(os.getenv(ENV_FAILURE_RATE, '0')),
+        failure_sqlstate=os.getenv(ENV_FAILURE_SQLSTATE, '08S01'),
+    ))
+    from app import create_app
+    return create_app()
+
+
+def _serve(port):
+    # Servidor do Werkzeug com uma thread por requisição, como `app.run` do app.py
+    create_stand_in_app().run(host='127.0.0.1', port=port, threaded=True)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """Processo da aplicação sob teste; o log do servidor vai para um arquivo temporário."""
+
+    def __init__(self, server, port, env):
+        if server == 'gunicorn':
+            command = [
+                sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{port}', '--access-logfile', '/dev/null',
+                'benchmarks.load_test:create_stand_in_app()',
+            ]
+        else:
+            command = [sys.executable, '-m', 'benchmarks.load_test', '--serve', str(port)]
+        self.port = port
+        self.log = tempfile.NamedTemporaryFile(prefix='load_test_', suffix='.log', delete=False)
+        self.process = subprocess.Popen(command, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    def wait_ready(self, timeout=30):
+        """Espera `GET /` responder; falha se o processo terminar ou o tempo acabar."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=1)
+                conn.request('GET', '/')
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"O servidor não respondeu em {timeout}s; veja o log em {self.log.name}")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
+
+
+class _EndpointStats:
+    __slots__ = ('latencies', 'statuses', 'exceptions', 'bytes')
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.exceptions = Counter()
+        self.bytes = 0
+
+    def merge(self, other):
+        self.latencies += other.latencies
+        self.statuses.update(other.statuses)
+        self.exceptions.update(other.exceptions)
+        self.bytes += other.bytes
+
+
+def _client(port, paths, headers, offset, measure_from, deadline, stats):
+    # Cliente em laço fechado: a próxima requisição sai assim que a anterior termina
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    position = offset
+    while True:
+        started = time.perf_counter()
+        if started >= deadline:
+            break
+        path = paths[position % len(paths)]
+        position += 1
+        status, size, error = None, 0, None
+        for attempt in range(2):
+            reused = conn.sock is not None
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                size = len(response.read())
+                status = response.status
+                break
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                error = type(e).__name__
+                # O servidor fechou a conexão keep-alive ociosa (ex.: worker reciclado): nova conexão, como um navegador
+                if not (reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))):
+                    break
+        elapsed = time.perf_counter() - started
+        if started >= measure_from:
+            endpoint = stats.setdefault(path, _EndpointStats())
+            endpoint.latencies.append(elapsed)
+            endpoint.bytes += size
+            if status is None:
+                endpoint.exceptions[error] += 1
+            else:
+                endpoint.statuses[status] += 1
+    conn.close()
+
+
+def run_load(port, paths, concurrency, duration, warmup=0.0, headers=None):
+    """
+    Dispara requisições com `concurrency` clientes durante `warmup + duration` segundos.
+
+    Returns:
+        dict: {endpoint: _EndpointStats} com as requisições iniciadas após o aquecimento.
+    """
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+    per_client = [{} for _ in range(concurrency)]
+    clients = [
+        threading.Thread(target=_client, args=(port, paths, headers or {}, number, measure_from, deadline, stats))
+        for number, stats in enumerate(per_client)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    merged = {path: _EndpointStats() for path in paths}
+    for stats in per_client:
+        for path, endpoint in stats.items():
+            merged[path].merge(endpoint)
+    return merged
+
+
+def _percentile(ordered, percent):
+    # Método nearest-rank sobre as latências ordenadas
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def summarize(stats, duration):
+    """Vazão, erros (exceções ou HTTP >= 400), percentis e histograma de um endpoint."""
+    ordered = sorted(stats.latencies)
+    requests = len(ordered)
+    errors = sum(stats.exceptions.values()) + sum(
+        count for status, count in stats.statuses.items() if status >= 400
+    )
+    histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+    for latency in ordered:
+        histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, latency * 1000)] += 1
+
+    summary = {
+        'requests': requests,
+        'errors': errors,
+        'error_rate': errors / requests if requests else 0.0,
+        'requests_per_sec': requests / duration,
+        'bytes_per_request': stats.bytes / requests if requests else 0,
+        'statuses': {str(status): count for status, count in sorted(stats.statuses.items())},
+        'exceptions': dict(stats.exceptions),
+        'latency_ms': None,
+        'histogram': [
+            {'le_ms': None if bound == math.inf else bound, 'count': count}
+            for bound, count in zip(HISTOGRAM_BUCKETS_MS, histogram)
+        ],
+    }
+    if ordered:
+        summary['latency_ms'] = {
+            'min': ordered[0] * 1000,
+            'mean': sum(ordered) / requests * 1000,
+            'p50': _percentile(ordered, 50) * 1000,
+            'p95': _percentile(ordered, 95) * 1000,
+            'p99': _percentile(ordered, 99) * 1000,
+            'max': ordered[-1] * 1000,
+        }
+    return summary
+
+
+def print_report(results):
+    """Imprime o resumo de cada endpoint e o histograma de latência."""
+    for result in results:
+        summary = result['summary']
+        latency = summary['latency_ms'] or dict.fromkeys(('p50', 'p95', 'p99', 'max'), 0)
+        print(f"\n{result['endpoint']}: {summary['requests']} requisições, "
+              f"{summary['requests_per_sec']:.1f} req/s, erros {summary['error_rate'] * 100:.2f}%")
+        print(f"  latência (ms): p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  "
+              f"p99 {latency['p99']:.1f}  máx {latency['max']:.1f}")
+        if summary['statuses'] or summary['exceptions']:
+            print(f"  respostas: {dict(summary['statuses'], **summary['exceptions'])}")
+        largest = max((bucket['count'] for bucket in summary['histogram']), default=0) or 1
+        for bucket in summary['histogram']:
+            if not bucket['count']:
+                continue
+            label = f"<= {bucket['le_ms']:>4} ms" if bucket['le_ms'] is not None else "    > 5000 ms"
+            bar = '#' * max(1, round(bucket['count'] / largest * 40))
+            print(f"  {label:>13} | {bar:<40} {bucket['count']}")
+
+
+def compare(baseline, current):
+    """Imprime a variação de vazão e percentis de cada endpoint em relação a uma execução anterior."""
+    previous = {result['endpoint']: result['summary'] for result in baseline['results']}
+    print(f"\n{'endpoint':<20} {'métrica':<12} {'anterior':>10} {'atual':>10} {'variação':>9}")
+    for result in current['results']:
+        old = previous.get(result['endpoint'])
+        new = result['summary']
+        rows = [('req/s', old and old['requests_per_sec'], new['requests_per_sec'])]
+        for percentile in ('p50', 'p95', 'p99'):
+            rows.append((f'{percentile} ms',
+                         old and old['latency_ms'] and old['latency_ms'][percentile],
+                         new['latency_ms'] and new['latency_ms'][percentile]))
+        rows.append(('erros %', old and old['error_rate'] * 100, new['error_rate'] * 100))
+        for metric, old_value, new_value in rows:
+            change = f"{(new_value / old_value - 1) * 100:+.1f}%" if old_value and new_value else 'n/d'
+            print(f"{result['endpoint']:<20} {metric:<12} {old_value or 0:>10.1f} {new_value or 0:>10.1f} {change:>9}")
+
+
+def _parse_pairs(values, separator, option):
+    pairs = {}
+    for value in values:
+        key, found, item = value.partition(separator)
+        if not found:
+            raise SystemExit(f"{option} espera CHAVE{separator}VALOR: {value!r}")
+        pairs[key.strip()] = item.strip()
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga HTTP da aplicação com banco local.")
+    parser.add_argument('--server', choices=SERVERS, default='werkzeug', help="Servidor da aplicação.")
+    parser.add_argument('--endpoint', action='append', dest='endpoints',
+                        help=f"Caminho a testar (repetível; padrão: {' '.join(DEFAULT_ENDPOINTS)}).")
+    parser.add_argument('--concurrency', type=int, default=8, help="Clientes simultâneos.")
+    parser.add_argument('--duration', type=float, default=10.0, help="Segundos de medição.")
+    parser.add_argument('--warmup', type=float, default=2.0, help="Segundos de carga descartados no início.")
+    parser.add_argument('--connect-latency-ms', type=float, default=0.0, help="Latência artificial de connect.")
+    parser.add_argument('--execute-latency-ms', type=float, default=0.0, help="Latência artificial por ida ao servidor.")
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help="Probabilidade (0 a 1) de cada connect ou ida ao banco falhar.")
+    parser.add_argument('--failure-sqlstate', default='08S01', help="SQLSTATE das falhas injetadas.")
+    parser.add_argument('--header', action='append', default=[],
+                        help="Cabeçalho das requisições, ex.: 'Accept-Encoding: gzip' (repetível).")
+    parser.add_argument('--env', action='append', default=[],
+                        help="Variável de ambiente do servidor, ex.: DB_POOL_MAX_SIZE=4 (repetível).")
+    parser.add_argument('--output', help="Arquivo JSON de saída.")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para comparação.")
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        _serve(args.serve)
+        return
+
+    paths = args.endpoints or list(DEFAULT_ENDPOINTS)
+    headers = _parse_pairs(args.header, ':', '--header')
+    server_env = _parse_pairs(args.env, '=', '--env')
+
+    driver = prepare_database(None)
+    port = _free_port()
+    env = dict(os.environ)
+    # O log de consultas lentas mediria a latência injetada; desligado salvo configuração explícita
+    env.setdefault('DB_SLOW_QUERY_MS', '-1')
+    env.update(server_env)
+    env.update({
+        ENV_DB_PATH: driver.path,
+        ENV_CONNECT_LATENCY: str(args.connect_latency_ms),
+        ENV_EXECUTE_LATENCY: str(args.execute_latency_ms),
+        ENV_FAILURE_RATE: str(args.failure_rate),
+        ENV_FAILURE_SQLSTATE: args.failure_sqlstate,
+    })
+
+    server = AppServer(args.server, port, env)
+    try:
+        server.wait_ready()
+        print(f"Servidor {args.server} na porta {port}; {args.concurrency} clientes por "
+              f"{args.duration:.0f}s (aquecimento de {args.warmup:.0f}s)...")
+        stats = run_load(port, paths, args.concurrency, args.duration, args.warmup, headers)
+    finally:
+        server.stop()
+        driver.cleanup()
+
+    total = _EndpointStats()
+    for endpoint in stats.values():
+        total.merge(endpoint)
+    results = [{'endpoint': path, 'summary': summarize(stats[path], args.duration)} for path in paths]
+    results.append({'endpoint': 'total', 'summary': summarize(total, args.duration)})
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'server': args.server,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'connect_latency_ms': args.connect_latency_ms,
+            'execute_latency_ms': args.execute_latency_ms,
+            'failure_rate': args.failure_rate,
+            'failure_sqlstate': args.failure_sqlstate,
+            'headers': headers,
+            'env': server_env,
+        },
+        'results': results,
+    }
+
+    print_report(results)
+    print(f"\nLog do servidor: {server.log.name}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(json.load(file), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+"""
+Driver local compatível com o pyodbc (subconjunto usado pelo DatabaseManager), sobre SQLite.
+
+Permite medir o DatabaseManager sem SQL Server nem personificação do Windows. Cada
+"ida ao servidor" (connect, execute, executemany sem fast_executemany) pode receber uma
+latência artificial para simular a rede e falhar com uma probabilidade configurada.
+`StandInRouter` junta vários bancos locais (ex.: primário e réplica de leitura) escolhidos
+pelo SERVER da string de conexão, e `StandInTokenProvider` substitui o logon do Windows.
+"""
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Traduções mínimas de T-SQL usado pelo DatabaseManager para o dialeto do SQLite
+_TRANSLATIONS = (
+    ('@@IDENTITY', 'last_insert_rowid()'),
+    ('GETDATE()', 'CURRENT_TIMESTAMP'),
+)
+
+# Controle de transação (helpers.Transaction): savepoints e nível de isolamento
+_STATEMENT_TRANSLATIONS = (
+    (re.compile(r'^\s*SAVE TRANSACTION (\w+)\s*$', re.IGNORECASE), r'SAVEPOINT \1'),
+    (re.compile(r'^\s*ROLLBACK TRANSACTION (\w+)\s*$', re.IGNORECASE), r'ROLLBACK TO \1'),
+    (re.compile(r'^\s*SET TRANSACTION ISOLATION LEVEL .*$', re.IGNORECASE), 'SELECT 1 WHERE 0'),
+)
+
+# SELECT TOP n, TOP (n) ou TOP (?) (rotas /test-query e /test-query-page, select_page)
+_TOP = re.compile(r'^\s*SELECT\s+(DISTINCT\s+)?TOP\s*(?:\(\s*(\d+|\?)\s*\)|(\d+))\s+(.*?)\s*$',
+                  re.IGNORECASE | re.DOTALL)
+
+
+class Error(Exception):
+    """Erro base, como pyodbc.Error: args = (sqlstate, mensagem)."""
+
+
+class DatabaseError(Error):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+def _translate_error(error):
+    if isinstance(error, sqlite3.IntegrityError):
+        return IntegrityError('23000', str(error))
+    if isinstance(error, sqlite3.OperationalError) and 'locked' in str(error):
+        return OperationalError('HYT00', str(error))
+    return ProgrammingError('42000', str(error))
+
+
+def _split_statements(sql):
+    # Divide um lote T-SQL em instruções, ignorando ';' dentro de literais
+    statements, current, quoted = [], [], False
+    for char in sql:
+        if char == "'":
+            quoted = not quoted
+        if char == ';' and not quoted:
+            statements.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    statements.append(''.join(current))
+    return [statement for statement in statements if statement.strip()]
+
+
+def _translate_sql(sql):
+    for source, target in _TRANSLATIONS:
+        sql = sql.replace(source, target)
+    for pattern, target in _STATEMENT_TRANSLATIONS:
+        sql = pattern.sub(target, sql)
+    return sql
+
+
+def _translate_top(statement, params):
+    # TOP vira LIMIT no fim da instrução; com TOP (?), o primeiro parâmetro vai junto para o fim
+    match = _TOP.match(statement)
+    if match is None:
+        return statement, params
+    limit = match.group(2) or match.group(3)
+    if limit == '?':
+        params = params[1:] + params[:1]
+    return f"SELECT {match.group(1) or ''}{match.group(4)} LIMIT {limit}", params
+
+
+def _normalize_params(params):
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        return list(params[0])
+    return list(params)
+
+
+class Cursor:
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection._sqlite.cursor()
+        self._pending = []  # Resultados seguintes de um lote: [(description, rows, rowcount)]
+        self._rows = None   # Linhas pré-carregadas do resultado atual (em lotes)
+        self.description = None
+        self.rowcount = -1
+        self.arraysize = 1
+        self.fast_executemany = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def execute(self, sql, *params):
+        self._connection._round_trip()
+        params = _normalize_params(params)
+        statements = [_translate_sql(statement) for statement in _split_statements(sql)]
+        try:
+            if len(statements) <= 1:
+                self._cursor.execute(*_translate_top(statements[0] if statements else sql, params))
+                self._rows = None
+                self._pending = []
+                self.description = self._cursor.description
+                self.rowcount = self._cursor.rowcount
+                return self
+
+            # Lote com várias instruções: executa todas e guarda cada resultado para nextset()
+            results = []
+            for statement in statements:
+                count = statement.count('?')
+                self._cursor.execute(*_translate_top(statement, params[:count]))
+                params = params[count:]
+                description = self._cursor.description
+                rows = self._cursor.fetchall() if description else []
+                results.append((description, rows, self._cursor.rowcount))
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+
+        self._pending = results
+        self.nextset()
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        if self.fast_executemany:
+            self._connection._round_trip()
+        else:
+            for _ in seq_of_params:
+                self._connection._round_trip()
+        try:
+            self._cursor.executemany(_translate_sql(sql), seq_of_params)
+        except sqlite3.Error as e:
+            raise _translate_error(e) from e
+        self._rows = None
+        self._pending = []
+        self.description = None
+        self.rowcount = self._cursor.rowcount
+
+    def nextset(self):
+        if not self._pending:
+            return False
+        self.description, rows, self.rowcount = self._pending.pop(0)
+        self._rows = iter(rows)
+        return True
+
+    def fetchone(self):
+        if self._rows is not None:
+            return next(self._rows, None)
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        if self._rows is not None:
+            return [row for _, row in zip(range(size), self._rows)]
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        if self._rows is not None:
+            return list(self._rows)
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    def __init__(self, driver, connection_string=''):
+        self._driver = driver
+        self.connection_string = connection_string
+        self._sqlite = sqlite3.connect(driver.path, check_same_thread=False, timeout=30)
+        for schema in driver.schemas:
+            self._sqlite.execute(f"ATTACH DATABASE ? AS {schema}", (f"{driver.path}.{schema}",))
+        self.autocommit = False
+        self.timeout = 0
+
+    def _round_trip(self):
+        if self._driver.execute_latency:
+            time.sleep(self._driver.execute_latency)
+        self._driver._inject_failure()
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        self._round_trip()
+        self._sqlite.commit()
+
+    def rollback(self):
+        self._round_trip()
+        self._sqlite.rollback()
+
+    def close(self):
+        self._sqlite.close()
+
+
+class StandInDriver:
+    """
+    Substituto do módulo pyodbc: expõe `connect` e as classes de erro.
+
+    Args:
+        path (str): Arquivo SQLite compartilhado pelas conexões (padrão: arquivo temporário).
+        schemas (tuple): Schemas anexados a cada conexão (ex.: 'RE' para RE.disparos).
+        connect_latency (float): Segundos adicionados a cada connect.
+        execute_latency (float): Segundos adicionados a cada ida ao servidor.
+        failure_rate (float): Probabilidade (0 a 1) de cada connect ou ida ao servidor falhar.
+        failure_sqlstate (str): SQLSTATE das falhas injetadas (padrão: conexão derrubada).
+    """
+
+    Error = Error
+    DatabaseError = DatabaseError
+    OperationalError = OperationalError
+    ProgrammingError = ProgrammingError
+    IntegrityError = IntegrityError
+
+    def __init__(self, path=None, schemas=('RE',), connect_latency=0.0, execute_latency=0.0,
+                 failure_rate=0.0, failure_sqlstate='08S01'):
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix='stand_in_', suffix='.db')
+            os.close(handle)
+        self.path = path
+        self.schemas = tuple(schemas)
+        self.connect_latency = connect_latency
+        self.execute_latency = execute_latency
+        self.failure_rate = failure_rate
+        self.failure_sqlstate = failure_sqlstate
+        self.connections_opened = 0
+        self.failures_injected = 0
+
+    def _inject_failure(self):
+        if self.failure_rate and random.random() < self.failure_rate:
+            self.failures_injected += 1
+            raise OperationalError(self.failure_sqlstate, "Falha injetada pelo driver local.")
+
+    def connect(self, connection_string='', **kwargs):
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+        self._inject_failure()
+        self.connections_opened += 1
+        return Connection(self, connection_string)
+
+    def cleanup(self):
+        """Remove os arquivos SQLite criados pelo driver."""
+        for path in (self.path, *(f"{self.path}.{schema}" for schema in self.schemas)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _connection_server(connection_string):
+    # 'SERVER=host,1433;...' -> 'host'
+    for attribute in connection_string.split(';'):
+        name, _, value = attribute.partition('=')
+        if name.strip().upper() == 'SERVER':
+            return value.split(',')[0].strip()
+    return ''
+
+
+class StandInRouter:
+    """
+    Substituto do módulo pyodbc com vários bancos locais: cada `connect` vai ao driver
+    registrado para o SERVER da string de conexão.
+
+    Exemplo (primário e réplica de leitura):
+        router = StandInRouter({'primario': StandInDriver(), 'replica': StandInDriver()})
+        # SECRET_DB_SERVER=primario, SECRET_DB_REPLICA_SERVER=replica
+
+    Args:
+        drivers (dict): {servidor: StandInDriver}.
+        default (StandInDriver): Driver dos servidores não registrados (padrão: erro 08001).
+    """
+
+    Error = Error
+    DatabaseError = DatabaseError
+    OperationalError = OperationalError
+    ProgrammingError = ProgrammingError
+    IntegrityError = IntegrityError
+
+    def __init__(self, drivers, default=None):
+        self.drivers = dict(drivers)
+        self.default = default
+
+    def connect(self, connection_string='', **kwargs):
+        server = _connection_server(connection_string)
+        driver = self.drivers.get(server, self.default)
+        if driver is None:
+            raise OperationalError('08001', f"Servidor desconhecido: {server!r}")
+        return driver.connect(connection_string, **kwargs)
+
+    def cleanup(self):
+        for driver in {id(driver): driver for driver in (*self.drivers.values(), self.default) if driver}.values():
+            driver.cleanup()
+
+
+class StandInTokenProvider:
+    """
+    Substituto do Win32TokenProvider (helpers.Authentication) para testar a personificação fora
+    do Windows: os tokens são contadores e a "personificação" fica registrada por thread.
+
+    Uso:
+        auth = WindowsImpersonationAuth(provider=StandInTokenProvider(), ttl=5, refresh_margin=1)
+        db = DatabaseManager(auth=auth)
+
+    Args:
+        logon_latency (float): Segundos adicionados a cada logon (ex.: controlador de domínio distante).
+        fail (bool): Faz os logons falharem (pode ser alterado durante o teste).
+    """
+
+    def __init__(self, logon_latency=0.0, fail=False):
+        self.logon_latency = logon_latency
+        self.fail = fail
+        self.logons = 0
+        self.impersonations = 0
+        self.closed = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def logon(self):
+        if self.logon_latency:
+            time.sleep(self.logon_latency)
+        if self.fail:
+            raise OSError("Logon recusado pelo provedor local.")
+        with self._lock:
+            self.logons += 1
+            return self.logons
+
+    def impersonate(self, token):
+        with self._lock:
+            self.impersonations += 1
+        self._local.token = token
+
+    def revert(self):
+        self._local.token = None
+
+    def close(self, token):
+        self.closed.append(token)
+
+    def current(self):
+        """Token personificado pela thread atual (None fora da personificação)."""
+        return getattr(self._local, 'token', None)
+
+
+def install(driver):
+    """
+    Faz o DatabaseManager usar o driver local (StandInDriver ou StandInRouter).
+
+    O driver substitui o pyodbc carregado sob demanda por helpers.Drivers e, salvo DB_AUTH
+    definido, a autenticação passa a ser 'none' (sem personificação do Windows).
+
+    Returns:
+        module: O módulo helpers.DatabaseManager já configurado.
+    """
+    os.environ.setdefault('DB_AUTH', 'none')
+    from helpers.Drivers import pyodbc
+    pyodbc.override(driver)
+
+    import helpers.DatabaseManager as database_module
+    return database_module
@@ -0,0 +1,113 @@
+"""
+Configuração do Gunicorn para produção.
+
+Uso:
+    gunicorn -c gunicorn.conf.py 'app:create_app()'
+
+Cada worker é um processo com seu próprio pool de conexões (criado após o fork) e atende
+várias requisições ao mesmo tempo em threads. Os workers são reciclados após um número de
+requisições, com variação aleatória para não reiniciarem todos juntos.
+
+As métricas de `/metrics` são somadas entre os workers por meio de snapshots em
+METRICS_MULTIPROC_DIR (padrão: um diretório temporário por master), qualquer que seja o
+worker que atender a coleta.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+
+def _cpu_count():
+    # Respeita o limite de CPUs do container (cpuset), quando disponível
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:5000')
+
+# As requisições passam a maior parte do tempo esperando o SQL Server: processos para usar
+# todos os núcleos e threads para sobrepor as esperas de I/O
+workers = int(os.getenv('WEB_WORKERS', str(_cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '4'))
+
+# Cada thread segura uma conexão durante a requisição; a folga atende run_parallel e rotas async
+os.environ.setdefault('DB_POOL_MAX_SIZE', str(threads * 2))
+
+# Snapshots das métricas de cada worker, somados em /metrics
+_metrics_dir_is_temporary = 'METRICS_MULTIPROC_DIR' not in os.environ
+os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), f'app-metrics-{os.getpid()}'))
+
+# Reciclagem dos workers
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+
+def _metrics_store():
+    from helpers.Metrics import MultiprocessStore
+    return MultiprocessStore(os.environ['METRICS_MULTIPROC_DIR'])
+
+
+def on_starting(server):
+    # Snapshots de uma execução anterior no mesmo diretório não entram nos totais
+    _metrics_store().clear()
+
+
+def post_fork(server, worker):
+    # Com preload_app o módulo foi importado no master; nada de conexões ou threads herdadas
+    worker.started_at = time.perf_counter()
+    from helpers.FlaskDatabase import reset_after_fork
+    from helpers.Metrics import METRICS
+    reset_after_fork()
+    METRICS.reset()
+    METRICS.enable_multiprocess(os.environ['METRICS_MULTIPROC_DIR'],
+                                float(os.getenv('METRICS_FLUSH_INTERVAL', '5')))
+
+
+def post_worker_init(worker):
+    # Cria o pool do worker antes da primeira requisição. Uma falha aqui não derruba o worker:
+    # `/` continua respondendo e `/ready` informa a indisponibilidade do banco.
+    # Com DB_WARM_UP=1 as conexões mínimas são abertas em segundo plano, sem atrasar o worker
+    from helpers.DatabaseManager import DatabaseManager
+    startup_ms = (time.perf_counter() - worker.started_at) * 1000
+    try:
+        pool = DatabaseManager.get_pool()
+        if os.getenv('DB_WARM_UP', '0') == '1':
+            DatabaseManager.warm_up()
+        worker.log.info("Worker %s pronto em %.0f ms (pool de até %s conexões)", worker.pid, startup_ms, pool.max_size)
+    except Exception as e:
+        worker.log.warning("Worker %s sem pool de conexões: %s", worker.pid, e)
+
+
+def worker_exit(server, worker):
+    # Reciclagem ou desligamento: fecha as conexões do worker em vez de abandoná-las no servidor
+    from helpers.FlaskDatabase import shutdown
+    from helpers.Metrics import METRICS
+    shutdown()
+    METRICS.disable_multiprocess()
+
+
+def on_exit(server):
+    if _metrics_dir_is_temporary:
+        shutil.rmtree(os.environ['METRICS_MULTIPROC_DIR'], ignore_errors=True)
+
+
+def child_exit(server, worker):
+    # Roda no master, inclusive se o worker morreu sem passar por worker_exit: os contadores
+    # dele vão para o arquivo consolidado e os gauges deixam de ser expostos
+    try:
+        _metrics_store().archive(worker.pid)
+    except Exception as e:
+        server.log.warning("Métricas do worker %s não consolidadas: %s", worker.pid, e)
@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.DatabaseManager import DatabaseManager
+
+# Métodos do DatabaseManager expostos em versão awaitable. Cada chamada faz o próprio checkout
+# do pool, então métodos que dependem da sessão anterior (ex.: get_last_insert_id) ficam de fora.
+ASYNC_METHODS = (
+    'execute_query',
+    'execute_non_query',
+    'execute_batch',
+    'insert_data',
+    'insert_batch',
+    'bulk_insert',
+    'insert_returning',
+    'insert_batch_returning',
+    'update_data',
+    'execute_procedure',
+    'execute_procedure_indicador',
+    'select_data',
+    'select_page',
+    'delete_cascade',
+    'delete_disparo',
+    'delete_disparos',
+    'delete_powerbi',
+    'record_exists',
+    'execute_scalar',
+    'execute_query_single',
+)
+
+
+class AsyncDatabaseManager:
+    """
+    Fachada asyncio para o DatabaseManager.
+
+    Cada chamada roda em um pool de threads limitado ao tamanho do pool de conexões, com
+    checkout e devolução da conexão na própria thread. Assim rotas `async def` podem aguardar
+    várias consultas ao mesmo tempo (ex.: `asyncio.gather`) sem ocupar um worker por espera.
+
+    Timeouts são aplicados dos dois lados: o `await` desiste após `timeout` segundos e a conexão
+    recebe o mesmo limite como timeout de consulta do ODBC, liberando a thread no servidor.
+    Chamadas canceladas antes de começar não chegam a ser executadas.
+    """
+
+    def __init__(self, pool=None, cache=None, max_workers=None, timeout=None, replica_pool=None):
+        """
+        Args:
+            pool (ConnectionPool): Pool de conexões (padrão: pool do processo).
+            cache (QueryCache): Cache de resultados repassado ao DatabaseManager (opcional).
+            max_workers (int): Threads de execução (padrão: tamanho máximo do pool de conexões).
+            timeout (float): Timeout padrão, em segundos, de cada chamada (None = sem limite no
+                             `await`; a consulta usa DB_QUERY_TIMEOUT).
+            replica_pool (ConnectionPool): Pool da réplica de leitura (padrão: o do processo, se configurada).
+        """
+        self.pool = pool if pool is not None else DatabaseManager.get_pool()
+        self.replica_pool = replica_pool if replica_pool is not None else DatabaseManager.get_replica_pool()
+        self.cache = cache
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or self.pool.max_size,
+            thread_name_prefix='db-async',
+        )
+
+    async def run(self, method_name, *args, timeout=None, **kwargs):
+        """
+        Executa um método do DatabaseManager em uma thread do pool e aguarda o resultado.
+
+        Args:
+            method_name (str): Nome do método do DatabaseManager.
+            timeout (float): Sobrescreve o timeout padrão desta instância (opcional).
+
+        Returns:
+            O retorno do método.
+
+        Raises:
+            asyncio.TimeoutError: Se a chamada exceder o timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        cancelled = threading.Event()
+        call = functools.partial(self._call, method_name, args, kwargs, timeout, cancelled)
+        future = asyncio.get_running_loop().run_in_executor(self._executor, call)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            cancelled.set()
+            raise
+
+    def _call(self, method_name, args, kwargs, timeout, cancelled):
+        if cancelled.is_set():
+            raise asyncio.CancelledError()
+
+        # pyodbc aceita o timeout de consulta em segundos inteiros; sem timeout vale o padrão do DatabaseManager
+        query_timeout = None if timeout is None else max(1, int(round(timeout)))
+        db = DatabaseManager(pool=self.pool, cache=self.cache, replica_pool=self.replica_pool,
+                             query_timeout=query_timeout)
+        try:
+            db.connect_to_database()
+            return getattr(db, method_name)(*args, **kwargs)
+        finally:
+            db.close_connection()
+
+    def close(self, wait=True):
+        """Encerra o pool de threads, aguardando as chamadas em andamento se `wait` for True."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.close(wait=False)
+
+
+def _async_method(name):
+    async def method(self, *args, timeout=None, **kwargs):
+        return await self.run(name, *args, timeout=timeout, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = f'AsyncDatabaseManager.{name}'
+    method.__doc__ = (
+        f"Versão awaitable de DatabaseManager.{name}; aceita também `timeout` (segundos)."
+    )
+    return method
+
+
+for _name in ASYNC_METHODS:
+    setattr(AsyncDatabaseManager, _name, _async_method(_name))
@@ -0,0 +1,350 @@
+import os
+import sys
+import threading
+import time
+
+from helpers.Drivers import win32security
+
+
+def _odbc_value(value):
+    # Valores com caracteres especiais vão entre chaves; '}' é escapado duplicando
+    return '{' + str(value).replace('}', '}}') + '}'
+
+
+class AuthBackend:
+    """
+    Forma de autenticação no SQL Server.
+
+    `connection_attributes` entra na string de conexão; `authenticate` e `revert` envolvem o
+    uso da conexão na thread atual (ex.: personificação do Windows).
+    """
+
+    name = None
+
+    def connection_attributes(self):
+        """Atributos de autenticação da string de conexão ODBC (sem ';' final)."""
+        return ''
+
+    def prepare(self):
+        """Obtém antecipadamente o que `authenticate` usa (ex.: token em cache), sem alterar a thread."""
+
+    def authenticate(self):
+        """Prepara a thread atual para abrir conexões."""
+
+    def revert(self):
+        """Desfaz o que `authenticate` alterou na thread atual."""
+
+    def stats(self):
+        """Contadores do backend para /metrics ({nome: valor})."""
+        return {}
+
+
+class Win32TokenProvider:
+    """
+    Logon e personificação com o win32security: LOGON32_LOGON_NEW_CREDENTIALS, em que as
+    credenciais valem apenas para o acesso à rede, como em `runas /netonly`.
+
+    Substituível (ex.: benchmarks.stand_in.StandInTokenProvider) para testes fora do Windows.
+    """
+
+    def __init__(self, username, domain, password):
+        self.username = username
+        self.domain = domain
+        self.password = password
+
+    def logon(self):
+        """Faz o logon no domínio e retorna o token."""
+        return win32security.LogonUser(
+            self.username,
+            self.domain,
+            self.password,
+            win32security.LOGON32_LOGON_NEW_CREDENTIALS,
+            win32security.LOGON32_PROVIDER_DEFAULT
+        )
+
+    def impersonate(self, token):
+        """Personifica o token na thread atual."""
+        win32security.ImpersonateLoggedOnUser(token)
+
+    def revert(self):
+        """Volta a thread atual para a identidade do processo."""
+        win32security.RevertToSelf()
+
+    def close(self, token):
+        """Libera o handle do token."""
+        token.Close()
+
+
+class TokenCache:
+    """
+    Token de logon compartilhado pelo processo, com validade de `ttl` segundos.
+
+    O primeiro `get` faz o logon; os seguintes reaproveitam o token. Uma thread daemon renova o
+    token `refresh_margin` segundos antes de expirar, então as requisições não esperam pelo
+    domínio. Se a renovação falhar, tenta de novo a cada `retry_delay` segundos enquanto o token
+    atual for válido; depois de expirado, o próximo `get` faz o logon na hora.
+
+    Um token substituído só é liberado na substituição seguinte: uma thread que acabou de recebê-lo
+    de `get` ainda pode personificá-lo.
+    """
+
+    def __init__(self, provider, ttl=3600.0, refresh_margin=300.0, retry_delay=30.0):
+        """
+        Args:
+            provider: Objeto com `logon()` e `close(token)` (ex.: Win32TokenProvider).
+            ttl (float): Segundos de validade de um token.
+            refresh_margin (float): Segundos antes da expiração em que a renovação começa.
+            retry_delay (float): Segundos entre tentativas de renovação que falharam.
+        """
+        if ttl <= 0 or not 0 <= refresh_margin < ttl:
+            raise ValueError("Validade do token inválida: exige ttl > 0 e 0 <= refresh_margin < ttl.")
+        self.provider = provider
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._token = None
+        self._retired = None    # Token substituído, ainda aberto para quem o obteve antes da troca
+        self._created_at = 0.0
+        self._expires_at = 0.0
+        self._stats = {'logons': 0, 'refreshes': 0, 'failures': 0}
+
+    def get(self):
+        """
+        Retorna o token válido, fazendo o logon se não houver um.
+
+        Raises:
+            Exception: O erro do logon, se não houver token válido e o logon falhar.
+        """
+        token = self._token
+        if token is None or time.monotonic() >= self._expires_at:
+            with self._lock:
+                if self._token is None or time.monotonic() >= self._expires_at:
+                    self._logon_locked('logons')
+                token = self._token
+        self._ensure_refresher()
+        return token
+
+    def invalidate(self):
+        """Descarta o token atual (ex.: senha trocada); o próximo `get` faz um novo logon."""
+        with self._lock:
+            self._retire_locked(None)
+
+    def close(self):
+        """Para a renovação em segundo plano e libera os tokens."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        with self._lock:
+            tokens = (self._token, self._retired)
+            self._token = self._retired = None
+        for token in tokens:
+            self._close_quietly(token)
+
+    def stats(self):
+        """Logons sob demanda, renovações em segundo plano, falhas e idade/validade do token atual."""
+        with self._lock:
+            stats = dict(self._stats)
+            if self._token is not None:
+                now = time.monotonic()
+                stats['token_age_seconds'] = now - self._created_at
+                stats['token_expires_in_seconds'] = max(0.0, self._expires_at - now)
+        return stats
+
+    def _logon_locked(self, counter):
+        try:
+            token = self.provider.logon()
+        except Exception:
+            self._stats['failures'] += 1
+            raise
+        now = time.monotonic()
+        self._retire_locked(token)
+        self._created_at, self._expires_at = now, now + self.ttl
+        self._stats[counter] += 1
+
+    def _retire_locked(self, token):
+        # O token atual fica aberto até a próxima troca; o retirado antes dele já não é entregue a ninguém
+        previous, self._retired = self._retired, self._token
+        self._token = token
+        self._close_quietly(previous)
+
+    def _ensure_refresher(self):
+        # Recriada se não estiver viva (ex.: processo filho após fork)
+        if self._stop.is_set() or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='auth-token-refresh', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        delay = None
+        while not self._stop.wait(self._next_refresh_delay() if delay is None else delay):
+            delay = None
+            with self._lock:
+                if self._token is None:
+                    continue  # Invalidado: o próximo get faz o logon
+                if time.monotonic() < self._expires_at - self.refresh_margin:
+                    continue
+                try:
+                    self._logon_locked('refreshes')
+                except Exception as e:
+                    print(f"Erro ao renovar o token de autenticação: {e}")
+                    delay = self.retry_delay
+
+    def _next_refresh_delay(self):
+        if self._token is None:
+            return self.retry_delay
+        return max(0.0, self._expires_at - self.refresh_margin - time.monotonic())
+
+    def _close_quietly(self, token):
+        if token is None:
+            return
+        try:
+            self.provider.close(token)
+        except Exception:
+            pass
+
+
+class WindowsImpersonationAuth(AuthBackend):
+    """
+    Personifica um usuário do domínio e conecta com Trusted_Connection.
+
+    O token de logon é obtido uma vez por processo e renovado em segundo plano (TokenCache);
+    `authenticate` só personifica o token na thread atual.
+    """
+
+    name = 'windows'
+
+    def __init__(self, username=None, domain=None, password=None, provider=None, ttl=None, refresh_margin=None):
+        """
+        Args:
+            provider: Logon e personificação (padrão: Win32TokenProvider com as credenciais).
+            ttl (float): Validade do token em segundos (padrão: DB_AUTH_TOKEN_TTL ou 3600).
+            refresh_margin (float): Segundos antes da expiração para renovar (padrão:
+                                    DB_AUTH_TOKEN_REFRESH_MARGIN ou 300).
+        """
+        self.username = username if username is not None else os.getenv('SECRET_DB_USERNAME')
+        self.domain = domain if domain is not None else os.getenv('SECRET_DB_DOMAIN')
+        self.password = password if password is not None else os.getenv('SECRET_DB_PASSWORD')
+        self.provider = provider or Win32TokenProvider(self.username, self.domain, self.password)
+        self.tokens = TokenCache(
+            self.provider,
+            ttl=float(os.getenv('DB_AUTH_TOKEN_TTL', '3600')) if ttl is None else ttl,
+            refresh_margin=float(os.getenv('DB_AUTH_TOKEN_REFRESH_MARGIN', '300')) if refresh_margin is None else refresh_margin,
+        )
+
+    def connection_attributes(self):
+        return "Trusted_Connection=yes"  # Indica autenticação do Windows (SSPI)
+
+    def prepare(self):
+        self.tokens.get()
+
+    def authenticate(self):
+        self.provider.impersonate(self.tokens.get())
+
+    def revert(self):
+        self.provider.revert()
+
+    def stats(self):
+        return self.tokens.stats()
+
+
+class SqlAuth(AuthBackend):
+    """Login do SQL Server (UID/PWD na string de conexão)."""
+
+    name = 'sql'
+
+    def __init__(self, username=None, password=None):
+        self.username = username if username is not None else os.getenv('SECRET_DB_USERNAME')
+        self.password = password if password is not None else os.getenv('SECRET_DB_PASSWORD')
+
+    def connection_attributes(self):
+        if not self.username:
+            raise ValueError("Autenticação SQL exige SECRET_DB_USERNAME.")
+        return f"UID={_odbc_value(self.username)};PWD={_odbc_value(self.password or '')}"
+
+
+class IntegratedAuth(AuthBackend):
+    """
+    Autenticação integrada do processo, sem personificação: a conta do serviço no Windows ou,
+    no Linux, o ticket Kerberos obtido com `kinit` (ou keytab).
+    """
+
+    name = 'kerberos'
+
+    def connection_attributes(self):
+        return "Trusted_Connection=yes"
+
+
+class NoAuth(AuthBackend):
+    """Nenhum atributo de autenticação (DSN já configurado ou drivers substitutos)."""
+
+    name = 'none'
+
+
+AUTH_BACKENDS = {
+    WindowsImpersonationAuth.name: WindowsImpersonationAuth,
+    SqlAuth.name: SqlAuth,
+    IntegratedAuth.name: IntegratedAuth,
+    NoAuth.name: NoAuth,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def default_auth_name():
+    """Backend padrão: DB_AUTH, ou personificação no Windows e Kerberos nas demais plataformas."""
+    return os.getenv('DB_AUTH') or ('windows' if sys.platform == 'win32' else 'kerberos')
+
+
+def register_auth_backend(name, factory):
+    """
+    Registra um backend de autenticação para uso com DB_AUTH=<name>.
+
+    Args:
+        name (str): Nome do backend.
+        factory (callable): Função sem argumentos que cria o AuthBackend.
+    """
+    with _instances_lock:
+        AUTH_BACKENDS[name] = factory
+        _instances.pop(name, None)
+
+
+def auth_stats():
+    """Contadores dos backends já criados ({nome: {contador: valor}}), para /metrics."""
+    stats = {}
+    for name, backend in list(_instances.items()):
+        backend_stats = backend.stats()
+        if backend_stats:
+            stats[name] = backend_stats
+    return stats
+
+
+def get_auth_backend(name=None):
+    """
+    Retorna o backend de autenticação do processo, criando-o na primeira chamada.
+
+    Args:
+        name (str): 'windows', 'sql', 'kerberos', 'none' ou um nome registrado
+                    (padrão: `default_auth_name()`).
+
+    Returns:
+        AuthBackend: Backend compartilhado pelo processo.
+    """
+    name = name or default_auth_name()
+    backend = _instances.get(name)
+    if backend is None:
+        with _instances_lock:
+            backend = _instances.get(name)
+            if backend is None:
+                if name not in AUTH_BACKENDS:
+                    raise ValueError(f"Backend de autenticação desconhecido: {name!r} "
+                                     f"(disponíveis: {', '.join(sorted(AUTH_BACKENDS))})")
+                backend = _instances[name] = AUTH_BACKENDS[name]()
+    return backend
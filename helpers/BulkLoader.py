@@ -0,0 +1,148 @@
+import time
+from collections import namedtuple
+from itertools import chain, islice
+
+from helpers.StatementCache import INSERT, StatementCache
+
+# Limites do SQL Server para uma única instrução
+MAX_PARAMETERS = 2100       # parâmetros por requisição (usamos 2099 por segurança)
+MAX_VALUES_ROWS = 1000      # linhas em um único construtor VALUES
+
+# Estratégias de envio
+AUTO = 'auto'
+FAST_EXECUTEMANY = 'fast_executemany'  # parâmetros em array (pyodbc), uma ida ao servidor por bloco
+MULTI_VALUES = 'values'                # INSERT ... VALUES (...), (...), ... respeitando MAX_PARAMETERS
+EXECUTEMANY = 'executemany'            # executemany comum, uma execução por linha
+
+STRATEGIES = (AUTO, FAST_EXECUTEMANY, MULTI_VALUES, EXECUTEMANY)
+
+# Valores de texto/binário acima deste tamanho fazem o fast_executemany alocar buffers enormes
+_LARGE_VALUE_LENGTH = 4000
+
+BulkLoadResult = namedtuple('BulkLoadResult', ['rows', 'chunks', 'elapsed', 'rows_per_sec', 'strategy'])
+
+
+class BulkLoader:
+    """
+    Carga em massa de linhas em uma tabela, em blocos de tamanho configurável.
+
+    Aceita qualquer iterável de dicionários (inclusive geradores): apenas um bloco por vez
+    fica em memória. As colunas são definidas pelas chaves da primeira linha. O texto dos
+    INSERT vem do StatementCache, que valida a tabela e as colunas antes do primeiro envio.
+    """
+
+    def __init__(self, conn, chunk_size=1000, strategy=AUTO, commit_every_chunk=True, progress=None,
+                 transactional=True, statements=None):
+        """
+        Args:
+            conn: Conexão DB-API (pyodbc) usada na carga.
+            chunk_size (int): Linhas enviadas por bloco.
+            strategy (str): 'auto', 'fast_executemany', 'values' ou 'executemany'.
+            commit_every_chunk (bool): Faz commit a cada bloco (True) ou uma única vez
+                                       ao final da carga (False, tudo ou nada).
+            progress (callable): Função chamada após cada bloco com um BulkLoadResult parcial.
+            transactional (bool): Faz commit/rollback da carga (True) ou deixa a transação a
+                                  cargo de quem chamou (False; `commit_every_chunk` é ignorado).
+            statements (StatementCache): Cache das instruções INSERT (padrão: um cache próprio).
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia de carga inválida: {strategy!r}. Use uma de {', '.join(STRATEGIES)}.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size deve ser maior que zero.")
+
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.strategy = strategy
+        self.commit_every_chunk = commit_every_chunk
+        self.progress = progress
+        self.transactional = transactional
+        self.statements = statements or StatementCache()
+        self.rows_committed = 0
+        self.rows_sent = 0
+
+    def load(self, table, rows):
+        """
+        Insere todas as linhas na tabela.
+
+        Em caso de erro, o bloco corrente (ou toda a carga, se `commit_every_chunk` for False)
+        é desfeito e a exceção é relançada; `rows_committed` indica o que já foi gravado e
+        `rows_sent` o que chegou ao servidor (gravado ou não).
+
+        Args:
+            table (str): Nome da tabela (com schema, ex: 'SCHEMA.tabela').
+            rows (iterable): Dicionários com os dados; todos devem ter as mesmas chaves.
+
+        Returns:
+            BulkLoadResult: Linhas inseridas, blocos, tempo total, linhas/s e estratégia usada.
+        """
+        self.rows_committed = self.rows_sent = 0
+        iterator = iter(rows)
+        first = next(iterator, None)
+        if first is None:
+            return BulkLoadResult(0, 0, 0.0, 0.0, self.strategy)
+
+        columns = tuple(first.keys())
+        self.statements.sql(INSERT, table, columns)  # Nomes inválidos falham antes de qualquer envio
+        iterator = chain((first,), iterator)
+        started = time.perf_counter()
+        total = chunks = 0
+        strategy = self.strategy
+
+        try:
+            with self.conn.cursor() as cursor:
+                while True:
+                    chunk = [tuple(row[column] for column in columns) for row in islice(iterator, self.chunk_size)]
+                    if not chunk:
+                        break
+                    if strategy == AUTO:
+                        strategy = self._choose_strategy(cursor, chunk)
+
+                    self.rows_sent = total + len(chunk)  # Antes do envio: um erro no meio pode ter gravado parte
+                    self._send(cursor, strategy, table, columns, chunk)
+                    total += len(chunk)
+                    chunks += 1
+                    if self.transactional and self.commit_every_chunk:
+                        self.conn.commit()
+                        self.rows_committed = total
+
+                    if self.progress:
+                        self.progress(self._result(total, chunks, started, strategy))
+
+                if self.transactional and not self.commit_every_chunk:
+                    self.conn.commit()
+                    self.rows_committed = total
+        except Exception:
+            if self.transactional:
+                self.conn.rollback()
+            raise
+
+        return self._result(total, chunks, started, strategy)
+
+    @staticmethod
+    def _choose_strategy(cursor, chunk):
+        if not hasattr(cursor, 'fast_executemany'):
+            return MULTI_VALUES
+        for row in chunk:
+            for value in row:
+                if isinstance(value, (str, bytes, bytearray)) and len(value) > _LARGE_VALUE_LENGTH:
+                    return MULTI_VALUES
+        return FAST_EXECUTEMANY
+
+    def _send(self, cursor, strategy, table, columns, chunk):
+        if strategy == MULTI_VALUES:
+            rows_per_statement = max(1, min(MAX_VALUES_ROWS, (MAX_PARAMETERS - 1) // len(columns)))
+            for start in range(0, len(chunk), rows_per_statement):
+                group = chunk[start:start + rows_per_statement]
+                # Só o último grupo (menor) do bloco usa um texto diferente
+                statement = self.statements.sql(INSERT, table, columns, len(group))
+                cursor.execute(statement, [value for row in group for value in row])
+            return
+
+        if hasattr(cursor, 'fast_executemany'):
+            cursor.fast_executemany = strategy == FAST_EXECUTEMANY
+        cursor.executemany(self.statements.sql(INSERT, table, columns), chunk)
+
+    @staticmethod
+    def _result(total, chunks, started, strategy):
+        elapsed = time.perf_counter() - started
+        return BulkLoadResult(total, chunks, elapsed, total / elapsed if elapsed > 0 else 0.0, strategy)
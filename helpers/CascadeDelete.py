@@ -0,0 +1,131 @@
+from helpers.BulkLoader import MAX_PARAMETERS
+
+
+class CascadeNode:
+    """
+    Tabela de um plano de exclusão em cascata.
+
+    Na raiz, `column` é a chave dos ids a excluir. Cada filho é ligado ao pai por
+    `filho.column IN (SELECT pai.<parent_column> FROM pai WHERE ...)`; o mesmo formato
+    atende tanto tabelas que apontam para o pai (ex.: envios.pulse_id -> disparos.disparo_id)
+    quanto tabelas apontadas pelo pai (ex.: anexos.anexo_id <- envios.anexo_id).
+    """
+
+    __slots__ = ('table', 'column', 'parent_column', 'children')
+
+    def __init__(self, table, column, parent_column=None, children=()):
+        """
+        Args:
+            table (str): Nome da tabela (com schema).
+            column (str): Coluna desta tabela comparada com o pai (na raiz, a chave dos ids).
+            parent_column (str): Coluna do pai referenciada por `column` (ignorada na raiz).
+            children (list): Nós dependentes, excluídos antes desta tabela.
+        """
+        self.table = table
+        self.column = column
+        self.parent_column = parent_column
+        self.children = list(children)
+
+
+class CascadeDeletePlan:
+    """
+    Plano de exclusão em cascata baseado em conjuntos.
+
+    Em vez de buscar os ids de cada nível e excluir linha a linha, gera uma instrução
+    DELETE por tabela com subconsultas até a raiz, em ordem pós-fixada (dependentes antes
+    do pai). Todas as instruções são enviadas ao servidor em um único lote por bloco de ids.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.statements = []  # [(tabela, sql com um marcador {ids})]
+        self._build(root, [])
+
+    def __str__(self):
+        return f"DELETE CASCADE {self.root.table}"
+
+    @property
+    def ids_per_batch(self):
+        """Número máximo de ids por lote sem ultrapassar o limite de parâmetros do SQL Server."""
+        return max(1, (MAX_PARAMETERS - 1) // len(self.statements))
+
+    def batch_sql(self, id_count):
+        """
+        Monta o lote T-SQL para `id_count` ids.
+
+        Returns:
+            str: Instruções DELETE separadas por ';'. Os parâmetros são os ids repetidos
+                 uma vez por instrução, na ordem das instruções.
+        """
+        placeholders = ', '.join('?' for _ in range(id_count))
+        return ';\n'.join(sql.format(ids=placeholders) for _, sql in self.statements)
+
+    def execute(self, cursor, ids):
+        """
+        Executa o plano para os ids informados. Não faz commit.
+
+        Args:
+            cursor: Cursor DB-API aberto na conexão da transação.
+            ids (iterable): Valores da chave da raiz a excluir.
+
+        Returns:
+            dict: Linhas excluídas por tabela ({tabela: quantidade}).
+        """
+        ids = list(dict.fromkeys(ids))  # Remove duplicados preservando a ordem
+        deleted = {table: 0 for table, _ in self.statements}
+        step = self.ids_per_batch
+
+        for start in range(0, len(ids), step):
+            chunk = ids[start:start + step]
+            cursor.execute(self.batch_sql(len(chunk)), chunk * len(self.statements))
+
+            # Cada DELETE do lote devolve sua própria contagem; percorre todas com nextset()
+            # para consumir o lote inteiro e receber eventuais erros das instruções finais
+            for position, (table, _) in enumerate(self.statements):
+                if position and not cursor.nextset():
+                    break
+                if cursor.rowcount > 0:
+                    deleted[table] += cursor.rowcount
+            while cursor.nextset():
+                pass
+
+        return deleted
+
+    def _build(self, node, ancestors):
+        for child in node.children:
+            self._build(child, ancestors + [node])
+        self.statements.append((node.table, f"DELETE FROM {node.table} WHERE {self._predicate(node, ancestors)}"))
+
+    def _predicate(self, node, ancestors):
+        if not ancestors:
+            return f"{node.column} IN ({{ids}})"
+        parent = ancestors[-1]
+        if len(ancestors) == 1 and node.parent_column == parent.column:
+            # Filho direto da raiz apontando para a própria chave: dispensa a subconsulta
+            return f"{node.column} IN ({{ids}})"
+        return (
+            f"{node.column} IN (SELECT {node.parent_column} FROM {parent.table} "
+            f"WHERE {self._predicate(parent, ancestors[:-1])})"
+        )
+
+
+# Disparos: anexos e destinatários -> resumo_envios / email_envios -> disparos
+DISPARO_CASCADE = CascadeDeletePlan(
+    CascadeNode('RE.disparos', 'disparo_id', children=[
+        CascadeNode('RE.resumo_envios', 'pulse_id', 'disparo_id', children=[
+            CascadeNode('RE.anexos', 'anexo_id', 'anexo_id'),
+            CascadeNode('RE.resumo_destinatarios', 'resumo_id', 'resumo_id'),
+        ]),
+        CascadeNode('RE.email_envios', 'pulse_id', 'disparo_id', children=[
+            CascadeNode('RE.anexos', 'anexo_id', 'anexo_id'),
+            CascadeNode('RE.email_destinatarios', 'envio_id', 'envio_id'),
+        ]),
+    ])
+)
+
+# Relatórios Power BI: log -> relatórios
+POWERBI_CASCADE = CascadeDeletePlan(
+    CascadeNode('DBA_CONTROLE.RE.powerbi_relatorios', 'powerbi_id', children=[
+        CascadeNode('DBA_CONTROLE.RE.powerbi_relatorios_log', 'powerbi_id', 'powerbi_id'),
+    ])
+)
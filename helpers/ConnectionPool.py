@@ -0,0 +1,253 @@
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou disponível dentro do tempo de checkout."""
+
+
+class PoolClosedError(Exception):
+    """O pool já foi fechado e não entrega mais conexões."""
+
+
+class _PoolEntry:
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    Pool de conexões thread-safe compartilhado pelo processo.
+
+    As conexões são criadas sob demanda pela função `connect` até o limite `max_size`.
+    No checkout, conexões que excederam o tempo de vida são descartadas e as demais são
+    validadas com `ping_query` antes de serem entregues. Conexões ociosas há mais de
+    `max_idle` segundos são fechadas, preservando ao menos `min_size` conexões.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30, max_idle=300,
+                 max_lifetime=1800, ping_query="SELECT 1", reset_on_return=True):
+        """
+        Args:
+            connect (callable): Função sem argumentos que abre uma nova conexão DB-API.
+            min_size (int): Número mínimo de conexões ociosas preservadas pela limpeza.
+            max_size (int): Número máximo de conexões abertas (ociosas + em uso).
+            timeout (float): Segundos de espera por uma conexão livre no checkout.
+            max_idle (float): Segundos que uma conexão pode ficar ociosa antes de ser fechada.
+            max_lifetime (float): Segundos de vida máxima de uma conexão (None desativa).
+            ping_query (str): Consulta usada para validar a conexão no checkout (None desativa).
+            reset_on_return (bool): Faz rollback ao devolver a conexão ao pool.
+        """
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Tamanhos do pool inválidos: exige 0 <= min_size <= max_size e max_size >= 1.")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.ping_query = ping_query
+        self.reset_on_return = reset_on_return
+
+        self._cond = threading.Condition()
+        self._idle = []  # Pilha LIFO: a conexão usada mais recentemente sai primeiro
+        self._in_use = {}  # id(conn) -> _PoolEntry
+        self._size = 0
+        self._closed = False
+
+    @property
+    def size(self):
+        """Número total de conexões abertas (ociosas + em uso)."""
+        return self._size
+
+    @property
+    def idle_count(self):
+        """Número de conexões ociosas disponíveis para checkout."""
+        return len(self._idle)
+
+    def acquire(self, timeout=None):
+        """
+        Faz o checkout de uma conexão, criando uma nova se houver espaço no pool.
+
+        Args:
+            timeout (float): Sobrescreve o tempo de espera padrão do pool (opcional).
+
+        Returns:
+            Conexão DB-API validada.
+
+        Raises:
+            PoolTimeoutError: Se nenhuma conexão ficar livre dentro do tempo de espera.
+            PoolClosedError: Se o pool já tiver sido fechado.
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+
+        while True:
+            entry = None
+            evicted = []
+            try:
+                with self._cond:
+                    while True:
+                        if self._closed:
+                            raise PoolClosedError("O pool de conexões está fechado.")
+                        evicted += self._evict_idle_locked()
+                        if self._idle:
+                            entry = self._idle.pop()
+                            break
+                        if self._size < self.max_size:
+                            # Reserva a vaga antes de conectar para não bloquear as demais threads
+                            self._size += 1
+                            break
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise PoolTimeoutError(
+                                f"Nenhuma conexão disponível em {self.timeout}s (max_size={self.max_size})."
+                            )
+                        self._cond.wait(remaining)
+            finally:
+                self._close_all_quietly(evicted)
+
+            if entry is None:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except Exception:
+                    self._release_slot()
+                    raise
+            elif self._expired(entry) or not self._ping(entry.conn):
+                self._discard(entry)
+                continue
+
+            with self._cond:
+                self._in_use[id(entry.conn)] = entry
+            return entry.conn
+
+    def release(self, conn, discard=False):
+        """
+        Devolve uma conexão ao pool.
+
+        Args:
+            conn: Conexão obtida com `acquire`.
+            discard (bool): Fecha a conexão em vez de reaproveitá-la (ex.: após erro de rede).
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            raise ValueError("A conexão informada não pertence a este pool.")
+
+        if not discard and self.reset_on_return:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard or self._closed or self._expired(entry):
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def fill(self, count=None):
+        """
+        Abre conexões até haver `count` ociosas (padrão: `min_size`), sem ultrapassar `max_size`.
+
+        Returns:
+            int: Número de conexões abertas.
+        """
+        target = self.min_size if count is None else count
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) >= target or self._size >= self.max_size:
+                    return opened
+                self._size += 1
+            try:
+                entry = _PoolEntry(self._connect())
+            except Exception:
+                self._release_slot()
+                raise
+            with self._cond:
+                if not self._closed:
+                    self._idle.append(entry)
+                    self._cond.notify()
+                    entry = None
+            if entry is not None:
+                self._discard(entry)
+                return opened
+            opened += 1
+
+    def prune(self):
+        """Fecha as conexões ociosas que excederam `max_idle` ou `max_lifetime`."""
+        with self._cond:
+            evicted = self._evict_idle_locked()
+        self._close_all_quietly(evicted)
+
+    def close(self):
+        """Fecha todas as conexões ociosas e impede novos checkouts."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def _expired(self, entry):
+        return self.max_lifetime is not None and time.monotonic() - entry.created_at > self.max_lifetime
+
+    def _ping(self, conn):
+        if not self.ping_query:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.ping_query)
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self):
+        # Retira do pool as conexões ociosas vencidas e as devolve para o chamador fechar fora
+        # do lock: fechar é uma ida ao servidor e pode travar em uma conexão TCP morta
+        now = time.monotonic()
+        keep, evicted = [], []
+        # Percorre da mais antiga para a mais recente, respeitando o mínimo de conexões
+        for position, entry in enumerate(self._idle):
+            remaining_idle = len(self._idle) - position
+            stale = self.max_idle is not None and now - entry.last_used > self.max_idle
+            if self._expired(entry) or (stale and len(keep) + remaining_idle > self.min_size):
+                self._size -= 1
+                evicted.append(entry.conn)
+            else:
+                keep.append(entry)
+        if evicted:
+            self._idle = keep
+            self._cond.notify_all()
+        return evicted
+
+    def _discard(self, entry):
+        self._close_quietly(entry.conn)
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @classmethod
+    def _close_all_quietly(cls, conns):
+        for conn in conns:
+            cls._close_quietly(conn)
@@ -1,67 +1,599 @@
+import atexit
+import functools
 import os
-import pyodbc
-import win32security
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ALL_COMPLETED, FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from itertools import islice
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
-from sqlalchemy import create_engine, text
+from helpers.Authentication import auth_stats, get_auth_backend
+from helpers.BulkLoader import AUTO, BulkLoader
+from helpers.CascadeDelete import DISPARO_CASCADE, POWERBI_CASCADE
+from helpers.ConnectionPool import ConnectionPool
+from helpers.Drivers import import_times, pyodbc  # pyodbc é importado só no primeiro uso
+from helpers.InsertReturning import insert_returning
+from helpers.Metrics import METRICS, affected_rows, result_rows
+from helpers.Pagination import (
+    Page, decode_cursor, encode_cursor, key_name, order_by_sql, page_select_sql, parse_order_by, seek_params,
+    seek_predicate, signature,
+)
+from helpers.QueryBatch import batch_sql, is_read_only, normalize_batch, read_results, written_tables
+from helpers.QueryCache import QueryCache, tables_in
+from helpers.Resilience import (
+    DEADLOCK_SQLSTATE, TRANSIENT_SQLSTATES, CircuitBreaker, CircuitOpenError, backoff_delay, sqlstate_of,
+)
+from helpers.ResultFormats import DICT, ROW, TUPLE, format_row, format_rows, row_factory, validate_format
+from helpers.StatementCache import EXEC, INSERT, RAW_SELECT, SELECT, UPDATE, StatementCache
+from helpers.Transaction import Transaction, TransactionRollbackError
+from helpers.WriteBehind import WriteBehindBuffer
 
 load_dotenv()
 
+# Resultado de cada consulta de run_parallel: `result` ou `error` preenchido, e o tempo em segundos
+ParallelResult = namedtuple('ParallelResult', ['result', 'elapsed', 'error'])
+
+
+def _circuit_breaker(name):
+    # Só erros do driver contam como falha do servidor (pool esgotado, por exemplo, não)
+    return CircuitBreaker(
+        name,
+        failure_threshold=int(os.getenv('DB_CIRCUIT_FAILURES', '5')),
+        reset_timeout=float(os.getenv('DB_CIRCUIT_RESET_TIMEOUT', '30')),
+        half_open_max_calls=int(os.getenv('DB_CIRCUIT_HALF_OPEN_CALLS', '1')),
+        is_failure=lambda error: isinstance(error, pyodbc.Error),
+    )
+
+
+def _retry_transient(write=False):
+    """
+    Repete o método em erros transitórios do SQL Server, com backoff exponencial e jitter.
+
+    Leituras são repetidas em deadlock (40001) e em queda de conexão (08S01, com novo checkout).
+    Escritas só em deadlock: o servidor já desfez a transação da vítima, então repetir é seguro,
+    enquanto após uma queda de conexão não se sabe se o commit chegou a acontecer. Não há
+    repetição dentro de `transaction()` (a transação inteira foi perdida) nem em chamadas aninhadas.
+    """
+    retryable = (DEADLOCK_SQLSTATE,) if write else TRANSIENT_SQLSTATES
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if self._retrying or self._transaction is not None:
+                return func(self, *args, **kwargs)
+            self._retrying = True
+            try:
+                attempt = 1
+                while True:
+                    try:
+                        return func(self, *args, **kwargs)
+                    except pyodbc.Error as e:
+                        sqlstate = sqlstate_of(e)
+                        if sqlstate not in retryable or attempt >= self.RETRY_ATTEMPTS:
+                            raise
+                        delay = backoff_delay(attempt - 1, self.RETRY_BASE_DELAY, self.RETRY_MAX_DELAY)
+                        print(f"Erro transitório (SQL State {sqlstate}) em {func.__name__}; "
+                              f"tentativa {attempt + 1}/{self.RETRY_ATTEMPTS} em {delay:.2f}s")
+                        time.sleep(delay)
+                        if sqlstate != DEADLOCK_SQLSTATE:
+                            self._reconnect()
+                        attempt += 1
+            finally:
+                self._retrying = False
+        return wrapper
+    return decorator
+
+
 class DatabaseManager:
 
-    def __init__(self):
+    _pool = None
+    _replica_pool = None
+    _pool_lock = threading.Lock()
+    _cache = None
+    _write_buffer = None
+    _warm_up_seconds = None  # Duração do último warm_up do processo
+
+    # Instruções montadas dinamicamente e metadados de colunas, compartilhados pelo processo
+    _statements = StatementCache(maxsize=int(os.getenv('DB_STATEMENT_CACHE_SIZE', '512')))
+
+    # Quantidade de linhas buscadas por ida ao servidor nas consultas em streaming
+    DEFAULT_FETCH_SIZE = int(os.getenv('DB_FETCH_SIZE', '1000'))
+
+    # Linhas enviadas por bloco nas cargas em massa (insert_batch/bulk_insert)
+    DEFAULT_BULK_CHUNK_SIZE = int(os.getenv('DB_BULK_CHUNK_SIZE', '5000'))
+
+    # Consultas simultâneas em run_parallel
+    DEFAULT_PARALLEL_WORKERS = int(os.getenv('DB_PARALLEL_WORKERS', '4'))
+
+    # Timeouts em segundos: login do ODBC e de cada consulta (0 = sem limite)
+    LOGIN_TIMEOUT = int(os.getenv('DB_LOGIN_TIMEOUT', '15'))
+    DEFAULT_QUERY_TIMEOUT = int(os.getenv('DB_QUERY_TIMEOUT', '0'))
+
+    # Tentativas (incluindo a primeira) e espera entre elas nos erros transitórios
+    RETRY_ATTEMPTS = int(os.getenv('DB_RETRY_ATTEMPTS', '3'))
+    RETRY_BASE_DELAY = float(os.getenv('DB_RETRY_BASE_DELAY', '0.1'))
+    RETRY_MAX_DELAY = float(os.getenv('DB_RETRY_MAX_DELAY', '2'))
+
+    # Disjuntores das conexões com a primária e com a réplica, compartilhados pelo processo
+    _breaker = _circuit_breaker('primary')
+    _replica_breaker = _circuit_breaker('replica')
+
+    def __init__(self, pool=None, cache=None, replica_pool=None, read_from_replica=True, query_timeout=None,
+                 auth=None):
+        """
+        Args:
+            pool (ConnectionPool): Pool de onde as conexões serão obtidas (opcional).
+                                   Sem pool, cada `connect_to_database` abre uma conexão nova.
+            cache (QueryCache): Cache de resultados usado pelas consultas chamadas com
+                                `cache_ttl` e invalidado pelas escritas (opcional).
+            replica_pool (ConnectionPool): Pool da réplica de leitura (opcional). Sem pool, a
+                                           conexão com a réplica é aberta na primeira leitura.
+            read_from_replica (bool): Envia as leituras à réplica, quando configurada.
+            query_timeout (int): Timeout de cada consulta em segundos, 0 = sem limite
+                                 (padrão: DB_QUERY_TIMEOUT).
+            auth (AuthBackend): Forma de autenticação (padrão: DB_AUTH; ver helpers.Authentication).
+        """
         self.username = os.getenv('SECRET_DB_USERNAME')
         self.password = os.getenv('SECRET_DB_PASSWORD')
         self.domain = os.getenv('SECRET_DB_DOMAIN')
         self.server = os.getenv('SECRET_DB_SERVER')
         self.database = os.getenv('SECRET_DB_DATABASE')
         self.port = os.getenv('SECRET_DB_PORT', '1433')  # Porta padrão 1433 se não especificada
+        # Réplica de leitura (opcional): servidor secundário ou listener do AG com ApplicationIntent=ReadOnly
+        self.replica_server = os.getenv('SECRET_DB_REPLICA_SERVER')
+        self.replica_port = os.getenv('SECRET_DB_REPLICA_PORT', self.port)
+        self.replica_database = os.getenv('SECRET_DB_REPLICA_DATABASE', self.database)
+        self.auth = auth if auth is not None else get_auth_backend()
+        self.pool = pool
+        self.replica_pool = replica_pool
+        self.read_from_replica = read_from_replica
+        self.cache = cache
+        self.query_timeout = self.DEFAULT_QUERY_TIMEOUT if query_timeout is None else query_timeout
         self.conn = None
+        self.read_conn = None  # Conexão com a réplica, aberta na primeira leitura roteada
+        self._transaction = None  # Transaction ativa de `transaction()`, se houver
+        self._pinned_to_primary = False  # Após uma escrita, as leituras ficam na primária
+        self._retrying = False  # Dentro de uma chamada com repetição (ver _retry_transient)
+
+    @classmethod
+    def get_pool(cls):
+        """
+        Retorna o pool de conexões compartilhado pelo processo, criando-o na primeira chamada.
+
+        O dimensionamento é lido das variáveis de ambiente DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE,
+        DB_POOL_TIMEOUT, DB_POOL_MAX_IDLE e DB_POOL_MAX_LIFETIME.
+
+        Returns:
+            ConnectionPool: Pool de conexões do processo.
+        """
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    connection_string = cls().get_connection_string()
+                    cls._pool = ConnectionPool(
+                        lambda: pyodbc.connect(connection_string, timeout=cls.LOGIN_TIMEOUT),
+                        min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                        max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                        timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+                        max_idle=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                        max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+                    )
+        return cls._pool
+
+    @classmethod
+    def get_replica_pool(cls):
+        """
+        Retorna o pool de conexões da réplica de leitura, criando-o na primeira chamada.
+
+        Usa o mesmo dimensionamento de `get_pool` (variáveis DB_POOL_*).
+
+        Returns:
+            ConnectionPool: Pool da réplica, ou None se SECRET_DB_REPLICA_SERVER não estiver definido.
+        """
+        if cls._replica_pool is None:
+            if not os.getenv('SECRET_DB_REPLICA_SERVER'):
+                return None
+            with cls._pool_lock:
+                if cls._replica_pool is None:
+                    connection_string = cls().get_connection_string(read_only=True)
+                    cls._replica_pool = ConnectionPool(
+                        lambda: pyodbc.connect(connection_string, timeout=cls.LOGIN_TIMEOUT),
+                        min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                        max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                        timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+                        max_idle=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                        max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+                    )
+        return cls._replica_pool
+
+    @classmethod
+    def close_pool(cls):
+        """Fecha os pools do processo; a próxima chamada a `get_pool` cria um novo."""
+        with cls._pool_lock:
+            pools = (cls._pool, cls._replica_pool)
+            cls._pool = cls._replica_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.close()
+
+    @classmethod
+    def warm_up(cls, background=True):
+        """
+        Importa o driver e abre as conexões mínimas dos pools (DB_POOL_MIN_SIZE), para que a
+        primeira requisição não pague a importação do pyodbc nem o login no SQL Server.
+
+        Args:
+            background (bool): Executa em uma thread daemon e retorna na hora.
+
+        Returns:
+            threading.Thread | float: A thread do aquecimento ou, com `background` False, os
+                                      segundos gastos (None em caso de erro).
+        """
+        if background:
+            thread = threading.Thread(target=cls._warm_up, name='db-warm-up', daemon=True)
+            thread.start()
+            return thread
+        return cls._warm_up()
+
+    @classmethod
+    def _warm_up(cls):
+        started = time.perf_counter()
+        manager = cls()
+        try:
+            pyodbc.load()
+            opened = 0
+            for pool, breaker in ((cls.get_pool(), cls._breaker), (cls.get_replica_pool(), cls._replica_breaker)):
+                if pool is not None:
+                    with manager._authenticated(), breaker:
+                        opened += pool.fill()
+        except Exception as e:
+            print(f"Erro ao aquecer o pool de conexões: {e}")
+            return None
+        elapsed = time.perf_counter() - started
+        cls._warm_up_seconds = elapsed
+        print(f"Pool de conexões aquecido: {opened} conexões em {elapsed * 1000:.0f} ms "
+              f"(importação do pyodbc: {(pyodbc.import_seconds or 0) * 1000:.0f} ms)")
+        return elapsed
+
+    @classmethod
+    def reset_after_fork(cls):
+        """
+        Descarta o pool e o cache herdados do processo pai. Chamar no processo filho, logo após o fork.
+
+        As conexões herdadas compartilham os sockets do pai e não são fechadas aqui (fechá-las
+        encerraria as sessões do pai); o próximo `get_pool` cria um pool próprio do processo.
+        """
+        cls._pool_lock = threading.Lock()
+        cls._pool = None
+        cls._replica_pool = None
+        cls._warm_up_seconds = None
+        cls._breaker = _circuit_breaker('primary')  # O lock herdado pode ter ficado preso no pai
+        cls._replica_breaker = _circuit_breaker('replica')
+        cls._cache = None
+        cls._write_buffer = None  # A thread de gravação não sobrevive ao fork
+
+    @classmethod
+    def get_cache(cls):
+        """
+        Retorna o cache de resultados compartilhado pelo processo, criando-o na primeira chamada.
+
+        O tamanho máximo (bytes) e o TTL padrão (segundos) são lidos das variáveis de ambiente
+        DB_CACHE_MAX_BYTES e DB_CACHE_DEFAULT_TTL.
+
+        Returns:
+            QueryCache: Cache de resultados do processo.
+        """
+        if cls._cache is None:
+            with cls._pool_lock:
+                if cls._cache is None:
+                    cls._cache = QueryCache(
+                        max_bytes=int(os.getenv('DB_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+                        default_ttl=float(os.getenv('DB_CACHE_DEFAULT_TTL', '60')),
+                    )
+        return cls._cache
+
+    @classmethod
+    def get_write_buffer(cls):
+        """
+        Retorna o buffer de gravação em segundo plano do processo (ver helpers.WriteBehind),
+        criando-o na primeira chamada. É opcional: só quem chama `put` usa a gravação adiada.
+
+        Exemplo:
+            DatabaseManager.get_write_buffer().put('RE.email_envios', {'pulse_id': 1, ...})
+
+        Os limites são lidos das variáveis de ambiente DB_WRITE_BEHIND_MAX_ROWS,
+        DB_WRITE_BEHIND_INTERVAL, DB_WRITE_BEHIND_MAX_PENDING e DB_WRITE_BEHIND_PUT_TIMEOUT.
+        As linhas pendentes são gravadas no encerramento do processo.
+
+        Returns:
+            WriteBehindBuffer: Buffer de gravação do processo.
+        """
+        if cls._write_buffer is None:
+            with cls._pool_lock:
+                if cls._write_buffer is None:
+                    buffer = WriteBehindBuffer(
+                        lambda: cls(pool=cls.get_pool(), cache=cls.get_cache()),
+                        max_rows=int(os.getenv('DB_WRITE_BEHIND_MAX_ROWS', '500')),
+                        flush_interval=float(os.getenv('DB_WRITE_BEHIND_INTERVAL', '1.0')),
+                        max_pending=int(os.getenv('DB_WRITE_BEHIND_MAX_PENDING', '10000')),
+                        put_timeout=float(os.getenv('DB_WRITE_BEHIND_PUT_TIMEOUT', '30')),
+                    )
+                    atexit.register(buffer.close)
+                    cls._write_buffer = buffer
+        return cls._write_buffer
+
+    @classmethod
+    def close_write_buffer(cls, timeout=None):
+        """Grava as linhas pendentes e encerra o buffer de gravação do processo, se existir."""
+        with cls._pool_lock:
+            buffer, cls._write_buffer = cls._write_buffer, None
+        if buffer is not None:
+            buffer.close(timeout)
+
+    def _invalidate(self, tables=None):
+        """Remove do cache os resultados das tabelas alteradas (todas, se `tables` for vazio)."""
+        if self.cache is None:
+            return
+        if self._transaction is not None:
+            # Dentro de uma transação, a invalidação acontece só depois do commit
+            if tables:
+                self._transaction.tables.update(tables)
+            else:
+                self._transaction.invalidate_all = True
+            return
+        if tables:
+            self.cache.invalidate_tables(tables)
+        else:
+            self.cache.clear()
+
+    @property
+    def in_transaction(self):
+        """True dentro de um bloco `with db.transaction():`."""
+        return self._transaction is not None
+
+    @contextmanager
+    def transaction(self, isolation_level=None):
+        """
+        Unidade de trabalho: as escritas dentro do bloco não fazem commit individual; ao sair do
+        bloco há um único commit, ou rollback se uma exceção escapar.
+
+        Blocos aninhados viram savepoints: uma exceção que escapa do bloco interno desfaz só o que
+        foi feito nele. Se uma operação falhar dentro da transação e o erro for tratado sem sair do
+        bloco (ex.: delete_disparos retornando False), a transação é desfeita no final e
+        TransactionRollbackError é lançada.
+
+        Exemplo:
+            with db.transaction():
+                for linha in linhas:
+                    db.insert_data('RE.tabela', linha)
+
+        Args:
+            isolation_level (str): Nível de isolamento da transação, ex.: 'SNAPSHOT' ou
+                                   'SERIALIZABLE' (apenas no bloco mais externo).
+
+        Yields:
+            DatabaseManager: O próprio gerenciador.
+        """
+        if self._transaction is not None:
+            if isolation_level is not None:
+                raise ValueError("O nível de isolamento só pode ser definido na transação mais externa.")
+            with self.savepoint():
+                yield self
+            return
+
+        transaction = Transaction(self.conn, isolation_level)
+        transaction.begin()
+        self._transaction = transaction
+        try:
+            yield self
+        except BaseException:
+            self._transaction = None
+            transaction.rollback()
+            raise
+
+        self._transaction = None
+        if transaction.rollback_only:
+            transaction.rollback()
+            raise TransactionRollbackError("Uma operação falhou dentro da transação; as alterações foram desfeitas.")
+        try:
+            transaction.commit()
+        except pyodbc.Error as e:
+            sqlstate = e.args[0]
+            print(f"Erro de SQL Server ao confirmar a transação: {e}")
+            print(f"SQL State: {sqlstate}")
+            transaction.rollback()
+            raise
+        self._invalidate(None if transaction.invalidate_all else transaction.tables)
+
+    @contextmanager
+    def savepoint(self, name=None):
+        """
+        Savepoint dentro da transação atual: uma exceção que escapa do bloco desfaz apenas o que
+        foi feito nele e é relançada; a transação externa continua aberta.
+
+        Args:
+            name (str): Nome do savepoint (padrão: gerado automaticamente).
+        """
+        if self._transaction is None:
+            raise RuntimeError("savepoint() exige uma transação ativa (use `with db.transaction():`).")
+        transaction = self._transaction
+        rollback_only = transaction.rollback_only
+        name = transaction.savepoint(name)
+        try:
+            yield name
+        except BaseException:
+            transaction.rollback_to(name)
+            transaction.rollback_only = rollback_only
+            raise
+
+    def _commit(self):
+        # Fora de uma transação explícita cada escrita confirma na hora
+        self._pinned_to_primary = True  # Read-your-writes: a réplica pode ainda não ter a escrita
+        if self._transaction is None:
+            self.conn.commit()
+
+    def _rollback(self):
+        # Dentro de uma transação, o rollback fica para o fim do bloco (ou do savepoint)
+        if self._transaction is None:
+            self.conn.rollback()
+        else:
+            self._transaction.rollback_only = True
+
+    def _fail_transaction(self):
+        # Erros tratados sem exceção (ex.: update_data) não podem deixar a transação ser confirmada
+        if self._transaction is not None:
+            self._transaction.rollback_only = True
 
     def authenticate_user(self):
+        """
+        Obtém antecipadamente as credenciais (com DB_AUTH=windows, o token de logon em cache do
+        processo), para que falhas de autenticação apareçam antes da primeira consulta.
+
+        Não altera a thread: a personificação vale apenas durante o checkout de cada conexão.
+        """
         try:
-            token = win32security.LogonUser(
-                self.username,
-                self.domain,
-                self.password,
-                win32security.LOGON32_LOGON_NEW_CREDENTIALS,
-                win32security.LOGON32_PROVIDER_DEFAULT
-            )
-            win32security.ImpersonateLoggedOnUser(token)
+            self.auth.prepare()
         except Exception as e:
             print(f"Erro ao autenticar o usuário: {e}")
 
+    @contextmanager
+    def _authenticated(self):
+        # O SQL Server autentica a conexão ao abri-la; depois do checkout a thread volta à identidade do processo
+        try:
+            self.auth.authenticate()
+        except Exception as e:
+            print(f"Erro ao autenticar o usuário: {e}")
+        try:
+            yield
+        finally:
+            try:
+                self.auth.revert()
+            except Exception as e:
+                print(f"Erro ao desfazer a autenticação: {e}")
+
     def connect_to_database(self):
+        """
+        Abre a conexão com a primária (ou faz o checkout do pool).
+
+        Raises:
+            CircuitOpenError: Se a primária falhou repetidamente; a chamada é recusada na hora,
+                              sem esperar o timeout de login (ver helpers.Resilience).
+            pyodbc.Error: Se a conexão falhar.
+        """
+        started = time.perf_counter()
         try:
-            conn_str = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={self.server},{self.port};"  # Adiciona a porta após o servidor
-                f"DATABASE={self.database};"
-                "Trusted_Connection=yes"  # Indica autenticação do Windows (SSPI)
-            )
-            self.conn = pyodbc.connect(conn_str)
+            with self._authenticated(), self._breaker:
+                if self.pool is not None:
+                    conn = self.pool.acquire()
+                else:
+                    conn_str = self._build_connection_string(self.server, self.port, self.database)
+                    conn = pyodbc.connect(conn_str, timeout=self.LOGIN_TIMEOUT)
+        except CircuitOpenError as e:
+            print(f"Conexão recusada: {e}")
+            raise
         except pyodbc.Error as e:
+            METRICS.observe_connect(time.perf_counter() - started, error=True)
             sqlstate = e.args[0]
             print(f"Erro de SQL Server: {e}")
             print(f"SQL State: {sqlstate}")
+            raise
         except Exception as e:
+            METRICS.observe_connect(time.perf_counter() - started, error=True)
             print(f"Erro ao conectar ao banco de dados: {e}")
-    def get_connection_string(self):
+            raise
+        METRICS.observe_connect(time.perf_counter() - started)
+        self._apply_query_timeout(conn)
+        self.conn = conn
+
+    def _apply_query_timeout(self, conn):
+        # Timeout de consulta do ODBC (SQL_ATTR_QUERY_TIMEOUT); redefinido a cada checkout do pool
+        if hasattr(conn, 'timeout'):
+            conn.timeout = self.query_timeout
+
+    def _reconnect(self):
+        # Após uma queda de conexão (08S01) as conexões da sessão são descartadas, não devolvidas ao pool
+        for name, pool in (('read_conn', self.replica_pool), ('conn', self.pool)):
+            conn = getattr(self, name)
+            setattr(self, name, None)
+            if conn is None:
+                continue
+            try:
+                if pool is not None:
+                    pool.release(conn, discard=True)
+                else:
+                    conn.close()
+            except Exception:
+                pass
+        self.connect_to_database()
+
+    def _read_connection(self, replica=None):
+        """
+        Conexão usada pelas leituras: a da réplica, quando configurada, ou a primária.
+
+        Dentro de uma transação as leituras ficam sempre na primária. Depois de uma escrita
+        deste gerenciador também (read-your-writes), salvo `replica=True` na chamada.
+        Se a réplica estiver indisponível, as leituras passam para a primária.
+
+        Args:
+            replica (bool): True força a réplica, False força a primária; None decide sozinho.
+        """
+        if replica is None:
+            replica = self.read_from_replica and not self._pinned_to_primary
+        if not replica or not self.replica_server or self._transaction is not None:
+            return self.conn
+        if self.read_conn is None:
+            started = time.perf_counter()
+            try:
+                with self._authenticated(), self._replica_breaker:
+                    if self.replica_pool is not None:
+                        conn = self.replica_pool.acquire()
+                    else:
+                        conn = pyodbc.connect(self.get_connection_string(read_only=True), timeout=self.LOGIN_TIMEOUT)
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    METRICS.observe_connect(time.perf_counter() - started, error=True)
+                print(f"Réplica de leitura indisponível, usando a primária: {e}")
+                self._pinned_to_primary = True
+                return self.conn
+            METRICS.observe_connect(time.perf_counter() - started)
+            self._apply_query_timeout(conn)
+            self.read_conn = conn
+        return self.read_conn
+
+    def get_connection_string(self, read_only=False):
         """
         Retorna a string de conexão para ser usada pelos processadores externos.
+
+        Args:
+            read_only (bool): Conexão com a réplica de leitura (ApplicationIntent=ReadOnly).
         
         Returns:
             str: String de conexão ODBC para SQL Server
         """
+        if read_only:
+            if not self.replica_server or not self.replica_database or not self.replica_port:
+                raise ValueError("Réplica de leitura não configurada. Verifique SECRET_DB_REPLICA_SERVER.")
+            # ApplicationIntent=ReadOnly: roteamento para o secundário legível do AG
+            return self._build_connection_string(self.replica_server, self.replica_port, self.replica_database,
+                                                 "ApplicationIntent=ReadOnly")
+
         if not self.server or not self.database or not self.port:
             raise ValueError("Configurações do banco de dados não encontradas. Verifique as variáveis de ambiente.")
         
-        return (
-            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-            f"SERVER={self.server},{self.port};"  # Adiciona a porta
-            f"DATABASE={self.database};"
-            "Trusted_Connection=yes"
+        return self._build_connection_string(self.server, self.port, self.database)
+
+    def _build_connection_string(self, server, port, database, *attributes):
+        # A autenticação (Trusted_Connection, UID/PWD...) vem do backend configurado em DB_AUTH
+        parts = (
+            "DRIVER={ODBC Driver 17 for SQL Server}",
+            f"SERVER={server},{port}",  # Adiciona a porta após o servidor
+            f"DATABASE={database}",
+            self.auth.connection_attributes(),
+            *attributes,
         )
+        return ';'.join(part for part in parts if part)
     def get_sqlalchemy_connection_string(self):
         """
         Retorna a string de conexão para SQLAlchemy (caso seja necessário).
@@ -72,21 +604,43 @@ class DatabaseManager:
         if not self.server or not self.database or not self.port:
             raise ValueError("Configurações do banco de dados não encontradas. Verifique as variáveis de ambiente.")
         
-        # Para SQLAlchemy com autenticação Windows
-        return f"mssql+pyodbc://@{self.server}:{self.port}/{self.database}?driver=ODBC+Driver+17+for+SQL+Server&trusted_connection=yes"
-    def execute_query(self, query, params=None):
+        # A string ODBC completa vai em odbc_connect, então vale para qualquer backend de autenticação
+        return "mssql+pyodbc:///?odbc_connect=" + quote_plus(self.get_connection_string())
+    @METRICS.instrument('execute_query', 'query', result_rows)
+    @_retry_transient()
+    def execute_query(self, query, params=None, result_format=DICT, cache_ttl=None, replica=None):
+        """
+        Executa uma consulta e retorna todas as linhas.
+
+        Args:
+            query (str): A consulta SQL a ser executada.
+            params (tuple): Os parâmetros a serem passados para a consulta (opcional).
+            result_format (str): Formato do resultado (ver helpers.ResultFormats):
+                                 'dict' (padrão), 'row', 'tuple' ou 'columnar'.
+            cache_ttl (float): Se informado e houver cache, reaproveita o resultado por até
+                               `cache_ttl` segundos. O resultado em cache não deve ser alterado.
+            replica (bool): True lê da réplica, False da primária; padrão: roteamento automático.
+
+        Returns:
+            list | TabularResult | dict: Linhas no formato solicitado.
+        """
+        validate_format(result_format)
+        if self.cache is not None and cache_ttl is not None:
+            key = self.cache.make_key('query', query, params, result_format)
+            return self.cache.get_or_load(
+                key, lambda: self.execute_query(query, params, result_format, replica=replica), cache_ttl
+            )
         try:
-            with self.conn.cursor() as cursor:
+            with self._read_connection(replica).cursor() as cursor:
                 if params:
                     cursor.execute(query, params)
                 else:
                     cursor.execute(query)
 
                 if cursor.description:  # Verifica se a consulta retorna resultados
-                    columns = [column[0] for column in cursor.description]
-                    result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                    return result
-                return []  # Retorna lista vazia para consultas sem resultados
+                    metadata = self._statements.metadata(query, cursor.description)
+                    return format_rows(cursor.description, cursor.fetchall(), result_format, metadata)
+                return format_rows((), [], result_format)  # Resultado vazio para consultas sem resultados
         except pyodbc.Error as e:
             sqlstate = e.args[0]
             print(f"Erro de SQL Server: {e}")
@@ -96,6 +650,132 @@ class DatabaseManager:
             print(f"Erro ao executar a consulta: {e}")
             raise
 
+    @METRICS.instrument('iter_query', 'query')
+    def iter_query(self, query, params=None, arraysize=None, result_format=DICT, replica=None):
+        """
+        Executa uma consulta e retorna as linhas sob demanda, sem materializar o resultado.
+
+        As linhas são buscadas do servidor em blocos de `arraysize` com `fetchmany`, de modo
+        que o consumo de memória não depende do tamanho do resultado. O cursor permanece
+        aberto até o gerador ser esgotado ou fechado.
+
+        Args:
+            query (str): A consulta SQL a ser executada.
+            params (tuple): Os parâmetros a serem passados para a consulta (opcional).
+            arraysize (int): Linhas por bloco (padrão: DEFAULT_FETCH_SIZE).
+            result_format (str): 'dict' (padrão), 'row' ou 'tuple'.
+            replica (bool): True lê da réplica, False da primária; padrão: roteamento automático.
+
+        Yields:
+            dict | Row | tuple: Uma linha por vez no formato solicitado.
+        """
+        validate_format(result_format, (DICT, ROW, TUPLE))
+        arraysize = arraysize or self.DEFAULT_FETCH_SIZE
+        try:
+            with self._read_connection(replica).cursor() as cursor:
+                cursor.arraysize = arraysize
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+
+                if not cursor.description:
+                    return
+                metadata = self._statements.metadata(query, cursor.description)
+                convert = row_factory(cursor.description, result_format, metadata)
+                while True:
+                    rows = cursor.fetchmany(arraysize)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield convert(row)
+        except pyodbc.Error as e:
+            sqlstate = e.args[0]
+            print(f"Erro de SQL Server: {e}")
+            print(f"SQL State: {sqlstate}")
+            raise
+        except Exception as e:
+            print(f"Erro ao executar a consulta em streaming: {e}")
+            raise
+
+    @METRICS.instrument('run_parallel')
+    def run_parallel(self, queries, max_workers=None, fail_fast=True, timeout=None, result_format=DICT):
+        """
+        Executa várias consultas independentes ao mesmo tempo, cada uma em uma conexão do pool.
+
+        Útil para telas montadas a partir de várias consultas: a latência passa a ser a da
+        consulta mais lenta, e não a soma de todas.
+
+        Args:
+            queries (dict): {nome: consulta} ou {nome: (consulta, parâmetros)}.
+            max_workers (int): Consultas simultâneas (padrão: DEFAULT_PARALLEL_WORKERS).
+            fail_fast (bool): Se True, o primeiro erro é relançado e as consultas ainda não
+                              iniciadas são canceladas. Se False, retorna resultados parciais
+                              com o erro de cada consulta em `error`.
+            timeout (float): Tempo máximo total em segundos (opcional).
+            result_format (str): Formato das linhas, como em `execute_query`.
+
+        Returns:
+            dict: {nome: ParallelResult(result, elapsed, error)}.
+        """
+        validate_format(result_format)
+        if not queries:
+            return {}
+
+        pool = self.pool if self.pool is not None else self.get_pool()
+        replica_pool = self.replica_pool if self.replica_pool is not None else self.get_replica_pool()
+        # As consultas rodam em outras conexões, mas respeitam o read-your-writes deste gerenciador
+        replica = self.read_from_replica and not self._pinned_to_primary and self._transaction is None
+        workers = min(len(queries), max_workers or self.DEFAULT_PARALLEL_WORKERS)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db-parallel')
+        try:
+            futures = {}
+            for name, spec in queries.items():
+                query, params = (spec, None) if isinstance(spec, str) else spec
+                future = executor.submit(self._timed_query, pool, replica_pool, replica, query, params, result_format)
+                futures[future] = name
+
+            done, pending = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION if fail_fast else ALL_COMPLETED)
+            for future in pending:
+                future.cancel()
+
+            if fail_fast:
+                for future in done:
+                    if future.exception() is not None:
+                        raise future.exception()
+
+            results = {}
+            for future, name in futures.items():
+                if future not in done:
+                    error = TimeoutError(f"Consulta '{name}' não concluída dentro do tempo limite.")
+                elif future.exception() is not None:
+                    error = future.exception()
+                else:
+                    results[name] = future.result()
+                    continue
+                if fail_fast:
+                    raise error
+                results[name] = ParallelResult(None, None, error)
+            return results
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _timed_query(self, pool, replica_pool, replica, query, params, result_format):
+        # Cada thread faz o próprio checkout: a personificação do Windows é por thread
+        started = time.perf_counter()
+        # Mesma configuração do manager de origem (timeout, autenticação e roteamento de leitura)
+        db = DatabaseManager(pool=pool, cache=self.cache, replica_pool=replica_pool,
+                             read_from_replica=self.read_from_replica, query_timeout=self.query_timeout,
+                             auth=self.auth)
+        try:
+            db.connect_to_database()
+            result = db.execute_query(query, params, result_format, replica=replica)
+        finally:
+            db.close_connection()
+        return ParallelResult(result, time.perf_counter() - started, None)
+
+    @METRICS.instrument('execute_non_query', 'query', affected_rows)
+    @_retry_transient(write=True)
     def execute_non_query(self, query, params=None):
         """
         Executa uma consulta SQL que não retorna dados (ex.: INSERT, UPDATE, DELETE).
@@ -117,7 +797,8 @@ class DatabaseManager:
                 
                 # Capturar o número de linhas afetadas ANTES do commit
                 rows_affected = cursor.rowcount
-                self.conn.commit()
+                self._commit()
+                self._invalidate(tables_in(query))
                 
                 return rows_affected
                 
@@ -130,12 +811,95 @@ class DatabaseManager:
             print(f"Erro ao executar a consulta não retornável: {e}")
             raise
 
+    @METRICS.instrument('execute_batch')
+    def execute_batch(self, statements, result_format=DICT, replica=None):
+        """
+        Executa várias instruções parametrizadas em um único lote T-SQL (uma ida ao servidor) e
+        devolve o resultado de cada uma, percorrendo os result sets com nextset().
+
+        Exemplo:
+            resultados = db.execute_batch({
+                'disparo': ("SELECT * FROM RE.disparos WHERE disparo_id = ?", (10,)),
+                'envios': ("SELECT COUNT(*) AS total FROM RE.email_envios WHERE disparo_id = ?", (10,)),
+                'lido': ("UPDATE RE.disparos SET lido = 1 WHERE disparo_id = ?", (10,)),
+            })
+            resultados['envios'].rows[0]['total'], resultados['lido'].rowcount
+
+        As instruções compartilham o escopo do lote (variáveis declaradas valem para as seguintes).
+        Lotes só com SELECT são leituras e seguem o roteamento para a réplica; se houver escritas,
+        o lote vai para a primária e faz um único commit ao final (ou participa de transaction()).
+
+        Args:
+            statements (dict | list): {nome: instrução} ou {nome: (instrução, parâmetros)}, ou uma
+                                      lista nesses formatos.
+            result_format (str): Formato das linhas de cada result set, como em `execute_query`.
+            replica (bool): Para lotes só de leitura: True lê da réplica, False da primária.
+
+        Returns:
+            dict | list: BatchResult(rows, rowcount, result_sets) de cada instrução (ver
+                         helpers.QueryBatch), por nome ou na ordem da lista.
+        """
+        validate_format(result_format)
+        # Normalizado antes da repetição em deadlock: instruções vindas de um gerador já teriam sido consumidas
+        names, normalized = normalize_batch(statements)
+        if not normalized:
+            return {} if names is not None else []
+        results = self._execute_batch(normalized, result_format, replica)
+        return dict(zip(names, results)) if names is not None else results
+
+    @_retry_transient(write=True)
+    def _execute_batch(self, normalized, result_format, replica):
+        query, params = batch_sql(normalized)
+        read_only = is_read_only(normalized)
+
+        def convert(sql, position, description, rows):
+            # Metadados por instrução (e por result set), reaproveitados entre lotes diferentes
+            metadata = self._statements.metadata(f"{sql}\n-- {position}" if position else sql, description)
+            return format_rows(description, rows, result_format, metadata)
+
+        try:
+            conn = self._read_connection(replica) if read_only else self.conn
+            with conn.cursor() as cursor:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                results = read_results(cursor, normalized, convert)
+                if not read_only:
+                    self._commit()
+            if not read_only:
+                self._invalidate(written_tables(normalized))
+        except pyodbc.Error as e:
+            sqlstate = e.args[0]
+            print(f"Erro de SQL Server: {e}")
+            print(f"SQL State: {sqlstate}")
+            if not read_only:
+                self._rollback()
+            raise
+        except Exception as e:
+            print(f"Erro ao executar o lote: {e}")
+            if not read_only:
+                self._rollback()
+            raise
+        return results
+
     def close_connection(self):
+        if self.read_conn is not None:
+            if self.replica_pool is not None:
+                self.replica_pool.release(self.read_conn)
+            else:
+                self.read_conn.close()
+            self.read_conn = None
+        self._pinned_to_primary = False
         if self.conn:
-            self.conn.close()
+            if self.pool is not None:
+                self.pool.release(self.conn)  # Devolve ao pool em vez de fechar
+            else:
+                self.conn.close()
             self.conn = None
-            win32security.RevertToSelf()
 
+    @METRICS.instrument('insert_data', 'table')
+    @_retry_transient(write=True)
     def insert_data(self, table, data):
         """
         Insere dados em uma tabela específica e faz commit.
@@ -145,15 +909,14 @@ class DatabaseManager:
             data (dict): Dicionário contendo os dados a serem inseridos. As chaves devem corresponder aos nomes das colunas da tabela.
         """
         try:
-            # Constrói a string de consulta SQL
-            columns = ', '.join(data.keys())
-            placeholders = ', '.join('?' for _ in data)
-            query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+            # Obtém a instrução SQL já montada para esta tabela e conjunto de colunas
+            query = self._statements.sql(INSERT, table, tuple(data))
 
             # Executa a consulta
             with self.conn.cursor() as cursor:
                 cursor.execute(query, tuple(data.values()))
-                self.conn.commit()  # Efetua o commit das alterações
+                self._commit()  # Efetua o commit das alterações
+            self._invalidate([table])
         except pyodbc.Error as e:
             sqlstate = e.args[0]
             print(f"Erro de SQL Server: {e}")
@@ -163,48 +926,130 @@ class DatabaseManager:
             print(f"Erro ao inserir dados: {e}")
             raise e
 
-    def insert_batch(self, table, data_list):
+    @METRICS.instrument('insert_batch', 'table', affected_rows)
+    def insert_batch(self, table, data_list, chunk_size=None, strategy=AUTO):
         """
-        Insere múltiplos registros em uma tabela específica usando executemany para melhor performance.
+        Insere múltiplos registros em uma tabela específica em uma única transação.
+
+        As linhas são enviadas em blocos pelo BulkLoader (fast_executemany ou INSERT com
+        múltiplas linhas em VALUES), mas o commit acontece uma única vez ao final.
         
         Args:
             table (str): Nome da tabela onde os dados serão inseridos (com schema, ex: 'SCHEMA.tabela').
-            data_list (list): Lista de dicionários contendo os dados a serem inseridos. 
+            data_list (iterable): Lista (ou gerador) de dicionários contendo os dados a serem inseridos. 
                             Todos os dicionários devem ter as mesmas chaves.
+            chunk_size (int): Linhas enviadas por bloco (padrão: DEFAULT_BULK_CHUNK_SIZE).
+            strategy (str): Estratégia de envio (ver helpers.BulkLoader), padrão 'auto'.
         
         Returns:
             int: Número de linhas inseridas.
         """
-        if not data_list:
-            return 0
-            
+        result = self.bulk_insert(table, data_list, chunk_size=chunk_size, strategy=strategy,
+                                  commit_every_chunk=False)
+        return result.rows
+
+    @METRICS.instrument('bulk_insert', 'table', affected_rows)
+    def bulk_insert(self, table, rows, chunk_size=None, strategy=AUTO, commit_every_chunk=True, progress=None):
+        """
+        Carga em massa de um iterável de dicionários (inclusive geradores), em blocos.
+
+        Args:
+            table (str): Nome da tabela onde os dados serão inseridos (com schema, ex: 'SCHEMA.tabela').
+            rows (iterable): Dicionários com os dados; todos devem ter as mesmas chaves.
+            chunk_size (int): Linhas enviadas por bloco (padrão: DEFAULT_BULK_CHUNK_SIZE).
+            strategy (str): 'auto', 'fast_executemany', 'values' ou 'executemany'.
+            commit_every_chunk (bool): Commit por bloco (True) ou uma única transação (False).
+            progress (callable): Recebe um BulkLoadResult parcial após cada bloco (linhas/s).
+
+        Returns:
+            BulkLoadResult: Linhas inseridas, blocos, tempo total, linhas/s e estratégia usada.
+        """
+        # Dentro de transaction() a carga participa da transação: sem commits nem rollback próprios
+        loader = BulkLoader(self.conn, chunk_size=chunk_size or self.DEFAULT_BULK_CHUNK_SIZE,
+                            strategy=strategy, commit_every_chunk=commit_every_chunk, progress=progress,
+                            transactional=self._transaction is None, statements=self._statements)
         try:
-            # Usar as chaves do primeiro dicionário como base
-            columns = ', '.join(data_list[0].keys())
-            placeholders = ', '.join('?' for _ in data_list[0])
-            query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-            
-            # Preparar lista de valores para executemany
-            values_list = [tuple(item.values()) for item in data_list]
-            
-            # Executar inserção em lote
-            with self.conn.cursor() as cursor:
-                cursor.executemany(query, values_list)
-                rows_affected = cursor.rowcount
-                self.conn.commit()
-                return rows_affected
-                
+            return loader.load(table, rows)
         except pyodbc.Error as e:
             sqlstate = e.args[0]
             print(f"Erro de SQL Server ao inserir em lote: {e}")
             print(f"SQL State: {sqlstate}")
-            self.conn.rollback()
+            print(f"Linhas gravadas antes do erro: {loader.rows_committed}")
+            self._fail_transaction()
             raise e
         except Exception as e:
             print(f"Erro ao inserir dados em lote: {e}")
-            self.conn.rollback()
+            print(f"Linhas gravadas antes do erro: {loader.rows_committed}")
+            self._fail_transaction()
             raise e
+        finally:
+            # Mesmo com erro, blocos já gravados (commit por bloco) tornam o cache obsoleto e
+            # as leituras seguintes ficam na primária (read-your-writes), como após `_commit`
+            if loader.rows_sent:
+                self._pinned_to_primary = True
+            self._invalidate([table])
 
+    @METRICS.instrument('insert_returning', 'table')
+    @_retry_transient(write=True)
+    def insert_returning(self, table, data, key, key_type=None):
+        """
+        Insere uma linha e retorna a chave gerada (IDENTITY, NEWSEQUENTIALID()...) na mesma
+        instrução, com `OUTPUT INSERTED.<key>`: dispensa o `get_last_insert_id` e não sofre com
+        o @@IDENTITY de triggers.
+
+        Args:
+            table (str): Nome da tabela onde os dados serão inseridos.
+            data (dict): Dicionário com os dados, como em `insert_data`.
+            key (str): Coluna gerada pelo servidor, ex.: 'disparo_id'.
+            key_type (str): Tipo SQL da chave, obrigatório se a tabela tiver triggers (ex.: 'INT').
+
+        Returns:
+            O valor da chave gerada.
+        """
+        return self.insert_batch_returning(table, [data], key, key_type=key_type)[0]
+
+    @METRICS.instrument('insert_batch_returning', 'table', len)
+    def insert_batch_returning(self, table, data_list, key, chunk_size=None, key_type=None):
+        """
+        Insere vários registros em uma única transação e retorna a chave gerada de cada um,
+        na ordem de `data_list`. Cada bloco é uma única instrução (MERGE ... OUTPUT), sem
+        consultas adicionais.
+
+        Args:
+            table (str): Nome da tabela onde os dados serão inseridos (com schema, ex: 'SCHEMA.tabela').
+            data_list (iterable): Dicionários com os dados; todos devem ter as mesmas chaves.
+            key (str): Coluna gerada pelo servidor, ex.: 'envio_id'.
+            chunk_size (int): Linhas lidas de `data_list` por vez (padrão: DEFAULT_BULK_CHUNK_SIZE).
+            key_type (str): Tipo SQL da chave, obrigatório se a tabela tiver triggers (ex.: 'INT').
+
+        Returns:
+            list: Uma chave por registro, na ordem de entrada.
+        """
+        chunk_size = chunk_size or self.DEFAULT_BULK_CHUNK_SIZE
+        iterator = iter(data_list)
+        keys = []
+        try:
+            with self.conn.cursor() as cursor:
+                while True:
+                    chunk = list(islice(iterator, chunk_size))
+                    if not chunk:
+                        break
+                    keys += insert_returning(cursor, table, chunk, key, key_type)
+            self._commit()
+            self._invalidate([table])
+            return keys
+        except pyodbc.Error as e:
+            sqlstate = e.args[0]
+            print(f"Erro de SQL Server: {e}")
+            print(f"SQL State: {sqlstate}")
+            self._rollback()
+            raise e
+        except Exception as e:
+            print(f"Erro ao inserir dados: {e}")
+            self._rollback()
+            raise e
+
+    @METRICS.instrument('update_data', 'table')
     def update_data(self, table, data, condition):
         """
         Atualiza dados em uma tabela específica baseado em uma condição.
@@ -218,36 +1063,38 @@ class DatabaseManager:
             update_data('minha_tabela', {'nome_coluna': 'novo_valor'}, "id = 1")
         """
         try:
-            # Constrói a string de consulta SQL para atualização
-            set_clause = ', '.join(f"{key} = ?" for key in data.keys())
-            query = f"UPDATE {table} SET {set_clause} WHERE {condition}"
+            # Instrução de atualização em cache, completada com a condição
+            query = self._statements.sql(UPDATE, table, tuple(data)) + condition
 
             # Executa a consulta
             with self.conn.cursor() as cursor:
                 cursor.execute(query, tuple(data.values()))
-                self.conn.commit()  # Efetua o commit das alterações
+                self._commit()  # Efetua o commit das alterações
+            self._invalidate([table])
         except pyodbc.Error as e:
             sqlstate = e.args[0]
             print(f"Erro de SQL Server: {e}")
             print(f"SQL State: {sqlstate}")
+            self._fail_transaction()
         except Exception as e:
             print(f"Erro ao atualizar dados: {e}")
+            self._fail_transaction()
 
+    @METRICS.instrument('execute_procedure', 'procedure_name')
     def execute_procedure(self, procedure_name, params=None):
         try:
             with self.conn.cursor() as cursor:
-                # Preparar a string de chamada da procedure com os parâmetros
-                query = f"EXEC {procedure_name}"
+                # Obter a string de chamada da procedure com os parâmetros
+                query = self._statements.sql(EXEC, procedure_name, len(params) if params else 0)
                 if params:
-                    param_placeholders = ', '.join(['?'] * len(params))
-                    query = f"EXEC {procedure_name} {param_placeholders}"
-
                     # Executar a procedure
                     cursor.execute(query, params)
-                    self.conn.commit()  # Efetua o commit das alterações
+                    self._commit()  # Efetua o commit das alterações
                 else:
                     cursor.execute(query)
-                    self.conn.commit()  # Efetua o commit das alterações
+                    self._commit()  # Efetua o commit das alterações
+            # A procedure pode alterar qualquer tabela: descarta todo o cache
+            self._invalidate()
         except pyodbc.Error as e:
             sqlstate = e.args[0]
             print(f"Erro de SQL Server: {e}")
@@ -257,25 +1104,39 @@ class DatabaseManager:
             print(f"Erro ao executar a procedure: {e}")
             raise
 
-    def select_data(self, table, columns, condition):
+    @METRICS.instrument('select_data', 'table', result_rows)
+    @_retry_transient()
+    def select_data(self, table, columns, condition, result_format=DICT, replica=None, validate_identifiers=True):
         """
         Seleciona dados de uma tabela específica com base em uma condição.
 
         Args:
-            table (str): Nome da tabela de onde os dados serão selecionados.
-            columns (list): Lista das colunas a serem selecionadas.
+            table (str): Nome da tabela de onde os dados serão selecionados (sem alias nem JOIN,
+                         salvo com `validate_identifiers=False`).
+            columns (list): Lista das colunas a serem selecionadas: colunas (qualificadas ou não),
+                            '*', literais e chamadas de função com argumentos simples, com alias
+                            opcional; a primeira pode ter DISTINCT/TOP. Ex.: ['DISTINCT nome'],
+                            ['TOP 1 id'], ['COUNT(*) AS n'].
             condition (str): Condição SQL para especificar quais registros selecionar.
+            result_format (str): 'dict' (padrão), 'row', 'tuple' ou 'columnar'.
+            replica (bool): True lê da réplica, False da primária; padrão: roteamento automático.
+            validate_identifiers (bool): False envia a tabela e as colunas sem validação, para
+                                         trechos fixos no código (ex.: alias ou JOIN na tabela,
+                                         CAST ou CASE nas colunas). Nunca use com entrada do usuário.
 
         Returns:
-            list: Lista de dicionários contendo os registros selecionados.
+            list: Lista de dicionários contendo os registros selecionados
+                  (ou o formato indicado em `result_format`).
         """
+        validate_format(result_format)
         try:
-            query = f"SELECT {', '.join(columns)} FROM {table} WHERE {condition}"
-            with self.conn.cursor() as cursor:
+            operation = SELECT if validate_identifiers else RAW_SELECT
+            query = self._statements.sql(operation, table, tuple(columns)) + condition
+            with self._read_connection(replica).cursor() as cursor:
                 cursor.execute(query)
                 rows = cursor.fetchall()
-                columns = [column[0] for column in cursor.description]
-                return [dict(zip(columns, row)) for row in rows]
+                metadata = self._statements.metadata(query, cursor.description)
+                return format_rows(cursor.description, rows, result_format, metadata)
         except pyodbc.Error as e:
             sqlstate = e.args[0]
             print(f"Erro de SQL Server: {e}")
@@ -285,69 +1146,152 @@ class DatabaseManager:
             print(f"Erro ao selecionar dados: {e}")
             raise e
 
-    def delete_disparo(self, disparo_id):
+    @METRICS.instrument('select_page', 'table', lambda page: result_rows(page.rows))
+    @_retry_transient()
+    def select_page(self, table, columns, condition, order_by, page_size=100, cursor=None, params=None,
+                    result_format=DICT, replica=None):
+        """
+        Seleciona uma página de registros com paginação por chave (keyset/seek).
+
+        Em vez de OFFSET, cada página continua a partir dos valores da chave da última linha
+        da página anterior (`WHERE chave > ? ... ORDER BY chave`), então a página N custa o mesmo
+        que a primeira quando há um índice na chave. A chave deve identificar cada linha de forma
+        única (inclua a chave primária como última coluna) e não pode conter NULL.
+
+        Args:
+            table (str): Nome da tabela de onde os dados serão selecionados.
+            columns (list): Lista das colunas a serem selecionadas. Colunas da chave ausentes
+                            são incluídas no resultado. A primeira pode ter DISTINCT, mas
+                            não TOP (o tamanho da página define o TOP).
+            condition (str): Condição SQL adicional (vazia para todas as linhas).
+            order_by (list): Colunas da chave com ASC/DESC opcional, ex.: ['data DESC', 'id'].
+            page_size (int): Número máximo de linhas da página.
+            cursor (str): Token `next_cursor` da página anterior (None para a primeira página).
+            params (tuple): Parâmetros dos marcadores '?' de `condition` (opcional).
+            result_format (str): 'dict' (padrão), 'row', 'tuple' ou 'columnar'.
+            replica (bool): True lê da réplica, False da primária; padrão: roteamento automático.
+
+        Returns:
+            Page: `rows` no formato indicado e `next_cursor` (None na última página).
+
+        Raises:
+            InvalidCursorError: Se o token for inválido ou de outra consulta.
+        """
+        validate_format(result_format)
+        if page_size < 1:
+            raise ValueError("page_size deve ser maior que zero.")
+        keys = parse_order_by(order_by)
+        query_signature = signature(table, keys)
+
+        columns = list(columns)
+        selected = {key_name(column.split()[-1].split('.')[-1]) for column in columns}
+        if '*' not in selected:
+            columns += [column for column, _ in keys if key_name(column) not in selected]
+
+        predicates = [f"({condition})"] if condition and condition.strip() else []
+        query_params = [page_size + 1] + list(params or ())
+        if cursor is not None:
+            values = decode_cursor(cursor, query_signature, len(keys))
+            predicates.append(f"({seek_predicate(keys)})")
+            query_params += seek_params(values)
+
+        base = page_select_sql(self._statements.sql(SELECT, table, tuple(columns)))
+        query = base + (' AND '.join(predicates) or '1 = 1') + " ORDER BY " + order_by_sql(keys)
         try:
-            with self.conn.cursor() as cursor:
-                # Deletar os anexos associados
-                cursor.execute(
-                    "DELETE FROM RE.anexos WHERE anexo_id IN (SELECT anexo_id FROM RE.resumo_envios WHERE pulse_id = ?) OR anexo_id IN (SELECT anexo_id FROM RE.email_envios WHERE pulse_id = ?)",
-                    (disparo_id, disparo_id))
+            with self._read_connection(replica).cursor() as db_cursor:
+                db_cursor.execute(query, query_params)
+                rows = db_cursor.fetchall()
+                description = db_cursor.description
+        except pyodbc.Error as e:
+            sqlstate = e.args[0]
+            print(f"Erro de SQL Server: {e}")
+            print(f"SQL State: {sqlstate}")
+            raise e
+        except Exception as e:
+            print(f"Erro ao selecionar dados: {e}")
+            raise e
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            names = [key_name(column[0]) for column in description]
+            positions = [names.index(key_name(column)) for column, _ in keys]
+            next_cursor = encode_cursor([rows[-1][position] for position in positions], query_signature)
+
+        metadata = self._statements.metadata(query, description)
+        return Page(format_rows(description, rows, result_format, metadata), next_cursor)
 
-                # Encontrar IDs de resumo e email relacionados ao disparo
-                cursor.execute("SELECT resumo_id FROM RE.resumo_envios WHERE pulse_id = ?", (disparo_id,))
-                resumo_ids = [row[0] for row in cursor.fetchall()]
+    @METRICS.instrument('delete_cascade', 'plan', affected_rows)
+    def delete_cascade(self, plan, ids):
+        """
+        Executa um plano de exclusão em cascata (ver helpers.CascadeDelete) em uma transação.
 
-                cursor.execute("SELECT envio_id FROM RE.email_envios WHERE pulse_id = ?", (disparo_id,))
-                email_ids = [row[0] for row in cursor.fetchall()]
+        Args:
+            plan (CascadeDeletePlan): Plano com as tabelas e relacionamentos.
+            ids (iterable): Valores da chave da tabela raiz a excluir.
 
-                # Deletar de tabelas relacionadas ao resumo e email
-                for resumo_id in resumo_ids:
-                    cursor.execute("DELETE FROM RE.resumo_destinatarios WHERE resumo_id = ?", (resumo_id,))
+        Returns:
+            dict: Linhas excluídas por tabela ({tabela: quantidade}).
+        """
+        # Materializa os ids antes da repetição em deadlock: um gerador já consumido não excluiria nada
+        return self._delete_cascade(plan, list(ids))
 
-                for email_id in email_ids:
-                    cursor.execute("DELETE FROM RE.email_destinatarios WHERE envio_id = ?", (email_id,))
+    @_retry_transient(write=True)
+    def _delete_cascade(self, plan, ids):
+        try:
+            with self.conn.cursor() as cursor:
+                deleted = plan.execute(cursor, ids)
+                self._commit()
+            self._invalidate([table for table, _ in plan.statements])
+            return deleted
+        except Exception:
+            self._rollback()  # Importante para desfazer alterações parciais
+            raise
+
+    def delete_disparo(self, disparo_id):
+        return self.delete_disparos([disparo_id])
 
-                # Deletar de 'resumo_envios' e 'email_envios'
-                cursor.execute("DELETE FROM RE.resumo_envios WHERE pulse_id = ?", (disparo_id,))
-                cursor.execute("DELETE FROM RE.email_envios WHERE pulse_id = ?", (disparo_id,))
+    def delete_disparos(self, disparo_ids):
+        """
+        Exclui vários disparos e todos os registros dependentes (envios, destinatários e anexos)
+        com poucas instruções DELETE baseadas em conjuntos, em uma única transação.
 
-                # Por fim, deletar da tabela 'disparos'
-                cursor.execute("DELETE FROM RE.disparos WHERE disparo_id = ?", (disparo_id,))
+        Args:
+            disparo_ids (iterable): Ids dos disparos a excluir.
 
-                self.conn.commit()
-                return True
+        Returns:
+            bool: True se a exclusão foi concluída, False em caso de erro.
+        """
+        try:
+            self.delete_cascade(DISPARO_CASCADE, disparo_ids)
+            return True
         except pyodbc.Error as e:
             print(f"Erro de SQL Server: {e}")
-            self.conn.rollback()  # Importante para desfazer alterações parciais
             return False
         except Exception as e:
             print(f"Erro geral: {e}")
-            self.conn.rollback()  # Importante para desfazer alterações parciais
             return False
 
     def delete_powerbi(self, powerbi_id):
         try:
-            with self.conn.cursor() as cursor:
-                # Por fim, deletar da tabela 'powerbi_relatorios_log'
-                cursor.execute("DELETE FROM DBA_CONTROLE.RE.powerbi_relatorios_log WHERE powerbi_id = ?", (powerbi_id,))
-                # Por fim, deletar da tabela 'exportar_powerbi'
-                cursor.execute("DELETE FROM DBA_CONTROLE.RE.powerbi_relatorios WHERE powerbi_id = ?", (powerbi_id,))
-
-                self.conn.commit()
-                return True
+            # Exclui 'powerbi_relatorios_log' e depois 'powerbi_relatorios' em um único lote
+            self.delete_cascade(POWERBI_CASCADE, [powerbi_id])
+            return True
         except pyodbc.Error as e:
             print(f"Erro de SQL Server: {e}")
-            self.conn.rollback()  # Importante para desfazer alterações parciais
             return False
         except Exception as e:
             print(f"Erro geral: {e}")
-            self.conn.rollback()  # Importante para desfazer alterações parciais
             return False
 
+    @METRICS.instrument('get_last_insert_id')
     def get_last_insert_id(self):
         """
         Obtém o último ID inserido na conexão atual.
 
+        Prefira `insert_returning`, que devolve a chave na própria inserção (sem esta ida extra ao
+        servidor) e não é afetado por IDs gerados em triggers, como ocorre com @@IDENTITY.
+
         Returns:
             int: O último ID inserido.
         """
@@ -370,18 +1314,27 @@ class DatabaseManager:
             print(f"Erro ao obter o último ID inserido: {e}")
             raise
 
-    def record_exists(self, table, condition):
+    @METRICS.instrument('record_exists', 'table')
+    @_retry_transient()
+    def record_exists(self, table, condition, cache_ttl=None, replica=None):
         """
         Verifica se um registro existe na tabela com base em uma condição.
         Args:
             table (str): Nome da tabela onde procurar o registro.
             condition (str): Condição SQL para especificar qual registro procurar.
+            cache_ttl (float): Segundos de reaproveitamento do resultado em cache (opcional).
+            replica (bool): True lê da réplica, False da primária; padrão: roteamento automático.
         Returns:
             bool: True se o registro existir, False caso contrário.
         """
+        if self.cache is not None and cache_ttl is not None:
+            key = self.cache.make_key('exists', f"{table} WHERE {condition}")
+            return self.cache.get_or_load(
+                key, lambda: self.record_exists(table, condition, replica=replica), cache_ttl, [table]
+            )
         try:
             query = f"SELECT COUNT(*) FROM {table} WHERE {condition}"
-            with self.conn.cursor() as cursor:
+            with self._read_connection(replica).cursor() as cursor:
                 cursor.execute(query)
                 count = cursor.fetchone()[0]
                 return count > 0
@@ -394,19 +1347,26 @@ class DatabaseManager:
             print(f"Erro ao verificar a existência do registro: {e}")
             raise e
 
-    def execute_scalar(self, query, params=None):
+    @METRICS.instrument('execute_scalar', 'query')
+    @_retry_transient()
+    def execute_scalar(self, query, params=None, cache_ttl=None, replica=None):
         """
         Executa uma consulta que retorna um único valor.
 
         Args:
             query (str): A consulta SQL a ser executada.
             params (tuple): Os parâmetros a serem passados para a consulta.
+            cache_ttl (float): Segundos de reaproveitamento do resultado em cache (opcional).
+            replica (bool): True lê da réplica, False da primária; padrão: roteamento automático.
 
         Returns:
             qualquer: O valor retornado pela consulta.
         """
+        if self.cache is not None and cache_ttl is not None:
+            key = self.cache.make_key('scalar', query, params)
+            return self.cache.get_or_load(key, lambda: self.execute_scalar(query, params, replica=replica), cache_ttl)
         try:
-            with self.conn.cursor() as cursor:
+            with self._read_connection(replica).cursor() as cursor:
                 if params:
                     cursor.execute(query, params)
                 else:
@@ -422,20 +1382,25 @@ class DatabaseManager:
             print(f"Erro ao executar a consulta escalar: {e}")
             raise e
 
-    def execute_query_single(self, query, params=None):
+    @METRICS.instrument('execute_query_single', 'query', result_rows)
+    @_retry_transient()
+    def execute_query_single(self, query, params=None, result_format=DICT, replica=None):
         """
         Executa uma consulta que retorna uma única linha (dict) ou None.
 
         Args:
             query (str): A consulta SQL a ser executada.
             params (tuple): Os parâmetros a serem passados para a consulta.
+            result_format (str): 'dict' (padrão), 'row' ou 'tuple'.
+            replica (bool): True lê da réplica, False da primária; padrão: roteamento automático.
 
         Returns:
-            dict: Retorna um dicionário {coluna: valor} com a linha encontrada,
-                  ou None se não houver resultado.
+            dict: Retorna um dicionário {coluna: valor} com a linha encontrada
+                  (ou o formato indicado em `result_format`), ou None se não houver resultado.
         """
+        validate_format(result_format, (DICT, ROW, TUPLE))
         try:
-            with self.conn.cursor() as cursor:
+            with self._read_connection(replica).cursor() as cursor:
                 if params:
                     cursor.execute(query, params)
                 else:
@@ -447,11 +1412,9 @@ class DatabaseManager:
                     # Se não encontrou linha alguma, retorna None
                     return None
 
-                # Monta a lista de colunas
-                columns = [desc[0] for desc in cursor.description]
-
-                # Retorna a linha em forma de dicionário
-                return dict(zip(columns, row))
+                # Retorna a linha no formato solicitado (dicionário por padrão)
+                metadata = self._statements.metadata(query, cursor.description)
+                return format_row(cursor.description, row, result_format, metadata)
 
         except pyodbc.Error as e:
             sqlstate = e.args[0]
@@ -462,21 +1425,23 @@ class DatabaseManager:
             print(f"Erro ao executar a consulta single: {e}")
             raise e
 
+    @METRICS.instrument('execute_procedure_indicador', 'procedure_name', result_rows)
     def execute_procedure_indicador(self, procedure_name, params):
         try:
             with self.conn.cursor() as cursor:
-                # Criar a string de chamada com o número correto de marcadores
-                param_placeholders = ', '.join(['?'] * len(params))
-                query = f"EXEC {procedure_name} {param_placeholders}"
+                # Obter a string de chamada com o número correto de marcadores
+                query = self._statements.sql(EXEC, procedure_name, len(params))
                 cursor.execute(query, params)
                 # Capturar o resultado retornado, se houver
                 if cursor.description:
-                    columns = [column[0] for column in cursor.description]
-                    result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                    self.conn.commit()
+                    metadata = self._statements.metadata(query, cursor.description)
+                    result = format_rows(cursor.description, cursor.fetchall(), DICT, metadata)
+                    self._commit()
+                    self._invalidate()
                     return result if result else None
                 else:
-                    self.conn.commit()
+                    self._commit()
+                    self._invalidate()
                     return None
         except pyodbc.Error as e:
             sqlstate = e.args[0]
@@ -485,4 +1450,54 @@ class DatabaseManager:
             raise
         except Exception as e:
             print(f"Erro ao executar a procedure: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+def _collect_pool_and_cache():
+    """Gauges dos pools de conexões, dos disjuntores, da autenticação, do cache de resultados e do buffer de gravação, para /metrics."""
+    gauges = []
+    pool = DatabaseManager._pool
+    if pool is not None:
+        gauges += [
+            ('db_pool_connections', 'Conexões abertas no pool.', {'state': 'idle'}, pool.idle_count),
+            ('db_pool_connections', 'Conexões abertas no pool.', {'state': 'in_use'}, pool.size - pool.idle_count),
+            ('db_pool_max_connections', 'Tamanho máximo do pool.', {}, pool.max_size),
+        ]
+    replica_pool = DatabaseManager._replica_pool
+    if replica_pool is not None:
+        gauges += [
+            ('db_replica_pool_connections', 'Conexões abertas no pool da réplica.', {'state': 'idle'},
+             replica_pool.idle_count),
+            ('db_replica_pool_connections', 'Conexões abertas no pool da réplica.', {'state': 'in_use'},
+             replica_pool.size - replica_pool.idle_count),
+            ('db_replica_pool_max_connections', 'Tamanho máximo do pool da réplica.', {}, replica_pool.max_size),
+        ]
+    for module, seconds in import_times().items():
+        gauges.append(('db_driver_import_seconds', 'Tempo de importação dos drivers.', {'module': module}, seconds))
+    if DatabaseManager._warm_up_seconds is not None:
+        gauges.append(('db_warm_up_seconds', 'Duração do aquecimento dos pools.', {}, DatabaseManager._warm_up_seconds))
+    for breaker in (DatabaseManager._breaker, DatabaseManager._replica_breaker):
+        stats = breaker.stats()
+        state = stats.pop('state')
+        gauges.append(('db_circuit_open', 'Circuito aberto (1), meio-aberto (0.5) ou fechado (0).',
+                       {'server': breaker.name}, {'open': 1, 'half_open': 0.5}.get(state, 0)))
+        for name, value in stats.items():
+            gauges.append(('db_circuit', 'Contadores do disjuntor de conexões.',
+                           {'server': breaker.name, 'stat': name}, value))
+    cache = DatabaseManager._cache
+    if cache is not None:
+        for name, value in cache.stats().items():
+            gauges.append(('db_query_cache', 'Contadores do cache de resultados.', {'stat': name}, value))
+    for backend, stats in auth_stats().items():
+        for name, value in stats.items():
+            gauges.append(('db_auth_token', 'Token de autenticação: logons, renovações, falhas e validade.',
+                           {'backend': backend, 'stat': name}, value))
+    write_buffer = DatabaseManager._write_buffer
+    if write_buffer is not None:
+        for name, value in write_buffer.stats().items():
+            gauges.append(('db_write_behind', 'Contadores do buffer de gravação em segundo plano.',
+                           {'stat': name}, value))
+    return gauges
+
+
+METRICS.register_collector(_collect_pool_and_cache)
@@ -0,0 +1,81 @@
+import importlib
+import threading
+import time
+
+
+class DriverNotAvailableError(ImportError):
+    """O módulo do driver não pôde ser importado (ex.: win32security fora do Windows)."""
+
+
+class LazyModule:
+    """
+    Módulo importado apenas no primeiro acesso a um atributo.
+
+    Mantém pyodbc e win32security fora do tempo de importação da aplicação: `import app` e o
+    fork dos workers não pagam pela carga do driver ODBC, e plataformas sem o módulo (ex.:
+    win32security no Linux) só falham se o recurso for de fato usado. `override` troca o
+    módulo por um substituto (ex.: benchmarks.stand_in) sem mexer em sys.modules.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+        self.__dict__['import_seconds'] = None
+
+    @property
+    def loaded(self):
+        """True depois que o módulo foi importado (ou substituído)."""
+        return self._module is not None
+
+    def load(self):
+        """
+        Importa o módulo, se ainda não foi importado.
+
+        Returns:
+            module: O módulo (ou o substituto definido em `override`).
+
+        Raises:
+            DriverNotAvailableError: Se o módulo não puder ser importado.
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    try:
+                        module = importlib.import_module(self._name)
+                    except ImportError as e:
+                        raise DriverNotAvailableError(f"Módulo '{self._name}' não disponível: {e}") from e
+                    self.__dict__['import_seconds'] = time.perf_counter() - started
+                    self.__dict__['_module'] = module
+        return self._module
+
+    def override(self, module):
+        """Usa `module` no lugar do módulo real (None volta a importar o real no próximo uso)."""
+        with self._lock:
+            self.__dict__['_module'] = module
+
+    def __getattr__(self, name):
+        # Sem cópia dos atributos: alterações no módulo (ex.: testes que o substituem) valem na hora
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Use override() para substituir o módulo '{self._name}'.")
+
+    def __repr__(self):
+        state = 'carregado' if self.loaded else 'não carregado'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+# Drivers usados pelo DatabaseManager e pelos backends de autenticação
+pyodbc = LazyModule('pyodbc')
+win32security = LazyModule('win32security')
+
+
+def import_times():
+    """Segundos gastos importando cada driver já carregado ({nome: segundos})."""
+    return {
+        module._name: module.import_seconds
+        for module in (pyodbc, win32security)
+        if module.import_seconds is not None
+    }
@@ -0,0 +1,167 @@
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só gzip é oferecido
+    brotli = None
+
+# Tipos de conteúdo comprimidos (prefixos do mimetype)
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'text/',
+)
+
+
+class _GzipEncoder:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = formato gzip
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def _encoded(chunk):
+    return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+class _CompressedStream:
+    # Corpo de uma resposta em streaming comprimido bloco a bloco. `close` repassa o fechamento
+    # ao iterável original, liberando o contexto da requisição mesmo se o envio for interrompido
+    def __init__(self, head, chunks, encoder):
+        self._head = head
+        self._chunks = chunks
+        self._encoder = encoder
+
+    def __iter__(self):
+        encoder = self._encoder
+        yield encoder.compress(b''.join(self._head)) + encoder.flush()
+        for chunk in self._chunks:
+            yield encoder.compress(_encoded(chunk)) + encoder.flush()
+        yield encoder.finish()
+
+    def close(self):
+        close = getattr(self._chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class Compression:
+    """
+    Compressão gzip/brotli das respostas, negociada pelo cabeçalho Accept-Encoding.
+
+    Respostas com corpo em memória só são comprimidas a partir de `min_size` bytes. Em respostas
+    em streaming (ex.: `stream_ndjson`), os primeiros blocos são lidos até atingir `min_size`: se o
+    conteúdo terminar antes, segue sem compressão; senão, cada bloco é comprimido e enviado com
+    flush, mantendo a entrega incremental ao cliente.
+
+    Configuração (app.config ou variáveis de ambiente): COMPRESS_MIN_SIZE (padrão 1024 bytes),
+    COMPRESS_GZIP_LEVEL (padrão 6) e COMPRESS_BROTLI_QUALITY (padrão 4).
+    """
+
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Lê a configuração e registra a compressão em `after_request`."""
+        self.min_size = int(app.config.get('COMPRESS_MIN_SIZE', os.getenv('COMPRESS_MIN_SIZE', '1024')))
+        self.gzip_level = int(app.config.get('COMPRESS_GZIP_LEVEL', os.getenv('COMPRESS_GZIP_LEVEL', '6')))
+        self.brotli_quality = int(app.config.get('COMPRESS_BROTLI_QUALITY', os.getenv('COMPRESS_BROTLI_QUALITY', '4')))
+        app.after_request(self.after_request)
+
+    def negotiate(self, accept_encodings):
+        """
+        Escolhe a codificação preferida pelo cliente entre as disponíveis.
+
+        Returns:
+            str: 'br', 'gzip' ou None (sem compressão).
+        """
+        candidates = [('br', 1)] if brotli is not None else []
+        candidates.append(('gzip', 0))
+        best = max(
+            ((accept_encodings.quality(name), order, name) for name, order in candidates),
+            default=(0, 0, None),
+        )
+        return best[2] if best[0] > 0 else None
+
+    def after_request(self, response):
+        if not self._compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            return self._compress_stream(response, encoding)
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        encoder = self._encoder(encoding)
+        response.set_data(encoder.compress(data) + encoder.finish())
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _compress_stream(self, response, encoding):
+        chunks = iter(response.response)
+        head, size = [], 0
+        for chunk in chunks:
+            chunk = _encoded(chunk)
+            head.append(chunk)
+            size += len(chunk)
+            if size >= self.min_size:
+                break
+        else:
+            # Conteúdo inteiro abaixo do limite: envia sem compressão
+            response.response = head
+            return response
+
+        response.response = _CompressedStream(head, chunks, self._encoder(encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Content-Length', None)
+        return response
+
+    def _compressible(self, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+        return (response.mimetype or '').startswith(COMPRESSIBLE_MIMETYPES)
+
+    def _encoder(self, encoding):
+        if encoding == 'br':
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
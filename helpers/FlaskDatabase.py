@@ -0,0 +1,86 @@
+import threading
+from flask import g
+from helpers.AsyncDatabaseManager import AsyncDatabaseManager
+from helpers.DatabaseManager import DatabaseManager
+
+_async_db = None
+_async_db_lock = threading.Lock()
+
+
+def get_db():
+    """
+    Retorna o DatabaseManager da requisição atual.
+
+    Na primeira chamada dentro da requisição, faz o checkout de uma conexão do pool do
+    processo (a personificação do Windows, se houver, usa o token em cache do processo). A
+    conexão é devolvida ao pool ao fim da requisição por `close_db`. O gerenciador compartilha
+    o cache de resultados do processo e, se houver réplica de leitura configurada, envia as
+    leituras ao pool da réplica.
+
+    Returns:
+        DatabaseManager: Gerenciador com a conexão da requisição.
+    """
+    if 'db' not in g:
+        db = DatabaseManager(
+            pool=DatabaseManager.get_pool(),
+            cache=DatabaseManager.get_cache(),
+            replica_pool=DatabaseManager.get_replica_pool(),
+        )
+        db.connect_to_database()
+        g.db = db
+    return g.db
+
+
+def get_async_db():
+    """
+    Retorna o AsyncDatabaseManager do processo, para uso em rotas `async def`.
+
+    Returns:
+        AsyncDatabaseManager: Fachada assíncrona ligada ao pool e ao cache do processo.
+    """
+    global _async_db
+    if _async_db is None:
+        with _async_db_lock:
+            if _async_db is None:
+                _async_db = AsyncDatabaseManager(
+                    pool=DatabaseManager.get_pool(),
+                    cache=DatabaseManager.get_cache(),
+                    replica_pool=DatabaseManager.get_replica_pool(),
+                )
+    return _async_db
+
+
+def close_db(exception=None):
+    """Devolve ao pool a conexão obtida pela requisição, se houver."""
+    db = g.pop('db', None)
+    if db is not None:
+        db.close_connection()
+
+
+def init_app(app):
+    """Registra a devolução da conexão ao pool no encerramento de cada requisição."""
+    app.teardown_appcontext(close_db)
+
+
+def reset_after_fork():
+    """
+    Prepara um worker recém-criado por fork: descarta o pool, o cache e a fachada assíncrona
+    herdados do processo pai (as threads do executor não sobrevivem ao fork).
+    """
+    global _async_db, _async_db_lock
+    _async_db = None
+    _async_db_lock = threading.Lock()
+    DatabaseManager.reset_after_fork()
+
+
+def shutdown():
+    """
+    Encerra a fachada assíncrona, grava as linhas pendentes do buffer de gravação e fecha o
+    pool do processo (ex.: na saída de um worker).
+    """
+    global _async_db
+    async_db, _async_db = _async_db, None
+    if async_db is not None:
+        async_db.close(wait=True)
+    DatabaseManager.close_write_buffer()
+    DatabaseManager.close_pool()
@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele a serialização usa o módulo json
+    orjson = None
+
+
+def default(value):
+    """
+    Converte os tipos do SQL Server que o JSON não representa.
+
+    Só é chamada para valores que o serializador não conhece, então linhas com tipos
+    nativos (str, int, float, None) não pagam nenhuma conversão em Python.
+
+    - datetime/date/time: ISO 8601
+    - Decimal (decimal, numeric, money): texto, sem perder precisão
+    - UUID (uniqueidentifier): texto
+    - bytes (varbinary, image, rowversion): base64
+    - numpy.ndarray e escalares NumPy (formato colunar): lista / número
+    - namedtuple (Row, TabularResult, ParallelResult...): objeto com os campos; demais tuplas: lista
+    """
+    if isinstance(value, tuple):
+        return value._asdict() if hasattr(value, '_asdict') else list(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode('ascii')
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Objeto do tipo {type(value).__name__} não é serializável em JSON.")
+
+
+def _plain(value):
+    # O módulo json serializa toda tupla como lista antes de consultar `default`; para ficar
+    # igual ao orjson, as namedtuples viram dicionários antes da serialização
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if hasattr(value, '_asdict'):
+            return _plain(value._asdict())
+        return [_plain(item) for item in value]
+    return value
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Provedor JSON do Flask para resultados de consultas.
+
+    Usa o orjson quando instalado (datetime, UUID e arrays NumPy são serializados em C) e o
+    módulo json da biblioteca padrão caso contrário; nos dois casos os demais tipos do SQL Server
+    passam por `default`. `jsonify` e os helpers de streaming usam este provedor via `app.json`.
+    """
+
+    mimetype = 'application/json'
+    sort_keys = False
+    compact = None  # None = compacto, exceto com debug ligado
+
+    def dumps(self, obj, **kwargs):
+        """Serializa `obj` como texto JSON (kwargs do módulo json são aceitos e ignorados pelo orjson)."""
+        if orjson is not None:
+            return self._orjson_dumps(obj, kwargs.get('indent')).decode('utf-8')
+        kwargs.setdefault('default', default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if kwargs.get('indent') is None:
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(_plain(obj), **kwargs)
+
+    def dumps_bytes(self, obj, indent=None):
+        """Serializa `obj` como JSON em UTF-8, sem passar por str quando o orjson está disponível."""
+        if orjson is not None:
+            return self._orjson_dumps(obj, indent)
+        return self.dumps(obj, indent=indent).encode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = None
+        if self.compact is False or (self.compact is None and self._app.debug):
+            indent = 2
+        return self._app.response_class(self.dumps_bytes(obj, indent), mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj, indent=None):
+        # Subclasses de tuple (namedtuples) não são serializadas pelo orjson: passam por `default`
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
@@ -0,0 +1,129 @@
+from itertools import chain
+from flask import Response, current_app, jsonify, request, stream_with_context, url_for
+from helpers.Pagination import InvalidCursorError
+
+# Quantidade de linhas serializadas antes de cada envio ao cliente
+DEFAULT_CHUNK_ROWS = 500
+
+# Tamanho padrão e máximo das páginas de paginated_response (parâmetro `limit` da URL)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _dumps(row):
+    return current_app.json.dumps(row, ensure_ascii=False)
+
+
+def _primed(rows):
+    # Lê a primeira linha antes de iniciar a resposta: erros de execução da consulta
+    # ainda podem ser tratados pela rota e virar um status HTTP de erro
+    rows = iter(rows)
+    for first in rows:
+        return chain((first,), rows)
+    return iter(())
+
+
+def stream_ndjson(rows, chunk_rows=DEFAULT_CHUNK_ROWS, status=200):
+    """
+    Envia as linhas como NDJSON (um objeto JSON por linha) à medida que são lidas.
+
+    O contexto da requisição é mantido até o fim do envio, então a conexão obtida por
+    `get_db()` só volta ao pool depois da última linha.
+
+    Args:
+        rows (iterable): Linhas a serem enviadas, ex.: `db.iter_query(...)`.
+        chunk_rows (int): Linhas agrupadas em cada bloco enviado.
+        status (int): Código HTTP da resposta.
+
+    Returns:
+        Response: Resposta em streaming com mimetype application/x-ndjson.
+    """
+    rows = _primed(rows)
+
+    def generate():
+        buffer = []
+        for row in rows:
+            buffer.append(_dumps(row))
+            if len(buffer) >= chunk_rows:
+                yield '\n'.join(buffer) + '\n'
+                buffer = []
+        if buffer:
+            yield '\n'.join(buffer) + '\n'
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/x-ndjson')
+
+
+def stream_json_array(rows, chunk_rows=DEFAULT_CHUNK_ROWS, status=200):
+    """
+    Envia as linhas como um array JSON em blocos (chunked), sem montar a lista em memória.
+
+    Args:
+        rows (iterable): Linhas a serem enviadas, ex.: `db.iter_query(...)`.
+        chunk_rows (int): Linhas agrupadas em cada bloco enviado.
+        status (int): Código HTTP da resposta.
+
+    Returns:
+        Response: Resposta em streaming com mimetype application/json.
+    """
+    rows = _primed(rows)
+
+    def generate():
+        yield '['
+        buffer = []
+        separator = ''
+        for row in rows:
+            buffer.append(_dumps(row))
+            if len(buffer) >= chunk_rows:
+                yield separator + ','.join(buffer)
+                separator = ','
+                buffer = []
+        if buffer:
+            yield separator + ','.join(buffer)
+        yield ']'
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
+
+
+def paginated_response(fetch_page, default_limit=DEFAULT_PAGE_SIZE, max_limit=MAX_PAGE_SIZE):
+    """
+    Responde uma listagem paginada por chave a partir dos parâmetros `cursor` e `limit` da URL.
+
+    Args:
+        fetch_page (callable): Recebe (cursor, limit) e retorna um Page, ex.:
+            `lambda cursor, limit: db.select_page(..., page_size=limit, cursor=cursor)`.
+        default_limit (int): Linhas por página quando `limit` não é informado.
+        max_limit (int): Maior `limit` aceito.
+
+    Returns:
+        Response: JSON {"items": [...], "next_cursor": token, "next": URL da próxima página}, com
+                  os dois últimos nulos na última página. `limit` ou `cursor` inválidos geram 400.
+    """
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= max_limit:
+        return jsonify({
+            "status": "error",
+            "message": f"limit deve estar entre 1 e {max_limit}."
+        }), 400
+
+    try:
+        page = fetch_page(request.args.get('cursor') or None, limit)
+    except InvalidCursorError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+
+    next_url = None
+    if page.next_cursor is not None:
+        args = request.args.to_dict()
+        args.update(cursor=page.next_cursor, limit=limit)
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    return jsonify({
+        "items": page.rows,
+        "next_cursor": page.next_cursor,
+        "next": next_url
+    })
@@ -0,0 +1,117 @@
+import re
+from functools import lru_cache
+
+from helpers.BulkLoader import MAX_PARAMETERS, MAX_VALUES_ROWS
+from helpers.StatementCache import validate_column, validate_table
+
+# Tipo SQL da chave para a variável de tabela (ex.: INT, BIGINT, UNIQUEIDENTIFIER, NUMERIC(18, 0))
+_KEY_TYPE_PATTERN = re.compile(r'^[A-Za-z]+(?:\s*\(\s*\d+\s*(?:,\s*\d+\s*)?\))?$')
+
+# Coluna auxiliar com a posição de cada linha na origem do MERGE
+_ORDINAL = '_ordinal'
+
+
+def _validate(table, columns, key, key_type):
+    validate_table(table)
+    for column in columns:
+        validate_column(column)
+    validate_column(key)
+    if key_type is not None and not _KEY_TYPE_PATTERN.match(key_type):
+        raise ValueError(f"Tipo de chave inválido: {key_type!r}")
+
+
+@lru_cache(maxsize=256)
+def insert_output_sql(table, columns, key, key_type=None):
+    """
+    INSERT de uma linha que devolve a chave gerada na mesma instrução.
+
+    Sem `key_type`, usa `OUTPUT INSERTED.<key>` direto. Com `key_type`, grava a saída em uma
+    variável de tabela (`OUTPUT ... INTO`), forma exigida pelo SQL Server quando a tabela tem triggers.
+    """
+    _validate(table, columns, key, key_type)
+    column_list = ', '.join(columns)
+    placeholders = ', '.join('?' for _ in columns)
+    if key_type is None:
+        return f"INSERT INTO {table} ({column_list}) OUTPUT INSERTED.{key} VALUES ({placeholders})"
+    return (
+        f"DECLARE @inserted TABLE ({key} {key_type}); "
+        f"INSERT INTO {table} ({column_list}) OUTPUT INSERTED.{key} INTO @inserted VALUES ({placeholders}); "
+        f"SELECT {key} FROM @inserted"
+    )
+
+
+@lru_cache(maxsize=256)
+def merge_output_sql(table, columns, key, row_count, key_type=None):
+    """
+    Inserção de várias linhas que devolve (posição, chave) de cada linha.
+
+    O SQL Server não garante que o OUTPUT de um INSERT com várias linhas siga a ordem do VALUES;
+    o MERGE permite incluir na saída a posição de cada linha na origem, então as chaves podem
+    ser devolvidas na ordem de entrada.
+    """
+    _validate(table, columns, key, key_type)
+    column_list = ', '.join(columns)
+    placeholders = ', '.join('?' for _ in columns)
+    values = ', '.join(f"({placeholders}, {position})" for position in range(row_count))
+    merge = (
+        f"MERGE INTO {table} USING (VALUES {values}) AS source ({column_list}, {_ORDINAL}) ON 1 = 0 "
+        f"WHEN NOT MATCHED THEN INSERT ({column_list}) "
+        f"VALUES ({', '.join(f'source.{column}' for column in columns)}) "
+        f"OUTPUT source.{_ORDINAL}, INSERTED.{key}"
+    )
+    if key_type is None:
+        return merge + ';'
+    return (
+        f"DECLARE @inserted TABLE ({_ORDINAL} INT, {key} {key_type}); "
+        f"{merge} INTO @inserted; "
+        f"SELECT {_ORDINAL}, {key} FROM @inserted"
+    )
+
+
+def rows_per_statement(column_count):
+    """Linhas por MERGE sem ultrapassar o limite de parâmetros nem o de linhas em VALUES."""
+    return max(1, min(MAX_VALUES_ROWS, (MAX_PARAMETERS - 1) // column_count))
+
+
+def _result_rows(cursor):
+    # Pula contagens de linhas (ex.: de triggers ou do INSERT na variável de tabela) até o resultado
+    while cursor.description is None:
+        if not cursor.nextset():
+            return []
+    return cursor.fetchall()
+
+
+def insert_returning(cursor, table, rows, key, key_type=None):
+    """
+    Insere as linhas e devolve a chave gerada de cada uma, na ordem de entrada. Não faz commit.
+
+    Args:
+        cursor: Cursor aberto na conexão da transação.
+        table (str): Nome da tabela (com schema, ex: 'SCHEMA.tabela').
+        rows (list): Dicionários com os dados; todos devem ter as mesmas chaves.
+        key (str): Coluna gerada pelo servidor (IDENTITY, DEFAULT NEWSEQUENTIALID(), ...).
+        key_type (str): Tipo SQL da chave; obrigatório em tabelas com triggers (ex.: 'INT').
+
+    Returns:
+        list: Uma chave por linha, na mesma ordem de `rows`.
+    """
+    if not rows:
+        return []
+    columns = tuple(rows[0])
+    values = [tuple(row[column] for column in columns) for row in rows]
+
+    if len(values) == 1:
+        cursor.execute(insert_output_sql(table, columns, key, key_type), values[0])
+        return [_result_rows(cursor)[0][0]]
+
+    keys = []
+    step = rows_per_statement(len(columns))
+    for start in range(0, len(values), step):
+        group = values[start:start + step]
+        cursor.execute(merge_output_sql(table, columns, key, len(group), key_type),
+                       [value for row in group for value in row])
+        output = sorted(_result_rows(cursor), key=lambda row: row[0])
+        if len(output) != len(group):
+            raise ValueError(f"Esperadas {len(group)} chaves geradas, recebidas {len(output)}.")
+        keys.extend(row[1] for row in output)
+    return keys
@@ -0,0 +1,513 @@
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+slow_query_logger = logging.getLogger('helpers.DatabaseManager.slow_query')
+
+# Limites (segundos) dos buckets dos histogramas de latência
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Limite de fingerprints distintos; os excedentes são agrupados em "other"
+MAX_FINGERPRINTS = 1000
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement):
+    """
+    Normaliza uma instrução SQL para agrupamento: literais viram '?', listas IN viram '(?)'
+    e os espaços são colapsados. Parâmetros nunca aparecem nas métricas nem no log.
+    """
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _IN_LIST.sub('(?)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement):
+    """Retorna um identificador curto e estável da instrução normalizada."""
+    return hashlib.sha1(normalize_statement(statement).encode('utf-8')).hexdigest()[:12]
+
+
+def result_rows(result):
+    """Linhas retornadas por uma consulta (lista, TabularResult, colunar ou linha única)."""
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    rows = getattr(result, 'rows', None)
+    if isinstance(rows, list):
+        return len(rows)
+    if isinstance(result, dict) and result and all(hasattr(v, '__len__') for v in result.values()):
+        return len(next(iter(result.values())))
+    return 1
+
+
+def affected_rows(result):
+    """Linhas afetadas por uma escrita (rowcount, BulkLoadResult ou {tabela: quantidade})."""
+    if isinstance(result, bool) or result is None:
+        return None
+    if isinstance(result, int):
+        return max(result, 0)
+    rows = getattr(result, 'rows', None)
+    if isinstance(rows, int):
+        return rows
+    if isinstance(result, dict):
+        return sum(value for value in result.values() if isinstance(value, int))
+    return None
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class MultiprocessStore:
+    """
+    Snapshots das métricas de cada processo em um diretório compartilhado (ex.: workers do
+    Gunicorn), para que `/metrics` some os contadores de todos, seja qual for o worker que
+    atender a coleta.
+
+    Cada processo grava `metrics_<pid>.json`; quando um processo termina, o master incorpora
+    os contadores dele em `archive.json` (sem os gauges, que só valem para processos vivos),
+    então os totais não voltam a zero com a reciclagem dos workers. Usa `fcntl` (POSIX).
+    """
+
+    ARCHIVE = 'archive.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    def _locked(self, exclusive):
+        import fcntl
+        handle = open(os.path.join(self.directory, '.lock'), 'a')
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return handle  # Fechar o arquivo libera o lock
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _dump(path, snapshot):
+        # Escrita atômica: quem lê nunca vê um arquivo pela metade
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(snapshot, file)
+        os.replace(temporary, path)
+
+    def write(self, snapshot):
+        """Grava o snapshot do processo atual."""
+        self._dump(self._path(snapshot['pid']), snapshot)
+
+    def read_all(self):
+        """Snapshots do arquivo consolidado e de todos os processos em execução."""
+        with self._locked(exclusive=False):
+            paths = [os.path.join(self.directory, self.ARCHIVE)] + glob.glob(self._path('*'))
+            return [snapshot for snapshot in map(self._load, paths) if snapshot is not None]
+
+    def archive(self, pid):
+        """Incorpora os contadores de um processo encerrado ao arquivo consolidado."""
+        with self._locked(exclusive=True):
+            path = self._path(pid)
+            snapshot = self._load(path)
+            if snapshot is None:
+                return
+            archive_path = os.path.join(self.directory, self.ARCHIVE)
+            merged = merge_snapshots([s for s in (self._load(archive_path), snapshot) if s is not None])
+            merged['gauges'] = []
+            self._dump(archive_path, merged)
+            os.remove(path)
+
+    def clear(self):
+        """Remove os snapshots (ex.: na partida do master)."""
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            os.remove(path)
+
+
+def merge_snapshots(snapshots):
+    """
+    Soma os snapshots de vários processos (ver `QueryMetrics.snapshot`): histogramas, linhas e
+    erros são somados; os gauges de cada processo recebem o rótulo `pid`.
+    """
+    latency, rows, errors, statements = {}, {}, {}, {}
+    connect, connect_errors, gauges = None, 0, []
+    for snapshot in snapshots:
+        for operation, fp, counts, total, count in snapshot['latency']:
+            current = latency.get((operation, fp))
+            if current is None:
+                latency[(operation, fp)] = [list(counts), total, count]
+            else:
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+                current[2] += count
+        for operation, fp, value in snapshot['rows']:
+            rows[(operation, fp)] = rows.get((operation, fp), 0) + value
+        for operation, fp, sqlstate, value in snapshot['errors']:
+            errors[(operation, fp, sqlstate)] = errors.get((operation, fp, sqlstate), 0) + value
+        statements.update(snapshot['statements'])
+        counts, total, count = snapshot['connect']
+        if connect is None:
+            connect = [list(counts), total, count]
+        else:
+            connect = [[a + b for a, b in zip(connect[0], counts)], connect[1] + total, connect[2] + count]
+        connect_errors += snapshot['connect_errors']
+        for name, help_text, labels, value in snapshot.get('gauges', ()):
+            gauges.append((name, help_text, dict(labels, pid=str(snapshot['pid'])), value))
+    return {
+        'pid': None,
+        'latency': [[operation, fp, *histogram] for (operation, fp), histogram in latency.items()],
+        'rows': [[operation, fp, value] for (operation, fp), value in rows.items()],
+        'errors': [[*key, value] for key, value in errors.items()],
+        'statements': statements,
+        'connect': connect or [[0] * len(DEFAULT_BUCKETS), 0.0, 0],
+        'connect_errors': connect_errors,
+        'gauges': gauges,
+    }
+
+
+class QueryMetrics:
+    """
+    Métricas de acesso ao banco, expostas no formato texto do Prometheus.
+
+    Registra latência (histograma), linhas retornadas/afetadas e erros por operação e
+    fingerprint da instrução, além do tempo de conexão. Consultas acima do limite configurado
+    são registradas no log de consultas lentas, com amostragem opcional.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, slow_query_seconds=None, slow_query_sample_rate=1.0):
+        """
+        Args:
+            buckets (tuple): Limites dos buckets de latência, em segundos.
+            slow_query_seconds (float): Limite para o log de consultas lentas (None desativa).
+            slow_query_sample_rate (float): Fração (0 a 1) das consultas lentas efetivamente registradas.
+        """
+        self.buckets = tuple(buckets)
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_query_sample_rate = slow_query_sample_rate
+        self._lock = threading.Lock()
+        self._latency = {}     # (operação, fingerprint) -> _Histogram
+        self._rows = {}        # (operação, fingerprint) -> linhas
+        self._errors = {}      # (operação, fingerprint, sqlstate) -> quantidade
+        self._statements = {}  # fingerprint -> instrução normalizada
+        self._connect = _Histogram(len(self.buckets))
+        self._connect_errors = 0
+        self._collectors = []
+        self._local = threading.local()
+        self._store = None
+        self._flush_stop = None
+        self._flush_thread = None
+
+    def observe(self, operation, statement, seconds, rows=None):
+        """Registra uma execução concluída."""
+        key = (operation, self._fingerprint(statement))
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = _Histogram(len(self.buckets))
+            self._add(histogram, index, seconds)
+            if rows is not None:
+                self._rows[key] = self._rows.get(key, 0) + rows
+
+        if self.slow_query_seconds is not None and seconds >= self.slow_query_seconds:
+            if self.slow_query_sample_rate >= 1 or random.random() < self.slow_query_sample_rate:
+                slow_query_logger.warning(
+                    "Consulta lenta: %s levou %.1f ms (%s linhas): %s",
+                    operation, seconds * 1000, '?' if rows is None else rows, normalize_statement(statement),
+                )
+
+    def observe_error(self, operation, statement, error):
+        """Registra uma execução com erro, identificando o SQLSTATE quando disponível."""
+        sqlstate = error.args[0] if error.args and isinstance(error.args[0], str) and len(error.args[0]) == 5 else ''
+        key = (operation, self._fingerprint(statement), sqlstate)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def observe_connect(self, seconds, error=False):
+        """Registra o tempo de abertura (ou checkout) de uma conexão."""
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._add(self._connect, index, seconds)
+            if error:
+                self._connect_errors += 1
+
+    def register_collector(self, collector):
+        """
+        Registra uma função chamada a cada exposição, que devolve linhas de gauge:
+        [(nome, ajuda, {rótulos}, valor), ...].
+        """
+        self._collectors.append(collector)
+
+    def instrument(self, operation, statement_arg=None, rows=None):
+        """
+        Decorador que mede um método do DatabaseManager.
+
+        Apenas a chamada mais externa de cada thread é registrada, então métodos que delegam
+        a outros (ex.: insert_batch -> bulk_insert, ou o cache chamando a própria consulta)
+        não são contados duas vezes. Geradores são medidos até o fim da iteração.
+
+        Args:
+            operation (str): Nome da operação nas métricas.
+            statement_arg (str): Nome do argumento com o SQL ou a tabela (None usa a operação).
+            rows (callable): Extrai a quantidade de linhas do retorno (opcional).
+        """
+        self_metrics = self
+
+        def decorator(func):
+            parameters = list(inspect.signature(func).parameters)
+            position = parameters.index(statement_arg) - 1 if statement_arg else None
+
+            def statement_of(args, kwargs):
+                if position is None:
+                    return operation
+                if len(args) > position:
+                    return str(args[position])
+                return str(kwargs.get(statement_arg, operation))
+
+            if inspect.isgeneratorfunction(func):
+                @functools.wraps(func)
+                def generator_wrapper(self, *args, **kwargs):
+                    if getattr(self_metrics._local, 'active', False):
+                        yield from func(self, *args, **kwargs)
+                        return
+                    statement = statement_of(args, kwargs)
+                    started = time.perf_counter()
+                    count = 0
+                    try:
+                        for item in func(self, *args, **kwargs):
+                            count += 1
+                            yield item
+                    except Exception as e:
+                        self_metrics.observe_error(operation, statement, e)
+                        raise
+                    finally:
+                        self_metrics.observe(operation, statement, time.perf_counter() - started, count)
+                return generator_wrapper
+
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                local = self_metrics._local
+                if getattr(local, 'active', False):
+                    return func(self, *args, **kwargs)
+                statement = statement_of(args, kwargs)
+                local.active = True
+                started = time.perf_counter()
+                try:
+                    result = func(self, *args, **kwargs)
+                except Exception as e:
+                    self_metrics.observe_error(operation, statement, e)
+                    raise
+                finally:
+                    local.active = False
+                self_metrics.observe(operation, statement, time.perf_counter() - started,
+                                     rows(result) if rows else None)
+                return result
+            return wrapper
+
+        return decorator
+
+    def snapshot(self):
+        """Estado atual das métricas e dos gauges dos coletores, serializável em JSON."""
+        with self._lock:
+            snapshot = {
+                'pid': os.getpid(),
+                'latency': [[operation, fp, list(h.counts), h.total, h.count]
+                            for (operation, fp), h in self._latency.items()],
+                'rows': [[operation, fp, value] for (operation, fp), value in self._rows.items()],
+                'errors': [[*key, value] for key, value in self._errors.items()],
+                'statements': dict(self._statements),
+                'connect': [list(self._connect.counts), self._connect.total, self._connect.count],
+                'connect_errors': self._connect_errors,
+            }
+        snapshot['gauges'] = [list(gauge) for collector in self._collectors for gauge in collector()]
+        return snapshot
+
+    def enable_multiprocess(self, directory, flush_interval=5.0):
+        """
+        Passa a expor as métricas somadas de todos os processos que usam `directory`
+        (ver MultiprocessStore). Chamar em cada worker, logo após o fork.
+
+        Args:
+            directory (str): Diretório compartilhado pelos processos.
+            flush_interval (float): Segundos entre as gravações do snapshot deste processo.
+        """
+        self.disable_multiprocess()
+        self._store = MultiprocessStore(directory)
+        self._flush_stop = threading.Event()
+        self._flush_thread = threading.Thread(
+            target=self._flush_loop, args=(self._store, self._flush_stop, flush_interval),
+            name='metrics-flush', daemon=True,
+        )
+        self._flush_thread.start()
+
+    def disable_multiprocess(self):
+        """Para a gravação periódica, gravando um último snapshot (ex.: na saída do worker)."""
+        store, self._store = self._store, None
+        if store is None:
+            return
+        self._flush_stop.set()
+        if self._flush_thread is not threading.current_thread():
+            self._flush_thread.join(timeout=5)
+        try:
+            store.write(self.snapshot())
+        except Exception as e:
+            print(f"Erro ao gravar as métricas do processo: {e}")
+
+    def _flush_loop(self, store, stop, interval):
+        while not stop.wait(interval):
+            try:
+                store.write(self.snapshot())
+            except Exception as e:
+                print(f"Erro ao gravar as métricas do processo: {e}")
+
+    def render(self):
+        """
+        Retorna as métricas no formato texto de exposição do Prometheus: as deste processo ou,
+        com `enable_multiprocess`, a soma de todos os processos do diretório compartilhado.
+        """
+        snapshot = self.snapshot()
+        store = self._store
+        if store is not None:
+            # O snapshot deste processo é gravado na hora; os demais têm até `flush_interval` de atraso
+            store.write(snapshot)
+            snapshot = merge_snapshots(store.read_all())
+        return self._render(snapshot)
+
+    def _render(self, snapshot):
+        latency = {(operation, fp): (counts, total, count)
+                   for operation, fp, counts, total, count in snapshot['latency']}
+        rows = {(operation, fp): value for operation, fp, value in snapshot['rows']}
+        errors = {(operation, fp, sqlstate): value for operation, fp, sqlstate, value in snapshot['errors']}
+        statements = snapshot['statements']
+        connect = snapshot['connect']
+        connect_errors = snapshot['connect_errors']
+
+        lines = [
+            '# HELP db_query_duration_seconds Latência das operações do DatabaseManager.',
+            '# TYPE db_query_duration_seconds histogram',
+        ]
+        for (operation, fp), histogram in sorted(latency.items()):
+            lines.extend(self._render_histogram(
+                'db_query_duration_seconds', f'operation="{operation}",fingerprint="{fp}"', *histogram
+            ))
+
+        lines += ['# HELP db_rows_total Linhas retornadas ou afetadas.', '# TYPE db_rows_total counter']
+        for (operation, fp), value in sorted(rows.items()):
+            lines.append(f'db_rows_total{{operation="{operation}",fingerprint="{fp}"}} {value}')
+
+        lines += ['# HELP db_errors_total Erros por operação e SQLSTATE.', '# TYPE db_errors_total counter']
+        for (operation, fp, sqlstate), value in sorted(errors.items()):
+            lines.append(
+                f'db_errors_total{{operation="{operation}",fingerprint="{fp}",sqlstate="{sqlstate}"}} {value}'
+            )
+
+        lines += [
+            '# HELP db_connect_duration_seconds Tempo para abrir ou obter uma conexão do pool.',
+            '# TYPE db_connect_duration_seconds histogram',
+        ]
+        lines.extend(self._render_histogram('db_connect_duration_seconds', '', *connect))
+        lines += [
+            '# HELP db_connect_errors_total Falhas ao conectar.',
+            '# TYPE db_connect_errors_total counter',
+            f'db_connect_errors_total {connect_errors}',
+        ]
+
+        lines += ['# HELP db_statement_info Instrução normalizada de cada fingerprint.', '# TYPE db_statement_info gauge']
+        for fp, statement in sorted(statements.items()):
+            lines.append(f'db_statement_info{{fingerprint="{fp}",statement="{_escape(statement)}"}} 1')
+
+        # Amostras de um mesmo gauge ficam juntas (vários processos podem informar o mesmo nome)
+        families = {}
+        for name, help_text, labels, value in snapshot['gauges']:
+            families.setdefault(name, (help_text, []))[1].append((labels, value))
+        for name, (help_text, samples) in families.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Zera todas as métricas (ex.: em um worker recém-criado)."""
+        with self._lock:
+            self._latency.clear()
+            self._rows.clear()
+            self._errors.clear()
+            self._statements.clear()
+            self._connect = _Histogram(len(self.buckets))
+            self._connect_errors = 0
+
+    def _fingerprint(self, statement):
+        fp = fingerprint(statement)
+        if fp not in self._statements:
+            with self._lock:
+                if fp not in self._statements:
+                    if len(self._statements) >= MAX_FINGERPRINTS:
+                        return 'other'
+                    self._statements[fp] = normalize_statement(statement)[:500]
+        return fp
+
+    @staticmethod
+    def _add(histogram, index, seconds):
+        if index < len(histogram.counts):
+            histogram.counts[index] += 1
+        histogram.total += seconds
+        histogram.count += 1
+
+    def _render_histogram(self, name, labels, counts, total, count):
+        prefix = f'{labels},' if labels else ''
+        cumulative = 0
+        lines = []
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {total}')
+        lines.append(f'{name}_count{suffix} {count}')
+        return lines
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _slow_query_threshold():
+    value = os.getenv('DB_SLOW_QUERY_MS', '1000')
+    return float(value) / 1000 if value and float(value) >= 0 else None
+
+
+# Métricas do processo, usadas pelo DatabaseManager e expostas em /metrics
+METRICS = QueryMetrics(
+    slow_query_seconds=_slow_query_threshold(),
+    slow_query_sample_rate=float(os.getenv('DB_SLOW_QUERY_SAMPLE_RATE', '1.0')),
+)
@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import json
+import re
+from collections import namedtuple
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from helpers.StatementCache import validate_column
+
+# Página de resultados de select_page: `next_cursor` é None na última página
+Page = namedtuple('Page', ['rows', 'next_cursor'])
+
+
+# DISTINCT/TOP no início da lista de colunas (ver StatementCache)
+_SELECT_PREFIX = re.compile(r'^SELECT\s+(DISTINCT\s+)?(TOP\b)?', re.IGNORECASE)
+
+
+class InvalidCursorError(ValueError):
+    """O token de continuação está corrompido ou pertence a outra consulta."""
+
+
+def parse_order_by(order_by):
+    """
+    Normaliza a chave de ordenação.
+
+    Args:
+        order_by (list): Colunas da chave, cada uma opcionalmente seguida de ASC/DESC
+                         (ex.: ['data_envio DESC', 'disparo_id']).
+
+    Returns:
+        tuple: ((coluna, descendente), ...).
+    """
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    keys = []
+    for item in order_by:
+        parts = item.split()
+        direction = parts[1].upper() if len(parts) == 2 else 'ASC'
+        if len(parts) not in (1, 2) or direction not in ('ASC', 'DESC'):
+            raise ValueError(f"Ordenação inválida: {item!r}")
+        validate_column(parts[0])
+        keys.append((parts[0], direction == 'DESC'))
+    if not keys:
+        raise ValueError("A paginação exige ao menos uma coluna de ordenação.")
+    return tuple(keys)
+
+
+def page_select_sql(base):
+    """
+    Insere o `TOP (?)` da página em um SELECT montado pelo StatementCache, depois do DISTINCT
+    quando houver (`SELECT DISTINCT TOP (?) ...`).
+
+    Raises:
+        ValueError: Se as colunas já trazem um TOP próprio.
+    """
+    prefix = _SELECT_PREFIX.match(base)
+    if prefix.group(2):
+        raise ValueError("select_page define o TOP da consulta; não use TOP nas colunas.")
+    return ("SELECT DISTINCT TOP (?) " if prefix.group(1) else "SELECT TOP (?) ") + base[prefix.end():]
+
+
+def order_by_sql(keys):
+    return ', '.join(f"{column} DESC" if descending else column for column, descending in keys)
+
+
+def seek_predicate(keys):
+    """
+    Monta o predicado que retoma a leitura depois da última linha da página anterior.
+
+    Para a chave (a DESC, b) gera `(a < ?) OR (a = ? AND b > ?)`, que o SQL Server resolve
+    com um seek no índice da chave. Os parâmetros são dados por `seek_params`.
+    """
+    clauses = []
+    for position, (column, descending) in enumerate(keys):
+        equal = [f"{previous} = ?" for previous, _ in keys[:position]]
+        clauses.append('(' + ' AND '.join(equal + [f"{column} {'<' if descending else '>'} ?"]) + ')')
+    return ' OR '.join(clauses)
+
+
+def seek_params(values):
+    """Parâmetros de `seek_predicate` para a última chave lida."""
+    params = []
+    for position in range(len(values)):
+        params.extend(values[:position + 1])
+    return params
+
+
+def key_name(column):
+    """Nome da coluna como aparece em cursor.description (sem colchetes, minúsculo)."""
+    return column.strip('[]').lower()
+
+
+def signature(table, keys):
+    """Identifica a consulta a que um token pertence, para recusar tokens de outra listagem."""
+    text = f"{table.lower()}|{order_by_sql(keys).lower()}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:8]
+
+
+def _tag(value):
+    # Preserva o tipo dos valores da chave que o JSON não representa
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, time):
+        return {'t': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    if isinstance(value, UUID):
+        return {'u': str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {'b': base64.b64encode(value).decode('ascii')}
+    if value is None:
+        raise ValueError("Colunas da chave de paginação não podem ser NULL.")
+    return value
+
+
+def _untag(value):
+    if not isinstance(value, dict):
+        return value
+    (kind, text), = value.items()
+    if kind == 'dt':
+        return datetime.fromisoformat(text)
+    if kind == 'd':
+        return date.fromisoformat(text)
+    if kind == 't':
+        return time.fromisoformat(text)
+    if kind == 'n':
+        return Decimal(text)
+    if kind == 'u':
+        return UUID(text)
+    if kind == 'b':
+        return base64.b64decode(text)
+    raise ValueError(kind)
+
+
+def encode_cursor(values, query_signature):
+    """
+    Gera o token de continuação (base64 url-safe) com os valores da chave da última linha.
+
+    Returns:
+        str: Token opaco para repassar a `decode_cursor`.
+    """
+    payload = json.dumps([query_signature, [_tag(value) for value in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, query_signature, key_count):
+    """
+    Lê um token gerado por `encode_cursor`.
+
+    Returns:
+        list: Valores da chave da última linha da página anterior.
+
+    Raises:
+        InvalidCursorError: Se o token for inválido ou de outra consulta.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        token_signature, values = json.loads(payload)
+        values = [_untag(value) for value in values]
+    except (TypeError, ValueError) as e:
+        raise InvalidCursorError("Cursor de paginação inválido.") from e
+    if token_signature != query_signature or len(values) != key_count:
+        raise InvalidCursorError("Cursor de paginação não pertence a esta consulta.")
+    return values
@@ -0,0 +1,113 @@
+import re
+from collections import namedtuple
+
+from helpers.BulkLoader import MAX_PARAMETERS
+from helpers.QueryCache import tables_in
+
+# Resultado de cada instrução de execute_batch:
+#   rows: linhas do primeiro result set (None se a instrução não devolve linhas)
+#   rowcount: linhas afetadas (INSERT/UPDATE/DELETE/MERGE) ou devolvidas (SELECT); -1 se desconhecido
+#   result_sets: todos os result sets da instrução (ex.: procedure com vários SELECT)
+BatchResult = namedtuple('BatchResult', ['rows', 'rowcount', 'result_sets'])
+
+# Coluna da consulta marcadora enviada depois de cada instrução. Com ela cada result set é
+# atribuído à instrução certa, mesmo com contagens extras (ex.: de triggers) ou instruções sem resultado
+MARKER_COLUMN = '__batch_statement'
+
+_READ_PATTERN = re.compile(r'^\s*SELECT\b(?!.*\bINTO\b)', re.IGNORECASE | re.DOTALL)
+
+
+def normalize_batch(statements):
+    """
+    Normaliza as instruções de um lote.
+
+    Args:
+        statements (dict | list): {nome: instrução} ou {nome: (instrução, parâmetros)}, ou uma
+                                  lista nesses mesmos formatos.
+
+    Returns:
+        tuple: (nomes ou None para lista, [(instrução, parâmetros), ...]).
+    """
+    if isinstance(statements, dict):
+        names, specs = list(statements), list(statements.values())
+    else:
+        names, specs = None, list(statements)
+
+    normalized = []
+    for spec in specs:
+        sql, params = (spec, None) if isinstance(spec, str) else spec
+        sql = sql.strip().rstrip(';').rstrip()
+        if not sql:
+            raise ValueError("O lote contém uma instrução vazia.")
+        normalized.append((sql, tuple(params or ())))
+    return names, normalized
+
+
+def batch_sql(statements):
+    """
+    Monta o texto do lote: cada instrução seguida da consulta marcadora com a sua posição.
+
+    Returns:
+        tuple: (texto SQL, parâmetros de todas as instruções em ordem).
+    """
+    parts, params = [], []
+    for position, (sql, statement_params) in enumerate(statements):
+        parts.append(sql)
+        parts.append(f"SELECT {position} AS {MARKER_COLUMN}")
+        params.extend(statement_params)
+    if len(params) > MAX_PARAMETERS:
+        raise ValueError(f"O lote tem {len(params)} parâmetros; o limite do SQL Server é {MAX_PARAMETERS}.")
+    return ';\n'.join(parts), params
+
+
+def is_read_only(statements):
+    """True se todas as instruções forem SELECT sem INTO (o lote pode ir para a réplica)."""
+    return all(_READ_PATTERN.match(sql) for sql, _ in statements)
+
+
+def written_tables(statements):
+    """Tabelas referenciadas pelas instruções que não são leituras, para invalidar o cache."""
+    tables = set()
+    for sql, params in statements:
+        if not is_read_only([(sql, params)]):
+            tables |= tables_in(sql)
+    return tables
+
+
+def read_results(cursor, statements, convert):
+    """
+    Percorre os result sets do lote com nextset() e agrupa-os por instrução.
+
+    Args:
+        cursor: Cursor que acabou de executar `batch_sql(statements)`.
+        statements (list): Instruções normalizadas do lote.
+        convert (callable): Recebe (instrução, posição do result set, description, linhas) e
+                            devolve as linhas no formato desejado.
+
+    Returns:
+        list: Um BatchResult por instrução, na ordem do lote.
+    """
+    results = []
+    sets, counts = [], []
+    while True:
+        description = cursor.description
+        if description is None:
+            if cursor.rowcount >= 0:
+                counts.append(cursor.rowcount)
+        elif description[0][0] == MARKER_COLUMN:
+            cursor.fetchall()
+            sql = statements[len(results)][0]
+            formatted = [convert(sql, position, set_description, rows)
+                         for position, (set_description, rows) in enumerate(sets)]
+            # A última contagem é a da própria instrução (as de triggers chegam antes)
+            rowcount = counts[-1] if counts else (len(sets[0][1]) if sets else -1)
+            results.append(BatchResult(formatted[0] if formatted else None, rowcount, formatted))
+            sets, counts = [], []
+        else:
+            sets.append((description, cursor.fetchall()))
+        if not cursor.nextset():
+            break
+
+    if len(results) != len(statements):
+        raise ValueError(f"O lote devolveu resultados de {len(results)} de {len(statements)} instruções.")
+    return results
@@ -0,0 +1,201 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Tabelas lidas (FROM/JOIN) ou escritas (INSERT/MERGE INTO, UPDATE, DELETE FROM, TRUNCATE TABLE) por uma instrução
+_TABLE_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+((?:\[[^\]]+\]|\w+)(?:\s*\.\s*(?:\[[^\]]+\]|\w+)){0,3})',
+    re.IGNORECASE,
+)
+_WHITESPACE = re.compile(r'\s+')
+
+# Linhas amostradas para estimar o tamanho de um resultado
+_SIZE_SAMPLE = 10
+
+
+def normalize_sql(query):
+    """Normaliza o texto SQL para compor a chave do cache (espaços colapsados)."""
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def table_key(table):
+    """
+    Normaliza o nome de uma tabela para invalidação: último segmento, sem colchetes, minúsculo.
+
+    'DBA_CONTROLE.RE.[Disparos]' e 'RE.disparos' resultam na mesma chave; invalidar a mais
+    é sempre seguro.
+    """
+    return table.split('.')[-1].strip().strip('[]').lower()
+
+
+def tables_in(query):
+    """Retorna o conjunto de chaves de tabela referenciadas por uma instrução SQL."""
+    return {table_key(match) for match in _TABLE_PATTERN.findall(query)}
+
+
+def _estimate_size(value):
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return sys.getsizeof(value)
+        sample = value[:_SIZE_SAMPLE]
+        per_item = sum(_estimate_size(item) for item in sample) / len(sample)
+        return sys.getsizeof(value) + int(per_item * len(value))
+    return sys.getsizeof(value)
+
+
+class _CacheEntry:
+    __slots__ = ('value', 'expires_at', 'size', 'tables')
+
+    def __init__(self, value, expires_at, size, tables):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tables = tables
+
+
+class QueryCache:
+    """
+    Cache em memória (por processo) de resultados de consultas, com TTL por consulta,
+    descarte LRU limitado por memória e invalidação por tabela.
+
+    Os resultados são devolvidos por referência: quem consome não deve alterá-los.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, default_ttl=60):
+        """
+        Args:
+            max_bytes (int): Tamanho estimado máximo do cache, em bytes.
+            default_ttl (float): TTL em segundos quando a consulta não informa um.
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._by_table = {}  # chave de tabela -> conjunto de chaves do cache
+        self._bytes = 0
+        self._generation = 0  # Incrementado a cada invalidação
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(kind, query, params=None, *extra):
+        """
+        Monta a chave do cache, ou None se os parâmetros não forem hasheáveis.
+
+        Args:
+            kind (str): Método de origem (ex.: 'query', 'scalar'), separa resultados de formatos diferentes.
+            query (str): Texto SQL.
+            params (tuple): Parâmetros da consulta.
+        """
+        key = (kind, normalize_sql(query), tuple(params) if params else (), *extra)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get_or_load(self, key, loader, ttl=None, tables=None):
+        """
+        Retorna o valor em cache ou executa `loader()` e armazena o resultado.
+
+        Args:
+            key: Chave montada com `make_key` (None desativa o cache para a chamada).
+            loader (callable): Função que executa a consulta.
+            ttl (float): TTL em segundos (padrão: default_ttl).
+            tables (iterable): Tabelas lidas pela consulta; se omitido, são extraídas do SQL da chave.
+
+        Returns:
+            Resultado da consulta.
+        """
+        if key is None:
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                self._remove(key)
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        if tables is None:
+            tables = tables_in(key[1])
+        self.put(key, value, ttl, {table_key(table) for table in tables}, generation)
+        return value
+
+    def put(self, key, value, ttl=None, tables=(), generation=None):
+        """
+        Armazena um valor, descartando as entradas menos usadas se o limite de memória for excedido.
+
+        Se `generation` for informado e houver alguma invalidação desde então, o valor não é
+        armazenado: a consulta pode ter lido dados anteriores a uma escrita concorrente.
+        """
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(value, expires_at, size, frozenset(tables))
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_tables(self, tables):
+        """Remove as entradas que leem qualquer uma das tabelas informadas."""
+        with self._lock:
+            self._generation += 1
+            for table in tables:
+                for key in self._by_table.pop(table_key(table), ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        """Remove todas as entradas (ex.: após uma procedure que pode alterar qualquer tabela)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Retorna contadores de uso do cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
@@ -0,0 +1,156 @@
+import random
+import threading
+import time
+
+# Estados do circuito
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# SQLSTATEs transitórios: vítima de deadlock e conexão derrubada no meio da operação
+DEADLOCK_SQLSTATE = '40001'
+CONNECTION_RESET_SQLSTATE = '08S01'
+TRANSIENT_SQLSTATES = (DEADLOCK_SQLSTATE, CONNECTION_RESET_SQLSTATE)
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: o servidor falhou repetidamente e a chamada foi recusada sem tentar."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuito '{name}' aberto após falhas consecutivas; nova tentativa em {retry_after:.1f}s.")
+        self.retry_after = retry_after
+
+
+def sqlstate_of(error):
+    """SQLSTATE de um erro do pyodbc (primeiro argumento), ou None."""
+    if error.args and isinstance(error.args[0], str):
+        return error.args[0]
+    return None
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """
+    Espera antes da tentativa seguinte: backoff exponencial com jitter completo, para que
+    as threads que falharam juntas não voltem todas ao mesmo tempo.
+
+    Args:
+        attempt (int): Tentativas que já falharam menos um (0 na primeira repetição).
+        base_delay (float): Espera máxima, em segundos, da primeira repetição.
+        max_delay (float): Teto da espera, em segundos.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Disjuntor thread-safe para as conexões com um servidor.
+
+    Fechado, deixa todas as chamadas passarem e conta as falhas consecutivas. Com
+    `failure_threshold` falhas seguidas ele abre e recusa as chamadas na hora, com
+    CircuitOpenError, em vez de cada uma esperar o timeout de login. Depois de `reset_timeout`
+    segundos fica meio-aberto: até `half_open_max_calls` chamadas testam o servidor; um
+    sucesso fecha o circuito e uma falha o abre de novo.
+
+    Uso:
+        with breaker:
+            conn = pyodbc.connect(...)
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1, is_failure=None):
+        """
+        Args:
+            name (str): Nome do circuito nas mensagens e métricas (ex.: 'primary').
+            failure_threshold (int): Falhas consecutivas que abrem o circuito.
+            reset_timeout (float): Segundos aberto antes de testar o servidor de novo.
+            half_open_max_calls (int): Chamadas de teste simultâneas no estado meio-aberto.
+            is_failure (callable): Diz se uma exceção conta como falha do servidor
+                                   (padrão: todas). As demais não alteram o circuito.
+        """
+        if failure_threshold < 1 or half_open_max_calls < 1:
+            raise ValueError("Limites do circuito inválidos: exige failure_threshold >= 1 e half_open_max_calls >= 1.")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.is_failure = is_failure or (lambda error: True)
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0      # Falhas consecutivas
+        self._opened_at = 0.0
+        self._trials = 0        # Chamadas de teste em andamento (meio-aberto)
+        self._stats = {'opened': 0, 'rejected': 0, 'failures': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._refresh(time.monotonic())
+
+    def _refresh(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    def before_call(self):
+        """
+        Autoriza uma chamada ou a recusa.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto, ou meio-aberto com o teste em andamento.
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._refresh(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._trials < self.half_open_max_calls:
+                self._trials += 1
+                return
+            self._stats['rejected'] += 1
+            retry_after = max(0.0, self._opened_at + self.reset_timeout - now)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._state = CLOSED
+            self._trials = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._stats['failures'] += 1
+            state = self._refresh(time.monotonic())
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._stats['opened'] += 1
+
+    def release(self):
+        """Encerra uma chamada que falhou por motivo alheio ao servidor (ex.: pool esgotado)."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def reset(self):
+        """Fecha o circuito e zera as falhas consecutivas."""
+        self.record_success()
+
+    def stats(self):
+        """Estado atual, falhas consecutivas e contadores de aberturas, recusas e falhas."""
+        with self._lock:
+            return dict(self._stats, state=self._refresh(time.monotonic()), consecutive_failures=self._failures)
+
+    def __enter__(self):
+        self.before_call()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc is None:
+            self.record_success()
+        elif self.is_failure(exc):
+            self.record_failure()
+        else:
+            self.release()
+        return False
@@ -0,0 +1,126 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# NumPy é opcional (sem ele o formato colunar usa listas) e pesado: importado no primeiro
+# resultado colunar, não na importação do módulo. None = ainda não importado; False = indisponível
+_numpy = None
+
+# Formatos de resultado aceitos pelos métodos de consulta do DatabaseManager
+DICT = 'dict'          # [{coluna: valor}, ...] (padrão)
+ROW = 'row'            # [Row(coluna=valor, ...), ...] com uma classe namedtuple compartilhada
+TUPLE = 'tuple'        # TabularResult(columns=[...], rows=[(valor, ...), ...])
+COLUMNAR = 'columnar'  # {coluna: [valores] ou numpy.ndarray}
+
+RESULT_FORMATS = (DICT, ROW, TUPLE, COLUMNAR)
+
+# Tipos Python (cursor.description[i][1]) que viram arrays NumPy no formato colunar
+_NUMERIC_TYPES = (int, float, bool)
+
+TabularResult = namedtuple('TabularResult', ['columns', 'rows'])
+
+
+def validate_format(result_format, allowed=RESULT_FORMATS):
+    """Lança ValueError se o formato de resultado não for suportado."""
+    if result_format not in allowed:
+        raise ValueError(
+            f"Formato de resultado inválido: {result_format!r}. Use um de {', '.join(allowed)}."
+        )
+
+
+@lru_cache(maxsize=256)
+def row_class(columns):
+    """
+    Retorna a classe namedtuple para um conjunto de colunas, reaproveitada entre consultas.
+
+    Args:
+        columns (tuple): Nomes das colunas. Nomes inválidos como identificador (ex.: vazios
+                         ou duplicados) são renomeados para _0, _1, ...
+
+    Returns:
+        type: Classe namedtuple `Row`.
+    """
+    return namedtuple('Row', columns, rename=True)
+
+
+def format_rows(description, rows, result_format=DICT, metadata=None):
+    """
+    Converte as linhas retornadas pelo cursor para o formato solicitado.
+
+    Args:
+        description (sequence): `cursor.description` da consulta (ou vazio se não houver resultado).
+        rows (list): Linhas retornadas por `fetchall`/`fetchmany`.
+        result_format (str): Um dos formatos em RESULT_FORMATS.
+        metadata (ColumnMetadata): Nomes de colunas e classe de linha já calculados (opcional).
+
+    Returns:
+        list | TabularResult | dict: Linhas no formato solicitado.
+    """
+    columns = metadata.columns if metadata else tuple(column[0] for column in description or ())
+
+    if result_format == DICT:
+        return [dict(zip(columns, row)) for row in rows]
+    if result_format == ROW:
+        make = (metadata.row_class if metadata else row_class(columns))._make
+        return [make(row) for row in rows]
+    if result_format == TUPLE:
+        return TabularResult(list(columns), [tuple(row) for row in rows])
+    if result_format == COLUMNAR:
+        return _columnar(description or (), columns, rows)
+    validate_format(result_format)
+
+
+def format_row(description, row, result_format=DICT, metadata=None):
+    """
+    Converte uma única linha para o formato solicitado (DICT, ROW ou TUPLE).
+
+    Returns:
+        dict | Row | tuple: Linha no formato solicitado, ou None se `row` for None.
+    """
+    if row is None:
+        return None
+    return row_factory(description, result_format, metadata)(row)
+
+
+def row_factory(description, result_format=DICT, metadata=None):
+    """
+    Retorna uma função que converte cada linha, para uso em leituras incrementais.
+
+    Args:
+        description (sequence): `cursor.description` da consulta.
+        result_format (str): DICT, ROW ou TUPLE.
+        metadata (ColumnMetadata): Nomes de colunas e classe de linha já calculados (opcional).
+
+    Returns:
+        callable: Função que recebe uma linha do cursor e devolve a linha convertida.
+    """
+    validate_format(result_format, (DICT, ROW, TUPLE))
+    columns = metadata.columns if metadata else tuple(column[0] for column in description)
+    if result_format == DICT:
+        return lambda row: dict(zip(columns, row))
+    if result_format == ROW:
+        return (metadata.row_class if metadata else row_class(columns))._make
+    return tuple
+
+
+def _load_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _columnar(description, columns, rows):
+    numpy = _load_numpy()
+    values_by_column = list(zip(*rows)) if rows else [() for _ in columns]
+    result = {}
+    for column_info, column, values in zip(description, columns, values_by_column):
+        type_code = column_info[1] if len(column_info) > 1 else None
+        if numpy is not None and type_code in _NUMERIC_TYPES and None not in values:
+            result[column] = numpy.array(values, dtype=type_code)
+        else:
+            result[column] = list(values)
+    return result
@@ -0,0 +1,143 @@
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from helpers.ResultFormats import row_class
+
+# Identificador simples ou entre colchetes; nomes de tabela aceitam até 4 partes (servidor.banco.schema.tabela)
+_IDENTIFIER = r'(?:\[[^\]]+\]|[^\W\d][\w@$#]*)'
+_QUALIFIED = rf'{_IDENTIFIER}(?:\.{_IDENTIFIER}){{0,3}}'
+_COLUMN_PATTERN = re.compile(rf'^{_IDENTIFIER}$')
+# Colunas de SELECT: '*', coluna qualificada (ex.: t.coluna, t.*), literal ou chamada de função com
+# argumentos simples (ex.: COUNT(*), MAX(t.data), COALESCE(nome, '')), com alias opcional
+_ARGUMENT = rf"(?:{_QUALIFIED}|-?\d+(?:\.\d+)?|'[^']*')"
+_SELECT_COLUMN = (
+    rf'(?:\*|{_QUALIFIED}(?:\.\*)?|{_ARGUMENT}'
+    rf'|{_IDENTIFIER}\s*\(\s*(?:\*|(?:DISTINCT\s+)?{_ARGUMENT}(?:\s*,\s*{_ARGUMENT})*)?\s*\))'
+    rf'(?:\s+(?:AS\s+)?{_IDENTIFIER})?'
+)
+_SELECT_COLUMN_PATTERN = re.compile(rf'^{_SELECT_COLUMN}$', re.IGNORECASE)
+# A primeira coluna pode vir precedida de DISTINCT e/ou TOP (ex.: 'DISTINCT nome', 'TOP 1 id')
+_FIRST_SELECT_COLUMN_PATTERN = re.compile(
+    rf'^(?:DISTINCT\s+)?(?:TOP\s*(?:\(\s*\d+\s*\)|\d+)(?:\s+PERCENT)?(?:\s+WITH\s+TIES)?\s+)?{_SELECT_COLUMN}$',
+    re.IGNORECASE,
+)
+# Tabelas temporárias locais (#tabela) e globais (##tabela) não têm schema
+_TABLE_PATTERN = re.compile(rf'^(?:#{{1,2}}{_IDENTIFIER}|{_QUALIFIED})$')
+
+INSERT = 'insert'
+UPDATE = 'update'
+SELECT = 'select'
+EXEC = 'exec'
+# SELECT com a tabela e as colunas enviadas como estão, sem validação; para trechos fixos no código
+# que a validação não aceita, ex.: 'CAST(valor AS INT) AS valor' ou a tabela 'RE.a a JOIN RE.b b ON ...'.
+# Nunca com entrada do usuário
+RAW_SELECT = 'raw_select'
+
+ColumnMetadata = namedtuple('ColumnMetadata', ['description', 'columns', 'row_class'])
+
+
+def validate_table(name):
+    """Lança ValueError se `name` não for um nome de tabela/procedure válido."""
+    if not isinstance(name, str) or not _TABLE_PATTERN.match(name):
+        raise ValueError(f"Nome de tabela inválido: {name!r}")
+
+
+def validate_column(name):
+    """Lança ValueError se `name` não for um nome de coluna válido."""
+    if not isinstance(name, str) or not _COLUMN_PATTERN.match(name):
+        raise ValueError(f"Nome de coluna inválido: {name!r}")
+
+
+class StatementCache:
+    """
+    Cache limitado de instruções SQL montadas dinamicamente e dos metadados de colunas.
+
+    O texto de cada instrução é montado (e seus identificadores validados) uma única vez por
+    (operação, tabela, colunas). Reenviar exatamente o mesmo texto também permite ao SQL Server
+    reaproveitar o plano já compilado. Os nomes de colunas dos resultados ficam guardados por
+    texto de consulta e só são recalculados se o `cursor.description` mudar.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._sql = lru_cache(maxsize=maxsize)(self._build)
+        self._metadata = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sql(self, operation, table, columns=(), rows=1):
+        """
+        Retorna o texto SQL da operação.
+
+        Args:
+            operation (str): INSERT, UPDATE, SELECT, RAW_SELECT ou EXEC.
+            table (str): Tabela (ou procedure, para EXEC).
+            columns (tuple): Colunas da operação (para EXEC, o número de parâmetros).
+            rows (int): Para INSERT, linhas no construtor VALUES (carga em massa).
+
+        Returns:
+            str: Para INSERT e EXEC, a instrução completa. Para UPDATE e SELECT, a instrução
+                 até o WHERE, à qual o chamador concatena a condição.
+        """
+        return self._sql(operation, table, columns, rows)
+
+    def metadata(self, query, description):
+        """
+        Retorna os nomes de colunas (e a classe de linha) do resultado de uma consulta.
+
+        Args:
+            query (str): Texto SQL executado.
+            description (sequence): `cursor.description` da execução atual.
+
+        Returns:
+            ColumnMetadata: Metadados em cache ou recém-calculados.
+        """
+        with self._lock:
+            cached = self._metadata.get(query)
+            if cached is not None and cached.description == description:
+                self._metadata.move_to_end(query)
+                return cached
+
+        columns = tuple(column[0] for column in description)
+        cached = ColumnMetadata(tuple(description), columns, row_class(columns))
+        with self._lock:
+            self._metadata[query] = cached
+            self._metadata.move_to_end(query)
+            while len(self._metadata) > self.maxsize:
+                self._metadata.popitem(last=False)
+        return cached
+
+    def clear(self):
+        """Descarta todas as instruções e metadados em cache."""
+        self._sql.cache_clear()
+        with self._lock:
+            self._metadata.clear()
+
+    @staticmethod
+    def _build(operation, table, columns, rows):
+        if operation != RAW_SELECT:
+            validate_table(table)
+        if operation == EXEC:
+            if not columns:
+                return f"EXEC {table}"
+            return f"EXEC {table} {', '.join(['?'] * columns)}"
+
+        if operation in (SELECT, RAW_SELECT):
+            for position, column in enumerate(columns):
+                if not isinstance(column, str):
+                    raise ValueError(f"Coluna inválida para SELECT: {column!r}")
+                pattern = _FIRST_SELECT_COLUMN_PATTERN if position == 0 else _SELECT_COLUMN_PATTERN
+                if operation == SELECT and not pattern.match(column.strip()):
+                    raise ValueError(f"Coluna inválida para SELECT: {column!r} "
+                                     f"(para expressões fixas no código, use validate_identifiers=False)")
+            return f"SELECT {', '.join(columns)} FROM {table} WHERE "
+
+        for column in columns:
+            validate_column(column)
+        if operation == INSERT:
+            row_placeholder = f"({', '.join('?' for _ in columns)})"
+            return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_placeholder] * rows)}"
+        if operation == UPDATE:
+            return f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE "
+        raise ValueError(f"Operação desconhecida: {operation!r}")
@@ -0,0 +1,96 @@
+import re
+
+# Níveis aceitos por SET TRANSACTION ISOLATION LEVEL no SQL Server
+ISOLATION_LEVELS = ('READ UNCOMMITTED', 'READ COMMITTED', 'REPEATABLE READ', 'SNAPSHOT', 'SERIALIZABLE')
+
+# Nível padrão do SQL Server, restaurado ao fim da transação (a conexão volta ao pool)
+DEFAULT_ISOLATION_LEVEL = 'READ COMMITTED'
+
+_SAVEPOINT_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,31}$')
+
+
+class TransactionRollbackError(Exception):
+    """A transação foi desfeita porque uma operação falhou dentro do bloco, mesmo com o erro tratado."""
+
+
+class Transaction:
+    """
+    Transação explícita em uma conexão pyodbc.
+
+    Durante a transação a conexão fica em autocommit e os limites são enviados como T-SQL
+    (BEGIN/SAVE/COMMIT/ROLLBACK TRANSACTION), o que mantém @@TRANCOUNT previsível e permite
+    savepoints. Ao terminar, o autocommit e o nível de isolamento originais são restaurados.
+    """
+
+    def __init__(self, conn, isolation_level=None):
+        """
+        Args:
+            conn: Conexão pyodbc da transação.
+            isolation_level (str): Nível de isolamento (ver ISOLATION_LEVELS) ou None para o atual.
+        """
+        if isolation_level is not None:
+            isolation_level = ' '.join(isolation_level.upper().split())
+            if isolation_level not in ISOLATION_LEVELS:
+                raise ValueError(f"Nível de isolamento inválido: {isolation_level!r}")
+        self.conn = conn
+        self.isolation_level = isolation_level
+        self.rollback_only = False  # Marcado quando uma operação falha dentro da transação
+        self.tables = set()         # Tabelas alteradas, invalidadas no cache após o commit
+        self.invalidate_all = False
+        self._savepoints = 0
+        self._previous_autocommit = None
+
+    def begin(self):
+        self._previous_autocommit = self.conn.autocommit
+        self.conn.autocommit = True
+        try:
+            if self.isolation_level:
+                self._execute(f"SET TRANSACTION ISOLATION LEVEL {self.isolation_level}")
+            self._execute("BEGIN TRANSACTION")
+        except Exception:
+            self._end()
+            raise
+
+    def commit(self):
+        try:
+            self._execute("COMMIT TRANSACTION")
+        finally:
+            self._end()
+
+    def rollback(self):
+        try:
+            self._execute("ROLLBACK TRANSACTION")
+        except Exception as e:
+            # O servidor pode já ter desfeito a transação (ex.: erro grave ou XACT_ABORT)
+            print(f"Erro ao desfazer a transação: {e}")
+        finally:
+            self._end()
+
+    def savepoint(self, name=None):
+        """
+        Cria um savepoint.
+
+        Returns:
+            str: Nome do savepoint, para `rollback_to`.
+        """
+        self._savepoints += 1
+        name = name or f"sp{self._savepoints}"
+        if not _SAVEPOINT_PATTERN.match(name):
+            raise ValueError(f"Nome de savepoint inválido: {name!r}")
+        self._execute(f"SAVE TRANSACTION {name}")
+        return name
+
+    def rollback_to(self, name):
+        """Desfaz o que foi feito depois do savepoint, mantendo a transação aberta."""
+        self._execute(f"ROLLBACK TRANSACTION {name}")
+
+    def _execute(self, sql):
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _end(self):
+        try:
+            if self.isolation_level and self.isolation_level != DEFAULT_ISOLATION_LEVEL:
+                self._execute(f"SET TRANSACTION ISOLATION LEVEL {DEFAULT_ISOLATION_LEVEL}")
+        finally:
+            self.conn.autocommit = self._previous_autocommit
@@ -0,0 +1,216 @@
+import threading
+import time
+
+from helpers.StatementCache import validate_table
+
+
+class WriteBufferFullError(Exception):
+    """O buffer atingiu o limite de linhas pendentes e não liberou espaço dentro do timeout."""
+
+
+class WriteBufferClosedError(Exception):
+    """O buffer já foi fechado e não aceita novas linhas."""
+
+
+class _Bucket:
+    __slots__ = ('rows', 'since')
+
+    def __init__(self):
+        self.rows = []
+        self.since = time.monotonic()
+
+
+class WriteBehindBuffer:
+    """
+    Buffer de gravação assíncrona (write-behind) para inserções de uma linha.
+
+    `put` apenas enfileira a linha e retorna; uma thread em segundo plano agrupa as linhas por
+    tabela (e conjunto de colunas) e grava cada grupo com `insert_batch`, em uma transação,
+    quando ele atinge `max_rows` linhas ou a linha mais antiga espera `flush_interval` segundos.
+
+    Quando há `max_pending` linhas pendentes (no buffer ou sendo gravadas), `put` bloqueia até
+    haver espaço (backpressure) e lança WriteBufferFullError após `put_timeout` segundos.
+    Falhas de gravação não chegam a quem chamou `put`: são entregues a `on_error` e contadas
+    nas estatísticas. A ordem é preservada dentro de cada tabela, mas não entre tabelas.
+    """
+
+    def __init__(self, manager_factory, max_rows=500, flush_interval=1.0, max_pending=10000,
+                 put_timeout=30, on_error=None):
+        """
+        Args:
+            manager_factory (callable): Cria um DatabaseManager para cada gravação
+                                        (ex.: lambda: DatabaseManager(pool=pool, cache=cache)).
+            max_rows (int): Linhas de uma tabela que disparam a gravação imediata.
+            flush_interval (float): Segundos máximos que uma linha espera no buffer.
+            max_pending (int): Limite de linhas pendentes antes de `put` bloquear.
+            put_timeout (float): Segundos de espera por espaço em `put` (None = sem limite).
+            on_error (callable): Recebe (tabela, linhas, exceção) quando uma gravação falha.
+                                 Padrão: imprime o erro; as linhas são descartadas.
+        """
+        if max_rows < 1 or max_pending < max_rows:
+            raise ValueError("Limites inválidos: exige max_rows >= 1 e max_pending >= max_rows.")
+
+        self._manager_factory = manager_factory
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.on_error = on_error or self._print_error
+
+        self._cond = threading.Condition()
+        self._buckets = {}      # (tabela, colunas) -> _Bucket
+        self._pending = 0       # Linhas no buffer + em gravação
+        self._flush_requested = 0
+        self._flushes_done = 0
+        self._closed = False
+        self._thread = None
+        self._stats = {'rows_written': 0, 'rows_failed': 0, 'batches_written': 0, 'batches_failed': 0}
+
+    @property
+    def pending(self):
+        """Linhas aguardando gravação (no buffer ou sendo gravadas)."""
+        return self._pending
+
+    def put(self, table, data, timeout=None):
+        """
+        Enfileira uma linha para inserção em segundo plano.
+
+        Args:
+            table (str): Nome da tabela (com schema, ex: 'SCHEMA.tabela').
+            data (dict): Colunas e valores, como em `insert_data`.
+            timeout (float): Sobrescreve `put_timeout` nesta chamada (opcional).
+
+        Raises:
+            WriteBufferFullError: Se o buffer continuar cheio após o timeout.
+            WriteBufferClosedError: Se o buffer já foi fechado.
+        """
+        validate_table(table)
+        row = dict(data)
+        key = (table, tuple(row))
+        timeout = self.put_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            while not self._closed and self._pending >= self.max_pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise WriteBufferFullError(
+                        f"Buffer de gravação cheio ({self._pending} linhas pendentes) após {timeout}s."
+                    )
+                self._cond.wait(remaining)
+            if self._closed:
+                raise WriteBufferClosedError("O buffer de gravação foi fechado.")
+
+            bucket = self._buckets.get(key)
+            first = not self._buckets
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket()
+            bucket.rows.append(row)
+            self._pending += 1
+            self._ensure_thread()
+            # Acorda a thread quando o grupo enche ou quando passa a existir um prazo a esperar
+            if first or len(bucket.rows) >= self.max_rows:
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Grava imediatamente todas as linhas do buffer e aguarda a conclusão.
+
+        Returns:
+            bool: True se a gravação terminou dentro do timeout (retorna na hora após `close`).
+        """
+        with self._cond:
+            if self._thread is None or (self._closed and not self._thread.is_alive()):
+                # Nada foi enfileirado ou o buffer já foi fechado (a thread gravou tudo ao sair)
+                return not self._buckets
+            self._ensure_thread()
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._flushes_done >= target, timeout)
+
+    def close(self, timeout=None):
+        """Deixa de aceitar linhas, grava o que estiver pendente e encerra a thread."""
+        with self._cond:
+            if self._closed:
+                thread = None
+            else:
+                self._closed = True
+                thread = self._thread
+                self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        """Contadores do buffer: pendentes, linhas e lotes gravados ou com falha."""
+        with self._cond:
+            return dict(self._stats, pending=self._pending)
+
+    def _ensure_thread(self):
+        # Recria a thread se ela ainda não existe ou terminou
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='db-write-behind', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    flush_all = self._closed or self._flush_requested > self._flushes_done
+                    ready, wait = self._take_ready(flush_all)
+                    if ready or flush_all:
+                        break
+                    self._cond.wait(wait)
+                flush_target = self._flush_requested
+                closing = self._closed
+
+            for (table, _), rows in ready:
+                self._write(table, rows)
+
+            with self._cond:
+                self._pending -= sum(len(rows) for _, rows in ready)
+                if flush_all:
+                    self._flushes_done = flush_target
+                self._cond.notify_all()
+                if closing and not self._buckets:
+                    return
+
+    def _take_ready(self, flush_all):
+        # Retira do buffer os grupos prontos; devolve também quanto esperar pelo próximo prazo
+        now = time.monotonic()
+        ready, wait = [], None
+        for key, bucket in list(self._buckets.items()):
+            due = bucket.since + self.flush_interval
+            if flush_all or len(bucket.rows) >= self.max_rows or due <= now:
+                ready.append((key, bucket.rows))
+                del self._buckets[key]
+            else:
+                wait = due - now if wait is None else min(wait, due - now)
+        return ready, wait
+
+    def _write(self, table, rows):
+        db = None
+        try:
+            # Dentro do try: uma falha ao criar o manager (ex.: variável de ambiente ausente)
+            # conta como falha do lote em vez de encerrar a thread
+            db = self._manager_factory()
+            db.connect_to_database()
+            db.insert_batch(table, rows)
+            with self._cond:
+                self._stats['rows_written'] += len(rows)
+                self._stats['batches_written'] += 1
+        except Exception as e:
+            with self._cond:
+                self._stats['rows_failed'] += len(rows)
+                self._stats['batches_failed'] += 1
+            try:
+                self.on_error(table, rows, e)
+            except Exception as callback_error:
+                print(f"Erro no callback de falha do buffer de gravação: {callback_error}")
+        finally:
+            if db is not None:
+                db.close_connection()
+
+    @staticmethod
+    def _print_error(table, rows, error):
+        print(f"Erro ao gravar {len(rows)} linhas em {table} (buffer de gravação): {error}")